@@ -0,0 +1,25 @@
+"""User achievements keyset index
+
+Revision ID: 37d8eba5b6c9
+Revises: b25272e8a110
+Create Date: 2026-10-18 11:48:09.310274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '37d8eba5b6c9'
+down_revision: Union[str, None] = 'b25272e8a110'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_user_achievements_user_id_id', 'user_achievements', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_achievements_user_id_id', table_name='user_achievements')
@@ -0,0 +1,76 @@
+"""User streaks
+
+Revision ID: 5e1d3f3753bc
+Revises: 37d8eba5b6c9
+Create Date: 2026-10-18 10:46:41.115746
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1d3f3753bc'
+down_revision: Union[str, None] = '37d8eba5b6c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_streaks',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), nullable=False),
+    sa.Column('longest_streak', sa.Integer(), nullable=False),
+    sa.Column('current_start', sa.Date(), nullable=False),
+    sa.Column('last_award_date', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Заполнение серий по уже выданным достижениям: дни одной серии
+    # дают одинаковую разность "день - номер дня"
+    op.execute(
+        """
+        WITH days AS (
+            SELECT DISTINCT user_id, date(issued_at) AS day
+            FROM user_achievements
+        ), runs AS (
+            SELECT user_id, count(*) AS length,
+                   min(day) AS start, max(day) AS last_day
+            FROM (
+                SELECT user_id, day,
+                       day - row_number() OVER (
+                           PARTITION BY user_id ORDER BY day
+                       )::integer AS island
+                FROM days
+            ) islands
+            GROUP BY user_id, island
+        ), ranked AS (
+            SELECT user_id, length, start, last_day,
+                   max(length) OVER (PARTITION BY user_id) AS longest,
+                   row_number() OVER (
+                       PARTITION BY user_id ORDER BY last_day DESC
+                   ) AS position
+            FROM runs
+        )
+        INSERT INTO user_streaks
+            (user_id, current_streak, longest_streak,
+             current_start, last_award_date)
+        SELECT user_id, length, longest, start, last_day
+        FROM ranked
+        WHERE position = 1
+        """
+    )
+
+    # Индексы создаются после заполнения, чтобы не обновлять их
+    # построчно во время backfill
+    op.create_index(op.f('ix_user_streaks_current_streak'), 'user_streaks', ['current_streak'], unique=False)
+    op.create_index(op.f('ix_user_streaks_longest_streak'), 'user_streaks', ['longest_streak'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_streaks_longest_streak'), table_name='user_streaks')
+    op.drop_index(op.f('ix_user_streaks_current_streak'), table_name='user_streaks')
+    op.drop_table('user_streaks')
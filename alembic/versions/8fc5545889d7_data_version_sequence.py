@@ -0,0 +1,26 @@
+"""Data version sequence
+
+Revision ID: 8fc5545889d7
+Revises: 5e1d3f3753bc
+Create Date: 2026-10-18 10:49:52.825500
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8fc5545889d7'
+down_revision: Union[str, None] = '5e1d3f3753bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('data_version_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('data_version_seq')))
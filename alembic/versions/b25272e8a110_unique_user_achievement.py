@@ -0,0 +1,49 @@
+"""Unique user achievement
+
+Revision ID: b25272e8a110
+Revises: beb4e338e0a4
+Create Date: 2026-10-18 11:03:17.582906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b25272e8a110'
+down_revision: Union[str, None] = 'beb4e338e0a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Удаляем повторные выдачи, оставляя самую раннюю запись
+    op.execute(
+        """
+        DELETE FROM user_achievements ua
+        USING user_achievements earlier
+        WHERE earlier.user_id = ua.user_id
+          AND earlier.achievement_id = ua.achievement_id
+          AND earlier.id < ua.id
+        """
+    )
+
+    # Агрегаты могли учитывать удаленные дубликаты - пересчитываем
+    op.execute("DELETE FROM user_stats")
+    op.execute(
+        """
+        INSERT INTO user_stats
+            (user_id, achievement_count, total_points, last_issued_at)
+        SELECT ua.user_id, count(*), sum(a.points), max(ua.issued_at)
+        FROM user_achievements ua
+        JOIN achievements a ON a.id = ua.achievement_id
+        GROUP BY ua.user_id
+        """
+    )
+
+    op.create_unique_constraint('uq_user_achievements_user_id_achievement_id', 'user_achievements', ['user_id', 'achievement_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_achievements_user_id_achievement_id', 'user_achievements', type_='unique')
@@ -0,0 +1,27 @@
+"""History index by issued_at
+
+Revision ID: b3d9e4f7a812
+Revises: f42c8b1d6e05
+Create Date: 2026-10-18 21:14:07.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e4f7a812'
+down_revision: Union[str, None] = 'f42c8b1d6e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_user_achievements_user_id_issued_at_id', 'user_achievements', ['user_id', 'issued_at', 'id'], unique=False)
+    op.drop_index('ix_user_achievements_user_id_id', table_name='user_achievements')
+
+
+def downgrade() -> None:
+    op.create_index('ix_user_achievements_user_id_id', 'user_achievements', ['user_id', 'id'], unique=False)
+    op.drop_index('ix_user_achievements_user_id_issued_at_id', table_name='user_achievements')
@@ -0,0 +1,52 @@
+"""User stats
+
+Revision ID: beb4e338e0a4
+Revises: 487d0454cddb
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'beb4e338e0a4'
+down_revision: Union[str, None] = '487d0454cddb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('achievement_count', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.BigInteger(), nullable=False),
+    sa.Column('last_issued_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Заполнение агрегатов по уже выданным достижениям
+    op.execute(
+        """
+        INSERT INTO user_stats
+            (user_id, achievement_count, total_points, last_issued_at)
+        SELECT ua.user_id, count(*), sum(a.points), max(ua.issued_at)
+        FROM user_achievements ua
+        JOIN achievements a ON a.id = ua.achievement_id
+        GROUP BY ua.user_id
+        """
+    )
+
+    # Индексы создаются после заполнения, чтобы не обновлять их
+    # построчно во время backfill
+    op.create_index(op.f('ix_user_stats_achievement_count'), 'user_stats', ['achievement_count'], unique=False)
+    op.create_index(op.f('ix_user_stats_total_points'), 'user_stats', ['total_points'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_stats_total_points'), table_name='user_stats')
+    op.drop_index(op.f('ix_user_stats_achievement_count'), table_name='user_stats')
+    op.drop_table('user_stats')
@@ -0,0 +1,33 @@
+"""Achievement translations
+
+Revision ID: c3a9e0d47f21
+Revises: 8fc5545889d7
+Create Date: 2026-10-18 11:20:37.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e0d47f21'
+down_revision: Union[str, None] = '8fc5545889d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('achievement_translations',
+    sa.Column('achievement_id', sa.Integer(), nullable=False),
+    sa.Column('language', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['achievement_id'], ['achievements.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('achievement_id', 'language')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('achievement_translations')
@@ -0,0 +1,34 @@
+"""User stats leaderboard indexes
+
+Revision ID: d81f2c6a9b47
+Revises: c3a9e0d47f21
+Create Date: 2026-10-18 12:02:51.148306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f2c6a9b47'
+down_revision: Union[str, None] = 'c3a9e0d47f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Составные индексы заменяют одноколоночные: они же обслуживают
+    # поиск максимума и фильтр по значению
+    op.create_index('ix_user_stats_total_points_user_id', 'user_stats', ['total_points', 'user_id'], unique=False)
+    op.create_index('ix_user_stats_achievement_count_user_id', 'user_stats', ['achievement_count', 'user_id'], unique=False)
+    op.drop_index('ix_user_stats_total_points', table_name='user_stats')
+    op.drop_index('ix_user_stats_achievement_count', table_name='user_stats')
+
+
+def downgrade() -> None:
+    op.create_index('ix_user_stats_achievement_count', 'user_stats', ['achievement_count'], unique=False)
+    op.create_index('ix_user_stats_total_points', 'user_stats', ['total_points'], unique=False)
+    op.drop_index('ix_user_stats_achievement_count_user_id', table_name='user_stats')
+    op.drop_index('ix_user_stats_total_points_user_id', table_name='user_stats')
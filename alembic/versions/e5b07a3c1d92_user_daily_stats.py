@@ -0,0 +1,48 @@
+"""User daily stats
+
+Revision ID: e5b07a3c1d92
+Revises: d81f2c6a9b47
+Create Date: 2026-10-18 12:41:19.870245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b07a3c1d92'
+down_revision: Union[str, None] = 'd81f2c6a9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('achievement_count', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('day', 'user_id')
+    )
+
+    # Заполнение дневных агрегатов по уже выданным достижениям
+    op.execute(
+        """
+        INSERT INTO user_daily_stats
+            (day, user_id, achievement_count, total_points)
+        SELECT date(ua.issued_at), ua.user_id, count(*), sum(a.points)
+        FROM user_achievements ua
+        JOIN achievements a ON a.id = ua.achievement_id
+        GROUP BY date(ua.issued_at), ua.user_id
+        """
+    )
+
+    op.create_index('ix_user_achievements_issued_at', 'user_achievements', ['issued_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_achievements_issued_at', table_name='user_achievements')
+    op.drop_table('user_daily_stats')
@@ -0,0 +1,179 @@
+"""Partition user achievements
+
+Revision ID: f42c8b1d6e05
+Revises: e5b07a3c1d92
+Create Date: 2026-10-18 19:05:43.512318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f42c8b1d6e05'
+down_revision: Union[str, None] = 'e5b07a3c1d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции на столько месяцев вперед создаются при миграции
+MONTHS_AHEAD = 3
+
+CREATE_PARTITION = """
+CREATE FUNCTION create_user_achievements_partition(month_start date)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    first_day date := date_trunc('month', month_start)::date;
+    next_day date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'user_achievements_' || to_char(first_day, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    -- Строки месяца из секции по умолчанию переносятся в новую
+    -- секцию до ее подключения: иначе подключение не пройдет проверку
+    EXECUTE 'CREATE TABLE ' || quote_ident(partition_name)
+        || ' (LIKE user_achievements INCLUDING DEFAULTS)';
+    EXECUTE 'WITH moved AS (DELETE FROM user_achievements_default'
+        || ' WHERE issued_at >= $1 AND issued_at < $2 RETURNING *)'
+        || ' INSERT INTO ' || quote_ident(partition_name)
+        || ' SELECT * FROM moved'
+        USING first_day, next_day;
+    EXECUTE 'ALTER TABLE user_achievements ATTACH PARTITION '
+        || quote_ident(partition_name)
+        || ' FOR VALUES FROM (' || quote_literal(first_day)
+        || ') TO (' || quote_literal(next_day) || ')';
+    RETURN true;
+END
+$$
+"""
+
+ENSURE_PARTITIONS = """
+CREATE FUNCTION ensure_user_achievements_partitions(
+    first_at timestamp,
+    last_at timestamp
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', first_at)::date;
+    created integer := 0;
+BEGIN
+    -- Воркеры, обслуживающие секции одновременно, не создают
+    -- одну секцию дважды
+    PERFORM pg_advisory_xact_lock(hashtext('user_achievements_partitions'));
+    WHILE month_start <= last_at LOOP
+        IF create_user_achievements_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    # Уникальность выдачи: секционированная таблица не может иметь
+    # уникального ограничения без ключа секционирования
+    op.create_table('user_achievement_claims',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('achievement_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['achievement_id'], ['achievements.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'achievement_id')
+    )
+    op.execute(
+        """
+        INSERT INTO user_achievement_claims (user_id, achievement_id)
+        SELECT user_id, achievement_id FROM user_achievements
+        """
+    )
+
+    # Старая таблица освобождает имена индексов и ограничений
+    op.execute("ALTER TABLE user_achievements RENAME TO user_achievements_flat")
+    op.execute("ALTER TABLE user_achievements_flat RENAME CONSTRAINT user_achievements_pkey TO user_achievements_flat_pkey")
+    op.drop_constraint('uq_user_achievements_user_id_achievement_id', 'user_achievements_flat', type_='unique')
+    op.drop_index('ix_user_achievements_id', table_name='user_achievements_flat')
+    op.drop_index('ix_user_achievements_user_id_id', table_name='user_achievements_flat')
+    op.drop_index('ix_user_achievements_issued_at', table_name='user_achievements_flat')
+
+    op.execute(
+        """
+        CREATE TABLE user_achievements (
+            id integer NOT NULL DEFAULT nextval('user_achievements_id_seq'),
+            user_id integer NOT NULL,
+            achievement_id integer NOT NULL,
+            issued_at timestamp without time zone NOT NULL,
+            CONSTRAINT user_achievements_pkey PRIMARY KEY (id, issued_at),
+            CONSTRAINT user_achievements_user_id_fkey
+                FOREIGN KEY (user_id) REFERENCES users (id),
+            CONSTRAINT user_achievements_achievement_id_fkey
+                FOREIGN KEY (achievement_id) REFERENCES achievements (id)
+        ) PARTITION BY RANGE (issued_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE user_achievements_id_seq OWNED BY user_achievements.id")
+    op.execute("CREATE TABLE user_achievements_default PARTITION OF user_achievements DEFAULT")
+    op.execute(CREATE_PARTITION)
+    op.execute(ENSURE_PARTITIONS)
+
+    # Секции создаются до переноса данных: строки сразу попадают
+    # в секции своих месяцев, а не в секцию по умолчанию
+    op.execute(
+        f"""
+        SELECT ensure_user_achievements_partitions(
+            COALESCE((SELECT min(issued_at) FROM user_achievements_flat),
+                     now() AT TIME ZONE 'UTC'),
+            now() AT TIME ZONE 'UTC' + interval '{MONTHS_AHEAD} months'
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO user_achievements (id, user_id, achievement_id, issued_at)
+        SELECT id, user_id, achievement_id, issued_at
+        FROM user_achievements_flat
+        """
+    )
+    op.drop_table('user_achievements_flat')
+
+    # Индексы на секционированной таблице создаются в каждой секции
+    op.create_index('ix_user_achievements_user_id_id', 'user_achievements', ['user_id', 'id'], unique=False)
+    op.create_index('ix_user_achievements_issued_at', 'user_achievements', ['issued_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    op.create_table('user_achievements_flat',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('user_achievements_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('achievement_id', sa.Integer(), nullable=False),
+    sa.Column('issued_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['achievement_id'], ['achievements.id'], name='user_achievements_achievement_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='user_achievements_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='user_achievements_flat_pkey')
+    )
+    op.execute(
+        """
+        INSERT INTO user_achievements_flat (id, user_id, achievement_id, issued_at)
+        SELECT id, user_id, achievement_id, issued_at
+        FROM user_achievements
+        """
+    )
+    op.execute("ALTER SEQUENCE user_achievements_id_seq OWNED BY user_achievements_flat.id")
+    op.drop_table('user_achievements')
+    op.execute("DROP FUNCTION ensure_user_achievements_partitions(timestamp, timestamp)")
+    op.execute("DROP FUNCTION create_user_achievements_partition(date)")
+
+    op.rename_table('user_achievements_flat', 'user_achievements')
+    op.execute("ALTER TABLE user_achievements RENAME CONSTRAINT user_achievements_flat_pkey TO user_achievements_pkey")
+    op.create_index('ix_user_achievements_id', 'user_achievements', ['id'], unique=False)
+    op.create_index('ix_user_achievements_user_id_id', 'user_achievements', ['user_id', 'id'], unique=False)
+    op.create_index('ix_user_achievements_issued_at', 'user_achievements', ['issued_at'], unique=False)
+    op.create_unique_constraint('uq_user_achievements_user_id_achievement_id', 'user_achievements', ['user_id', 'achievement_id'])
+    op.drop_table('user_achievement_claims')
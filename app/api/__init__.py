@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from app.api import health, metrics
 from app.api.v1 import api_v1_router
 
 
@@ -7,3 +8,9 @@ api_router = APIRouter()
 
 # Подключение версий API
 api_router.include_router(api_v1_router)
+
+# Метрики в формате Prometheus (путь без версии API)
+api_router.include_router(metrics.router, tags=["system"])
+
+# Готовность воркера (окончание прогрева)
+api_router.include_router(health.router, tags=["system"])
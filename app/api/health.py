@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Response
+from starlette import status
+
+from app.services.warmup import startup
+
+
+router = APIRouter()
+
+
+@router.get("/ready")
+async def get_readiness(response: Response):
+    """
+    Готовность воркера принимать запросы.
+
+    Воркер начинает отвечать сразу после старта, а прогрев (версия
+    данных, соединения пула, кэш каталога, заполнение пустой базы
+    при `SEED_ON_STARTUP=true`) выполняется в фоне. Пока прогрев
+    не завершен, эндпоинт отвечает 503 - балансировщик
+    (readinessProbe) не направляет на воркер трафик. Шаг прогрева
+    с ошибкой (например, база еще недоступна) повторяется с растущей
+    задержкой до `WARM_UP_RETRY_MAX_DELAY` секунд, пока не выполнится.
+
+    **Параметры запроса**:
+    - Отсутствуют.
+
+    **Возвращаемое значение**:
+    - `status` (str): `starting`, `ready` или `retrying` (шаг
+    прогрева завершился ошибкой и будет повторен).
+    - `startup_s` (float): Время от импорта приложения до окончания
+    прогрева в секундах (`null`, пока прогрев не завершен).
+    - `steps` (dict): Длительность шагов прогрева в секундах.
+    - `error` (str): Последняя ошибка повторяемого шага (`null`,
+    если ее нет).
+
+    **Пример запроса**:
+    ```
+    GET /ready
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "status": "ready",
+      "startup_s": 0.412,
+      "steps": {"data_version": 0.004, "pool": 0.031, "catalog": 0.006},
+      "error": null
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK), если прогрев завершен.
+    - HTTP 503 (Service Unavailable), если прогрев еще идет.
+    """
+    if not startup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return startup.snapshot()
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Response
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, registry
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus.
+
+    Метрики собираются со всех воркеров: каждый воркер сохраняет
+    снимок своих метрик в каталог `METRICS_DIR` раз
+    в `METRICS_FLUSH_INTERVAL` секунд, эндпоинт объединяет снимки
+    с текущими метриками обработавшего запрос воркера. Без
+    `METRICS_DIR` возвращаются метрики только этого воркера.
+
+    **Параметры запроса**:
+    - Отсутствуют.
+
+    **Возвращаемое значение**:
+    - Текст в формате Prometheus с метриками:
+      - `http_requests_total{method, route, status}`: Число запросов.
+      - `http_request_duration_seconds{method, route}`: Гистограмма
+      времени обработки запроса.
+      - `http_requests_in_flight`: Запросы в обработке.
+      - `db_queries_total{route}`: Число SQL-запросов маршрута.
+      - `db_query_duration_seconds{route}`: Гистограмма времени
+      SQL-запроса.
+      - `db_request_time_seconds{route}`: Гистограмма суммарного
+      времени SQL-запросов одного HTTP-запроса.
+      - `db_pool_connections{engine, state}`: Соединения пула
+      (`in_use`, `idle`, `overflow`, `capacity`).
+      - `db_pool_wait_seconds_total{engine}`,
+      `db_pool_timeouts_total{engine}`: Ожидание свободного
+      соединения.
+
+    **Пример запроса**:
+    ```
+    GET /metrics
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: text/plain; version=0.0.4; charset=utf-8
+
+    # HELP http_requests_total HTTP requests by route and status
+    # TYPE http_requests_total counter
+    http_requests_total{method="GET",route="/api/v1/users/",status="200"} 42
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    """
+    return Response(
+        content=registry.render(settings.metrics_dir or None),
+        media_type=CONTENT_TYPE
+    )
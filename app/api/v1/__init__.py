@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import user, achievement
+from app.api.v1.endpoints import user, achievement, leaderboard, system
 
 api_v1_router = APIRouter(prefix="/api/v1")
 
@@ -10,3 +10,9 @@ api_v1_router.include_router(user.router,
 api_v1_router.include_router(achievement.router,
                              prefix="/achievements",
                              tags=["achievement"])
+api_v1_router.include_router(leaderboard.router,
+                             prefix="/leaderboard",
+                             tags=["leaderboard"])
+api_v1_router.include_router(system.router,
+                             prefix="/system",
+                             tags=["system"])
@@ -1,8 +1,27 @@
-from fastapi import APIRouter
+from datetime import datetime, UTC
+from typing import Optional
 
-from app.db.session import SessionDep
+from fastapi import APIRouter, Query, Request, Response
+
+from app.core.config import settings
+from app.db.session import SessionDep, run_db
+from app.enums.streaks import StreakKindEnum
 from app.schemas import achievement_schemas
 from app.services import achievement as achievement_repo
+from app.services import streaks as streaks_repo
+from app.services.conditional import (
+    cached_stats,
+    catalog_etag,
+    conditional,
+)
+from app.services.imports import NDJSON_REQUEST_BODY, import_ndjson
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    page_limit,
+    set_pagination_headers,
+)
+from app.services.serialization import trusted_response
+from app.services.windows import StatsWindowDep, window_cache_params
 
 
 router = APIRouter()
@@ -10,7 +29,7 @@ router = APIRouter()
 
 @router.post("/",
              response_model=achievement_schemas.Achievement)
-def create_achievement(
+async def create_achievement(
         achievement: achievement_schemas.AchievementCreate,
         db: SessionDep
 ):
@@ -54,24 +73,115 @@ def create_achievement(
     - HTTP 200 (OK) при успешном выполнении запроса.
     - HTTP 422 (Validation Error): Неверные данные для создания достижения.
     """
-    return achievement_repo.create_achievement(
-        db=db,
+    return await run_db(
+        db,
+        achievement_repo.create_achievement,
         achievement=achievement
     )
 
 
+@router.post("/import",
+             openapi_extra=NDJSON_REQUEST_BODY)
+async def import_achievements(
+        request: Request,
+        db: SessionDep,
+        batch_size: int = Query(default=settings.import_batch_size,
+                                ge=1,
+                                le=10_000)
+):
+    """
+    Потоковый импорт каталога достижений из NDJSON.
+
+    Тело запроса читается и разбирается по мере загрузки, достижения
+    вставляются пакетами по `batch_size`, каждый пакет в отдельной
+    транзакции. Потребление памяти не зависит от размера загрузки.
+
+    **Параметры запроса**:
+    - `batch_size` (int): Размер пакета (по умолчанию из настройки
+    `IMPORT_BATCH_SIZE`, не более 10000).
+
+    **Тело запроса**:
+    - По одному объекту `AchievementCreate` в строке
+    (`application/x-ndjson`).
+
+    **Возвращаемое значение**:
+    - Итоги импорта:
+      - `processed` (int): Количество непустых строк.
+      - `inserted` (int): Количество созданных достижений.
+      - `batches` (int): Количество пакетов.
+      - `failed` (int): Количество строк с ошибками.
+      - `errors`: Первые ошибки (не более `IMPORT_MAX_ERRORS`)
+      с полями `line` (номер строки) и `error` (описание).
+      Строки длиннее `IMPORT_MAX_LINE_BYTES` байт не разбираются
+      и считаются ошибочными.
+
+    **Пример запроса**:
+    ```
+    POST /achievements/import
+    Content-Type: application/x-ndjson
+
+    {"name_en": "Master", "name_ru": "Мастер", "points": 10, \
+"description_en": "You are master", "description_ru": "Ты мастер"}
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "processed": 1,
+      "inserted": 1,
+      "batches": 1,
+      "failed": 0,
+      "errors": []
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK): Загрузка обработана.
+    """
+    return await import_ndjson(
+        db,
+        request.stream(),
+        schema=achievement_schemas.AchievementCreate,
+        insert_rows=achievement_repo.create_achievements_bulk,
+        batch_size=batch_size,
+        max_errors=settings.import_max_errors,
+        max_line_bytes=settings.import_max_line_bytes
+    )
+
+
 @router.get("/",
             response_model=list[achievement_schemas.Achievement])
-def read_achievements(db: SessionDep):
+async def read_achievements(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1),
+        cursor: Optional[str] = None
+):
     """
     Получение списка всех достижений в системе.
 
     Этот эндпоинт позволяет получить список всех существующих в базе данных
-    достижений.
+    достижений постранично (keyset-пагинация по идентификатору).
 
     **Параметры пути**:
     Отсутствуют
 
+    **Параметры запроса**:
+    - `limit` (int): Размер страницы (по умолчанию 50, больший 500
+    уменьшается до 500).
+    - `cursor` (str): Непрозрачный курсор следующей страницы из
+    заголовка `X-Next-Cursor` предыдущего ответа.
+
+    **Заголовки ответа**:
+    - `X-Next-Cursor`: Курсор следующей страницы (отсутствует
+    на последней странице).
+    - `Link`: Ссылка на следующую страницу (`rel="next"`).
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Возвращаемое значение**:
     - Список объектов `Achievement`, содержащий следующие поля:
       - `id` (int): Идентификатор достижения.
@@ -105,12 +215,36 @@ def read_achievements(db: SessionDep):
 
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
+    - HTTP 400 (Bad Request): Неверный курсор.
     """
-    return achievement_repo.get_achievements(db=db)
+    limit = page_limit(limit)
+    not_modified = conditional(
+        request,
+        response,
+        catalog_etag("achievements", cursor, limit)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    page = await run_db(
+        db,
+        achievement_repo.get_achievements,
+        cursor=cursor,
+        limit=limit
+    )
+    set_pagination_headers(request, response, page.next_cursor)
+    return trusted_response(page.items, response)
 
 
 @router.get("/stats/top-user")
-def get_user_with_max_achievements(db: SessionDep):
+async def get_user_with_max_achievements(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep
+):
     """
     Извлечь пользователя(ей) с максимальным
     количеством достижений.
@@ -123,7 +257,12 @@ def get_user_with_max_achievements(db: SessionDep):
     количество достижений.
 
     **Параметры запроса**:
-    - Отсутствуют.
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
 
     **Возвращаемое значение**:
     - Список словарей, состоящих из следующих полей:
@@ -131,6 +270,11 @@ def get_user_with_max_achievements(db: SessionDep):
       - `user_name` (str): Имя пользователя.
       - `achievement_count` (int): Количество достижений пользователя.
 
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Пример запроса**:
     ```
     GET /achievements/stats/top-user
@@ -150,12 +294,28 @@ def get_user_with_max_achievements(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
     """
-    return achievement_repo.users_with_max_achievements(db=db)
+    return await cached_stats(
+        request,
+        response,
+        "top-user",
+        lambda: run_db(db, achievement_repo.users_with_max_achievements,
+                       window=window),
+        **window_cache_params(window)
+    )
 
 
 @router.get("/stats/top-user-points")
-def get_user_with_max_points(db: SessionDep):
+async def get_user_with_max_points(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep
+):
     """
     Извлечь пользователя(ей) с максимальным
     количеством очков.
@@ -168,7 +328,12 @@ def get_user_with_max_points(db: SessionDep):
     и количество достижений.
 
     **Параметры запроса**:
-    - Отсутствуют.
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
 
     **Возвращаемое значение**:
     - Список словарей, состоящих из следующих полей:
@@ -176,6 +341,11 @@ def get_user_with_max_points(db: SessionDep):
       - `user_name` (str): Имя пользователя.
       - `total_points` (int): Количество очков пользователя.
 
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Пример запроса**:
     ```
     GET /achievements/stats/top-user-points
@@ -195,18 +365,42 @@ def get_user_with_max_points(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
     """
-    return achievement_repo.user_with_max_points(db=db)
+    return await cached_stats(
+        request,
+        response,
+        "top-user-points",
+        lambda: run_db(db, achievement_repo.user_with_max_points,
+                       window=window),
+        **window_cache_params(window)
+    )
 
 
 @router.get("/stats/max-points-difference")
-def get_users_with_max_points_difference(db: SessionDep):
+async def get_users_with_max_points_difference(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep,
+        limit: int = Query(default=100, ge=1, le=10_000)
+):
     """
     Извлечь пользователей с максимальной разностью очков
     достижений (разность баллов между  пользователями).
 
     **Параметры запроса**:
-    - Отсутствуют.
+    - `limit` (int): Максимальное количество пар в ответе
+    (по умолчанию 100, не более 10000).
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
 
     **Возвращаемое значение**:
     - Список парных словарей, состоящих из следующих полей:
@@ -217,9 +411,14 @@ def get_users_with_max_points_difference(db: SessionDep):
       - `total_points` (int): Количество очков пользователя.
       - `points_difference` (int): Разница очков двух пользователей.
 
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Пример запроса**:
     ```
-    GET /achievements/stats/max-points-difference
+    GET /achievements/stats/max-points-difference?limit=10
     ```
     **Пример ответа**:
     ```
@@ -244,21 +443,48 @@ def get_users_with_max_points_difference(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
     """
-    return achievement_repo.get_users_with_points_difference(
-        db=db,
-        find_max=True
+    return await cached_stats(
+        request,
+        response,
+        "max-points-difference",
+        lambda: run_db(
+            db,
+            achievement_repo.get_users_with_points_difference,
+            find_max=True,
+            limit=limit,
+            window=window
+        ),
+        limit=limit,
+        **window_cache_params(window)
     )
 
 
 @router.get("/stats/min-points-difference")
-def get_users_with_min_points_difference(db: SessionDep):
+async def get_users_with_min_points_difference(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep,
+        limit: int = Query(default=100, ge=1, le=10_000)
+):
     """
     Извлечь пользователей с минимальной разностью очков
     достижений (разность баллов между пользователями).
 
     **Параметры запроса**:
-    - Отсутствуют.
+    - `limit` (int): Максимальное количество пар в ответе
+    (по умолчанию 100, не более 10000).
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
 
     **Возвращаемое значение**:
     - Список парных словарей, состоящих из следующих полей:
@@ -269,9 +495,14 @@ def get_users_with_min_points_difference(db: SessionDep):
       - `total_points` (int): Количество очков пользователя.
       - `points_difference` (int): Разница очков двух пользователей.
 
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Пример запроса**:
     ```
-    GET /achievements/stats/min-points-difference
+    GET /achievements/stats/min-points-difference?limit=10
     ```
     **Пример ответа**:
     ```
@@ -296,34 +527,62 @@ def get_users_with_min_points_difference(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
     """
-    return achievement_repo.get_users_with_points_difference(
-        db=db,
-        find_max=False
+    return await cached_stats(
+        request,
+        response,
+        "min-points-difference",
+        lambda: run_db(
+            db,
+            achievement_repo.get_users_with_points_difference,
+            find_max=False,
+            limit=limit,
+            window=window
+        ),
+        limit=limit,
+        **window_cache_params(window)
     )
 
 
 @router.get("/stats/7-day-streak")
-def get_users_with_7_day_streak(db: SessionDep):
+async def get_users_with_7_day_streak(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep
+):
     """
     Извлечь пользователей, которые получали достижения 7 дней подряд
     (по дате выдачи, хотя бы  одно в каждый из 7 дней)
 
+    Читает самые длинные серии пользователей из предрасчитанных
+    серий, эквивалентно `GET /achievements/stats/streaks?kind=longest
+    &min_days=7` без ограничения количества.
+
     **Параметры запроса**:
-    - Отсутствуют.
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
 
     **Возвращаемое значение**:
-    - Список парных словарей, состоящих из следующих полей:
-      - `user_1` (int): Данные о первом пользователе.
-      - `user_2` (int):  Данные о втором пользователе.
-      - `id` (int): Уникальный идентификатор пользователя.
-      - `name` (str): Имя пользователя.
-      - `total_points` (int): Количество очков пользователя.
-      - `points_difference` (int): Разница очков двух пользователей.
+    - Список идентификаторов пользователей (по убыванию самой
+    длинной серии).
+
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
 
     **Пример запроса**:
     ```
-    GET /achievements/stats/7_day_streak
+    GET /achievements/stats/7-day-streak
     ```
     **Пример ответа**:
     ```
@@ -338,7 +597,186 @@ def get_users_with_7_day_streak(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
+    """
+    return await cached_stats(
+        request,
+        response,
+        "7-day-streak",
+        lambda: run_db(db, achievement_repo.users_with_7_day_streak,
+                       window=window),
+        **window_cache_params(window)
+    )
+
+
+@router.get("/stats/streaks")
+async def get_users_with_streak(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep,
+        min_days: int = Query(default=7, ge=1),
+        kind: StreakKindEnum = StreakKindEnum.CURRENT,
+        limit: int = Query(default=100, ge=1, le=10_000)
+):
+    """
+    Извлечь пользователей с серией не короче `min_days` дней подряд
+    с выдачей достижений.
+
+    Серии поддерживаются при каждой выдаче достижения, поэтому запрос
+    не обходит историю выдачи.
+
+    **Параметры запроса**:
+    - `min_days` (int): Минимальная длина серии в днях (по умолчанию 7).
+    - `kind` (str): Вид серии: `current` - текущая (последняя выдача
+    сегодня или вчера), `longest` - самая длинная за всю историю
+    (по умолчанию `current`).
+    - `limit` (int): Максимальное количество пользователей
+    (по умолчанию 100, не более 10000).
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
+
+    **Возвращаемое значение**:
+    - Список словарей по убыванию длины серии:
+      - `rank` (int): Место в рейтинге (равные серии - одно место).
+      - `user_id` (int): Идентификатор пользователя.
+      - `user_name` (str): Имя пользователя.
+      - `current_streak` (int): Текущая серия (0, если прервана).
+      - `longest_streak` (int): Самая длинная серия.
+      - `last_award_date` (date): День последней выдачи.
+
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
+    **Пример запроса**:
+    ```
+    GET /achievements/stats/streaks?min_days=3&kind=longest
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    [
+        {
+            "rank": 1,
+            "user_id": 1,
+            "user_name": "John",
+            "current_streak": 0,
+            "longest_streak": 6,
+            "last_award_date": "2026-10-19"
+        }
+    ]
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
+    """
+    return await cached_stats(
+        request,
+        response,
+        "streaks",
+        lambda: run_db(
+            db,
+            streaks_repo.get_streaks,
+            kind=kind,
+            min_days=min_days,
+            limit=limit,
+            window=window
+        ),
+        kind=kind.value,
+        min_days=min_days,
+        limit=limit,
+        # Текущая серия зависит от даты: при смене дня - новый ключ
+        day=datetime.now(UTC).date().isoformat(),
+        **window_cache_params(window)
+    )
+
+
+@router.get("/stats/streaks/top")
+async def get_top_streaks(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        window: StatsWindowDep,
+        kind: StreakKindEnum = StreakKindEnum.CURRENT,
+        limit: int = Query(default=10, ge=1, le=1000)
+):
+    """
+    Рейтинг пользователей по длине серии дней подряд с выдачей
+    достижений.
+
+    **Параметры запроса**:
+    - `kind` (str): Вид серии: `current` или `longest`
+    (по умолчанию `current`).
+    - `limit` (int): Размер рейтинга (по умолчанию 10, не более 1000).
+    - `window` (str): Период статистики: `today`, `week`, `month`
+    или `year` (последние 1, 7, 30 или 365 дней, включая сегодня).
+    - `since` (datetime): Начало периода (включительно, ISO 8601).
+    - `until` (datetime): Конец периода (не включительно, ISO 8601).
+    Без параметров периода - статистика за все время, `window`
+    нельзя передавать вместе с `since` и `until`.
+
+    **Возвращаемое значение**:
+    - Список словарей в формате `GET /achievements/stats/streaks`.
+
+    **Заголовки ответа**:
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
+    **Пример запроса**:
+    ```
+    GET /achievements/stats/streaks/top?kind=current&limit=3
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    [
+        {
+            "rank": 1,
+            "user_id": 3,
+            "user_name": "Alice",
+            "current_streak": 2,
+            "longest_streak": 2,
+            "last_award_date": "2026-10-18"
+        }
+    ]
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Переданы одновременно `window`
+    и `since`/`until` или `since` не раньше `until`.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
     """
-    return achievement_repo.users_with_7_day_streak(
-        db=db
+    return await cached_stats(
+        request,
+        response,
+        "streaks-top",
+        lambda: run_db(
+            db,
+            streaks_repo.get_streaks,
+            kind=kind,
+            limit=limit,
+            window=window
+        ),
+        kind=kind.value,
+        limit=limit,
+        day=datetime.now(UTC).date().isoformat(),
+        **window_cache_params(window)
     )
@@ -0,0 +1,199 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from starlette import status
+
+from app.db.session import SessionDep, run_db
+from app.enums.leaderboards import LeaderboardMetricEnum
+from app.schemas import leaderboard_schemas
+from app.services import leaderboard as leaderboard_repo
+from app.services.live_leaderboard import points_board
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    set_pagination_headers,
+)
+from app.services.serialization import trusted_response
+
+
+router = APIRouter()
+
+
+@router.get("/{metric}",
+            response_model=list[leaderboard_schemas.LeaderboardEntry])
+async def read_leaderboard(
+        metric: LeaderboardMetricEnum,
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        limit: int = Query(default=DEFAULT_PAGE_LIMIT,
+                           ge=1,
+                           le=MAX_PAGE_LIMIT),
+        cursor: Optional[str] = None
+):
+    """
+    Рейтинг пользователей по сумме очков или количеству достижений.
+
+    Пользователи упорядочены по убыванию показателя (при равенстве -
+    по убыванию идентификатора) и получают плотные места: равные
+    значения делят одно место, следующее значение занимает следующее
+    место. Рейтинг отдается постранично (keyset-пагинация по индексу
+    показателя), в него входят пользователи с достижениями.
+
+    **Параметры пути**:
+    - `metric` (str): Показатель: `points` (сумма очков)
+    или `achievements` (количество достижений).
+
+    **Параметры запроса**:
+    - `limit` (int): Размер страницы (по умолчанию 50, не более 500).
+    - `cursor` (str): Непрозрачный курсор следующей страницы из
+    заголовка `X-Next-Cursor` предыдущего ответа.
+
+    **Заголовки ответа**:
+    - `X-Next-Cursor`: Курсор следующей страницы (отсутствует
+    на последней странице).
+    - `Link`: Ссылка на следующую страницу (`rel="next"`).
+
+    **Возвращаемое значение**:
+    - Список объектов `LeaderboardEntry` с полями:
+      - `rank` (int): Место в рейтинге.
+      - `user_id` (int): Идентификатор пользователя.
+      - `user_name` (str): Имя пользователя.
+      - `achievement_count` (int): Количество достижений.
+      - `total_points` (int): Сумма очков достижений.
+
+    **Пример запроса**:
+    ```
+    GET /leaderboard/points?limit=3
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+    X-Next-Cursor: WzkwLDcsMl0
+
+    [
+      {"rank": 1, "user_id": 4, "user_name": "Bob",
+       "achievement_count": 5, "total_points": 120},
+      {"rank": 2, "user_id": 9, "user_name": "Alice",
+       "achievement_count": 3, "total_points": 90},
+      {"rank": 2, "user_id": 7, "user_name": "John",
+       "achievement_count": 4, "total_points": 90}
+    ]
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Неверный курсор.
+    - HTTP 422 (Validation Error): Неизвестный показатель.
+    """
+    page = await run_db(
+        db,
+        leaderboard_repo.get_leaderboard,
+        metric=metric,
+        cursor=cursor,
+        limit=limit
+    )
+    set_pagination_headers(request, response, page.next_cursor)
+    return trusted_response(page.items, response)
+
+
+@router.get("/points/top",
+            response_model=list[leaderboard_schemas.LiveLeaderboardEntry])
+async def read_live_top(
+        response: Response,
+        limit: int = Query(default=10, ge=1, le=1000)
+):
+    """
+    Первые места рейтинга по очкам из памяти воркера.
+
+    Рейтинг строится при прогреве и обновляется по уведомлениям
+    о выдаче достижений (`LEADERBOARD_MEMORY=true`), ответ не обращается
+    к базе. Порядок и места те же, что в `GET /leaderboard/points`.
+
+    **Параметры запроса**:
+    - `limit` (int): Размер топа (по умолчанию 10, не более 1000).
+
+    **Возвращаемое значение**:
+    - Список объектов `LiveLeaderboardEntry` с полями:
+      - `rank` (int): Место в рейтинге.
+      - `user_id` (int): Идентификатор пользователя.
+      - `total_points` (int): Сумма очков достижений.
+
+    **Пример запроса**:
+    ```
+    GET /leaderboard/points/top?limit=2
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    [
+      {"rank": 1, "user_id": 4, "total_points": 120},
+      {"rank": 2, "user_id": 9, "total_points": 90}
+    ]
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 503 (Service Unavailable): Рейтинг в памяти выключен
+    или еще строится.
+    """
+    points_board.require_ready()
+    return trusted_response(points_board.top(limit), response)
+
+
+@router.get("/points/users/{user_id}",
+            response_model=leaderboard_schemas.LivePosition)
+async def read_live_position(
+        user_id: int,
+        response: Response,
+        neighbors: int = Query(default=0, ge=0, le=100)
+):
+    """
+    Место пользователя в рейтинге по очкам и его соседи из памяти
+    воркера (`LEADERBOARD_MEMORY=true`), без обращения к базе.
+
+    **Параметры пути**:
+    - `user_id` (int): Уникальный идентификатор пользователя.
+
+    **Параметры запроса**:
+    - `neighbors` (int): Сколько строк рейтинга вернуть выше и ниже
+    пользователя (по умолчанию 0, не более 100).
+
+    **Возвращаемое значение**:
+    - Объект `LivePosition` с полями `LiveLeaderboardEntry`
+    пользователя и списками соседей `above` (выше, по убыванию очков)
+    и `below` (ниже).
+
+    **Пример запроса**:
+    ```
+    GET /leaderboard/points/users/9?neighbors=1
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "rank": 2,
+      "user_id": 9,
+      "total_points": 90,
+      "above": [{"rank": 1, "user_id": 4, "total_points": 120}],
+      "below": [{"rank": 2, "user_id": 7, "total_points": 90}]
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 404 (Not Found): Пользователя нет в рейтинге (он не найден
+    или у него нет достижений).
+    - HTTP 503 (Service Unavailable): Рейтинг в памяти выключен
+    или еще строится.
+    """
+    points_board.require_ready()
+    position = points_board.position(user_id, neighbors)
+    if position is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not in leaderboard"
+        )
+    return trusted_response(position, response)
@@ -0,0 +1,129 @@
+from fastapi import APIRouter
+
+from app.db import session
+from app.db.pool import pool_status
+from app.db.session import SessionDep, run_db
+from app.services.live_leaderboard import points_board
+
+
+router = APIRouter()
+
+
+@router.get("/pool")
+async def get_pool_status():
+    """
+    Состояние пулов соединений с базой данных.
+
+    Этот эндпоинт показывает заполненность пула соединений текущего
+    процесса (воркера) и время ожидания свободного соединения.
+    Используется для подбора размера пула на воркер.
+
+    **Параметры запроса**:
+    - Отсутствуют.
+
+    **Возвращаемое значение**:
+    - Словарь с полями `sync` и `async` (`null`, если асинхронный
+    режим выключен), каждое из которых содержит:
+      - `pool_class` (str): Класс пула (`NullPool` в режиме PgBouncer).
+      - `pool_size` (int): Постоянный размер пула.
+      - `max_overflow` (int): Максимум соединений сверх `pool_size`.
+      - `checked_out` (int): Соединения, выданные в работу.
+      - `idle` (int): Свободные соединения в пуле.
+      - `overflow` (int): Открытые соединения сверх `pool_size`.
+      - `in_use` (int): Соединения в работе (по событиям пула).
+      - `connects` (int): Сколько раз открывалось новое соединение.
+      - `timeouts` (int): Сколько раз истекло ожидание соединения.
+      - `wait_count`, `wait_total_s`, `wait_avg_s`, `wait_max_s`:
+      Статистика ожидания свободного соединения.
+
+    **Пример запроса**:
+    ```
+    GET /system/pool
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "sync": {
+        "pool_class": "TimedQueuePool",
+        "pool_size": 5,
+        "max_overflow": 10,
+        "timeout_s": 30.0,
+        "checked_out": 1,
+        "idle": 4,
+        "overflow": 0,
+        "checkouts": 120,
+        "in_use": 1,
+        "connects": 5,
+        "timeouts": 0,
+        "wait_count": 120,
+        "wait_total_s": 0.0031,
+        "wait_avg_s": 0.000026,
+        "wait_max_s": 0.0004
+      },
+      "async": null
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    """
+    return {
+        "sync": pool_status(session.engine, session.engine_pool_stats),
+        "async": (
+            pool_status(session.async_engine.sync_engine,
+                        session.async_engine_pool_stats)
+            if session.async_engine is not None
+            else None
+        ),
+    }
+
+
+@router.get("/leaderboard")
+async def check_leaderboard(db: SessionDep, sample: int = 10):
+    """
+    Сверка рейтинга по очкам в памяти воркера с user_stats.
+
+    Читает суммы очков всех пользователей, поэтому предназначен
+    для диагностики, а не для частого опроса. Суммы, изменившиеся
+    во время сверки, могут дать расхождения в пределах задержки
+    уведомлений: повторная сверка их уже не покажет.
+
+    **Параметры запроса**:
+    - `sample` (int): Сколько расхождений вернуть (по умолчанию 10).
+
+    **Возвращаемое значение**:
+    - `ready` (bool): Рейтинг построен (`LEADERBOARD_MEMORY=true`).
+    - `consistent` (bool): Расхождений нет.
+    - `db_users`, `memory_users` (int): Пользователи в базе
+    и в памяти.
+    - `mismatches` (int): Количество расхождений.
+    - `sample`: Примеры расхождений (`user_id`, `db`, `memory`).
+    - `memory_bytes` (int): Размер массивов рейтинга в байтах.
+    - `built_at` (float): Время последнего построения (Unix time).
+
+    **Пример запроса**:
+    ```
+    GET /system/leaderboard
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "ready": true,
+      "consistent": true,
+      "db_users": 20000,
+      "memory_users": 20000,
+      "mismatches": 0,
+      "sample": [],
+      "memory_bytes": 340736,
+      "built_at": 1792316400.5
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    """
+    return await run_db(db, points_board.check, sample=sample)
@@ -1,9 +1,27 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query, Request, Response
 from starlette import status
 
-from app.db.session import SessionDep
-from app.schemas import user_schemas, achievement_schemas
+from app.core.config import settings
+from app.db.session import SessionDep, run_db
+from app.enums.leaderboards import LeaderboardMetricEnum
+from app.enums.response_modes import ResponseModeEnum
+from app.schemas import (
+    achievement_schemas,
+    leaderboard_schemas,
+    user_schemas,
+)
+from app.services import leaderboard as leaderboard_repo
 from app.services import user as user_repo
+from app.services.conditional import catalog_etag, conditional
+from app.services.imports import NDJSON_REQUEST_BODY, import_ndjson
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    page_limit,
+    set_pagination_headers,
+)
+from app.services.serialization import trusted_response
 
 router = APIRouter()
 
@@ -11,7 +29,7 @@ router = APIRouter()
 @router.post("/",
              response_model=user_schemas.User,
              status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
         user: user_schemas.UserCreate,
         db: SessionDep
 ):
@@ -26,7 +44,7 @@ def create_user(
     для создания пользователя. Поля:
       - `name`: Имя пользователя (обязательное).
       - `language`: Предпочитаемый язык пользователя (по умолчанию — "en").
-    - `db` (Session): Текущая сессия базы данных.
+    - `db` (Session | AsyncSession): Текущая сессия базы данных.
 
     **Возвращаемое значение**:
     - Объект `User`, представляющий созданного пользователя, с полями:
@@ -57,16 +75,92 @@ def create_user(
     - HTTP 201 (Created): Пользователь успешно создан.
     - HTTP 422 (Validation Error): Неверные данные для создания пользователя.
     """
-    return user_repo.create_user(db=db, user=user)
+    return await run_db(db, user_repo.create_user, user=user)
+
+
+@router.post("/import",
+             openapi_extra=NDJSON_REQUEST_BODY)
+async def import_users(
+        request: Request,
+        db: SessionDep,
+        batch_size: int = Query(default=settings.import_batch_size,
+                                ge=1,
+                                le=10_000)
+):
+    """
+    Потоковый импорт пользователей из NDJSON.
+
+    Тело запроса читается и разбирается по мере загрузки, пользователи
+    вставляются пакетами по `batch_size`, каждый пакет в отдельной
+    транзакции. Потребление памяти не зависит от размера загрузки.
+
+    **Параметры запроса**:
+    - `batch_size` (int): Размер пакета (по умолчанию из настройки
+    `IMPORT_BATCH_SIZE`, не более 10000).
+
+    **Тело запроса**:
+    - По одному объекту `UserCreate` в строке (`application/x-ndjson`).
+
+    **Возвращаемое значение**:
+    - Итоги импорта:
+      - `processed` (int): Количество непустых строк.
+      - `inserted` (int): Количество созданных пользователей.
+      - `batches` (int): Количество пакетов.
+      - `failed` (int): Количество строк с ошибками.
+      - `errors`: Первые ошибки (не более `IMPORT_MAX_ERRORS`)
+      с полями `line` (номер строки) и `error` (описание).
+      Строки длиннее `IMPORT_MAX_LINE_BYTES` байт не разбираются
+      и считаются ошибочными.
+
+    **Пример запроса**:
+    ```
+    POST /users/import?batch_size=500
+    Content-Type: application/x-ndjson
+
+    {"name": "John", "language": "en"}
+    {"name": "Alice", "language": "ru"}
+    {"name": "B"}
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "processed": 3,
+      "inserted": 2,
+      "batches": 1,
+      "failed": 1,
+      "errors": [
+        {"line": 3, "error": "String should have at least 2 characters"}
+      ]
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK): Загрузка обработана.
+    """
+    return await import_ndjson(
+        db,
+        request.stream(),
+        schema=user_schemas.UserCreate,
+        insert_rows=user_repo.create_users_bulk,
+        batch_size=batch_size,
+        max_errors=settings.import_max_errors,
+        max_line_bytes=settings.import_max_line_bytes
+    )
 
 
 @router.post("/{user_id}/achievements",
              response_model=achievement_schemas.UserAchievementsOut,
              status_code=status.HTTP_201_CREATED)
-def issue_achievement(
+async def issue_achievement(
         user_id: int,
         user_achievement: user_schemas.UserAchievementCreate,
-        db: SessionDep
+        db: SessionDep,
+        response: Response,
+        response_mode: Optional[ResponseModeEnum] = None,
+        recent_limit: int = Query(default=10, ge=1, le=100),
+        prefer: Optional[str] = Header(default=None)
 ):
     """
     Выдача достижения пользователю.
@@ -78,6 +172,21 @@ def issue_achievement(
     - `user_id` (int): Уникальный идентификатор
     пользователя, которому нужно выдать достижение.
 
+    **Параметры запроса**:
+    - `response_mode` (str): Содержимое ответа:
+      - `full` (по умолчанию): Вся история достижений пользователя.
+      - `minimal`: Только выданное достижение (без дополнительных
+      запросов к базе).
+      - `recent`: Последние по времени выдачи `recent_limit`
+      достижений пользователя.
+    - `recent_limit` (int): Размер страницы для режима `recent`
+    (по умолчанию 10, не более 100).
+
+    **Заголовки**:
+    - `Prefer: return=minimal`: То же, что `response_mode=minimal`,
+    если параметр `response_mode` не передан. В ответ добавляется
+    заголовок `Preference-Applied: return=minimal`.
+
     **Тело запроса**:
     - Объект `UserAchievementCreate`, содержащий следующие поля:
       - `achievement_id` (int): Уникальный идентификатор достижения.
@@ -91,7 +200,7 @@ def issue_achievement(
 
     **Пример запроса**:
     ```
-    POST /users/11/achievements
+    POST /users/11/achievements?response_mode=minimal
     Content-Type: application/json
 
     {
@@ -118,25 +227,126 @@ def issue_achievement(
     ```
     **Возвращаемый статус**:
     - HTTP 201 (Created): Достижение успешно выдано.
+    - HTTP 400 (Bad Request): Достижение уже выдано пользователю.
     - HTTP 404 (Not Found): Пользователь или достижение не найдены.
     - HTTP 422 (Validation Error): Неверные данные для создания достижения.
     """
-    return user_repo.issue_achievement(
+    if response_mode is None:
+        response_mode = ResponseModeEnum.FULL
+        if prefer and "return=minimal" in prefer.replace(" ", ""):
+            response_mode = ResponseModeEnum.MINIMAL
+            response.headers["Preference-Applied"] = "return=minimal"
+
+    result = await run_db(
+        db,
+        user_repo.issue_achievement,
         user_id=user_id,
-        db=db,
-        user_achievement=user_achievement
+        user_achievement=user_achievement,
+        response_mode=response_mode,
+        recent_limit=recent_limit
+    )
+    return trusted_response(
+        result,
+        response,
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/achievements/batch",
+             response_model=user_schemas.UserAchievementBatchResult)
+async def issue_achievements_batch(
+        batch: user_schemas.UserAchievementBatch,
+        db: SessionDep
+):
+    """
+    Пакетная выдача достижений.
+
+    Этот эндпоинт выдает до 10000 достижений за один запрос
+    и одну транзакцию. Повторные выдачи и выдачи несуществующим
+    пользователям или несуществующих достижений пропускаются,
+    остальные элементы выдаются.
+
+    **Тело запроса**:
+    - Объект `UserAchievementBatch`, содержащий поле `items` -
+    список объектов со следующими полями:
+      - `user_id` (int): Уникальный идентификатор пользователя.
+      - `achievement_id` (int): Уникальный идентификатор достижения.
+      - `issued_at` (datetime, необязательно): Время выдачи
+      (по умолчанию - текущее время, без часового пояса - UTC).
+
+    **Возвращаемое значение**:
+    - Объект `UserAchievementBatchResult`, содержащий следующие поля:
+      - `inserted` (int): Количество выданных достижений.
+      - `errors`: Список невыданных элементов с полями:
+        - `index` (int): Позиция элемента в `items`.
+        - `reason` (str): Причина (`user_not_found`,
+        `achievement_not_found`, `already_awarded`).
+
+    **Пример запроса**:
+    ```
+    POST /users/achievements/batch
+    Content-Type: application/json
+
+    {
+      "items": [
+        {"user_id": 1, "achievement_id": 2},
+        {"user_id": 2, "achievement_id": 3,
+         "issued_at": "2024-12-23T12:04:21"},
+        {"user_id": 404, "achievement_id": 3}
+      ]
+    }
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "inserted": 2,
+      "errors": [
+        {"index": 2, "reason": "user_not_found"}
+      ]
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK): Пакет обработан.
+    - HTTP 422 (Validation Error): Неверные данные пакета
+    (пустой пакет или больше 10000 элементов).
+    """
+    return await run_db(
+        db,
+        user_repo.issue_achievements_batch,
+        batch=batch
     )
 
 
 @router.get("/",
             response_model=list[user_schemas.User],
             status_code=status.HTTP_200_OK)
-def read_users(db: SessionDep):
+async def read_users(
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1),
+        cursor: Optional[str] = None
+):
     """
     Получение списка всех пользователей сервиса.
 
     Этот эндпоинт возвращает список всех
-    пользователей, зарегистрированных в системе.
+    пользователей, зарегистрированных в системе,
+    постранично (keyset-пагинация по идентификатору).
+
+    **Параметры запроса**:
+    - `limit` (int): Размер страницы (по умолчанию 50, больший 500
+    уменьшается до 500).
+    - `cursor` (str): Непрозрачный курсор следующей страницы из
+    заголовка `X-Next-Cursor` предыдущего ответа.
+
+    **Заголовки ответа**:
+    - `X-Next-Cursor`: Курсор следующей страницы (отсутствует
+    на последней странице).
+    - `Link`: Ссылка на следующую страницу (`rel="next"`).
 
     **Возвращаемое значение**:
     - Список объектов `User`, которые имеют следующие поля:
@@ -146,13 +356,14 @@ def read_users(db: SessionDep):
 
     **Пример запроса**:
     ```
-    GET /users/{user_id}/achievements
+    GET /users/?limit=2
     ```
 
     **Пример ответа**:
     ```
     HTTP/1.1 200 OK
     Content-Type: application/json
+    X-Next-Cursor: WzJd
 
     [
       {
@@ -169,15 +380,27 @@ def read_users(db: SessionDep):
     ```
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 400 (Bad Request): Неверный курсор.
     """
-    return user_repo.get_users(db=db)
+    page = await run_db(
+        db,
+        user_repo.get_users,
+        cursor=cursor,
+        limit=page_limit(limit)
+    )
+    set_pagination_headers(request, response, page.next_cursor)
+    return trusted_response(page.items, response)
 
 
 @router.get("/{user_id}/achievements",
             response_model=achievement_schemas.UserAchievementsOut)
-def get_user_achievements(
+async def get_user_achievements(
         user_id: int,
-        db: SessionDep
+        db: SessionDep,
+        request: Request,
+        response: Response,
+        limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1),
+        cursor: Optional[str] = None
 ):
     """
     Получение всех достижений пользователя по его
@@ -193,10 +416,25 @@ def get_user_achievements(
     - `user_id` (int): Уникальный идентификатор
     пользователя.
 
+    **Параметры запроса**:
+    - `limit` (int): Размер страницы (по умолчанию 50, больший 500
+    уменьшается до 500).
+    - `cursor` (str): Непрозрачный курсор следующей страницы из
+    заголовка `X-Next-Cursor` предыдущего ответа.
+
+    **Заголовки ответа**:
+    - `X-Next-Cursor`: Курсор следующей страницы (отсутствует
+    на последней странице).
+    - `Link`: Ссылка на следующую страницу (`rel="next"`).
+    - `ETag`: Версия ответа. Если передать ее в `If-None-Match`,
+    при неизменных данных вернется 304 без тела.
+    - `Cache-Control`: `max-age=<HTTP_CACHE_MAX_AGE>, must-revalidate`.
+
     **Возвращаемое значение**:
     - Объект `UserAchievementsOut`, который содержит следующие поля:
       - `user_id`: Уникальный идентификатор пользователя.
-      - `achievements`: Список достижений пользователя, имеет следующие поля:
+      - `achievements`: Список достижений пользователя по времени
+      выдачи (от ранних к поздним), имеет следующие поля:
         - `id`: ID достижения.
         - `name`: Название достижения.
         - `description`: Описание достижения.
@@ -236,9 +474,89 @@ def get_user_achievements(
 
     **Возвращаемый статус**:
     - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 304 (Not Modified): Данные не изменились с версии
+    из `If-None-Match`.
+    - HTTP 400 (Bad Request): Неверный курсор.
     - HTTP 404 (Not Found): Пользователь или достижение не найдены.
     """
-    return user_repo.get_user_achievements(
+    limit = page_limit(limit)
+    marker = await run_db(db, user_repo.get_history_marker, user_id=user_id)
+    not_modified = conditional(
+        request,
+        response,
+        catalog_etag("history", user_id, marker, cursor, limit)
+        if marker is not None
+        else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    page = await run_db(
+        db,
+        user_repo.get_user_achievements,
+        user_id=user_id,
+        cursor=cursor,
+        limit=limit
+    )
+    set_pagination_headers(request, response, page.next_cursor)
+    return trusted_response(page.items, response)
+
+
+@router.get("/{user_id}/rank",
+            response_model=leaderboard_schemas.UserRank)
+async def get_user_rank(
+        user_id: int,
+        db: SessionDep,
+        response: Response,
+        metric: LeaderboardMetricEnum = LeaderboardMetricEnum.POINTS
+):
+    """
+    Место пользователя в рейтинге.
+
+    Место плотное, как в `GET /leaderboard/{metric}`: единица плюс
+    число различных значений показателя выше значения пользователя.
+    Место по очкам при `LEADERBOARD_MEMORY=true` берется из рейтинга
+    в памяти воркера, иначе различные значения выше перебираются
+    по индексу агрегатов пользователей: стоимость зависит от места,
+    а не от числа пользователей выше.
+
+    **Параметры пути**:
+    - `user_id` (int): Уникальный идентификатор пользователя.
+
+    **Параметры запроса**:
+    - `metric` (str): Показатель: `points` (по умолчанию)
+    или `achievements`.
+
+    **Возвращаемое значение**:
+    - Объект `UserRank` с полями `LeaderboardEntry` и `metric`
+    (у пользователя без достижений показатели равны нулю).
+
+    **Пример запроса**:
+    ```
+    GET /users/7/rank?metric=points
+    ```
+    **Пример ответа**:
+    ```
+    HTTP/1.1 200 OK
+    Content-Type: application/json
+
+    {
+      "rank": 2,
+      "metric": "points",
+      "user_id": 7,
+      "user_name": "John",
+      "achievement_count": 4,
+      "total_points": 90
+    }
+    ```
+    **Возвращаемый статус**:
+    - HTTP 200 (OK) при успешном выполнении запроса.
+    - HTTP 404 (Not Found): Пользователь не найден.
+    """
+    result = await run_db(
+        db,
+        leaderboard_repo.get_user_rank,
         user_id=user_id,
-        db=db
+        metric=metric
     )
+    return trusted_response(result, response)
@@ -3,6 +3,9 @@ from pathlib import Path
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.enums.cache_backends import CacheBackendEnum
+from app.enums.log_formats import LogFormatEnum
+
 
 current_path = Path.cwd()
 env_path = Path(current_path, '.env')
@@ -26,6 +29,67 @@ class Settings(BaseSettings):
     postgres_host: str = Field(alias="POSTGRES_HOST")
     postgres_port: int = Field(alias="POSTGRES_PORT")
 
+    # Режим работы с базой данных: синхронный (пул потоков)
+    # или асинхронный (AsyncEngine + AsyncSession)
+    db_async: bool = Field(default=False, alias="DB_ASYNC")
+
+    # Настройки пула соединений
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    # Время жизни соединения в секундах (-1 - без ограничения)
+    db_pool_recycle: int = Field(default=-1, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=False, alias="DB_POOL_PRE_PING")
+    # Работа через PgBouncer в режиме пулинга транзакций:
+    # NullPool и отключенные prepared statements
+    db_pgbouncer: bool = Field(default=False, alias="DB_PGBOUNCER")
+
+    # Фоновый LISTEN для межпроцессной инвалидации кэшей
+    # (в режиме пулинга транзакций PgBouncer LISTEN недоступен)
+    db_listen: bool = Field(default=True, alias="DB_LISTEN")
+
+    # Рейтинг по очкам в памяти каждого воркера: строится при
+    # прогреве и обновляется по уведомлениям о выдаче (нужен DB_LISTEN)
+    leaderboard_memory: bool = Field(default=False,
+                                     alias="LEADERBOARD_MEMORY")
+
+    # Помесячные секции user_achievements: на сколько месяцев вперед
+    # создаются секции и период их обслуживания в секундах (выполняет
+    # один воркер, 0 - только make partitions)
+    partition_months_ahead: int = Field(default=3,
+                                        alias="PARTITION_MONTHS_AHEAD")
+    partition_maintenance_interval: float = Field(
+        default=86400.0,
+        alias="PARTITION_MAINTENANCE_INTERVAL"
+    )
+
+    # Повтор шагов прогрева с ошибкой: первая задержка в секундах,
+    # удваивается до максимальной
+    warm_up_retry_delay: float = Field(default=1.0,
+                                       alias="WARM_UP_RETRY_DELAY")
+    warm_up_retry_max_delay: float = Field(default=30.0,
+                                           alias="WARM_UP_RETRY_MAX_DELAY")
+
+    # Время жизни кэша каталога достижений в секундах: страховка
+    # на случай, если уведомления об изменениях не доходят
+    catalog_cache_ttl: float = Field(default=300.0,
+                                     alias="CATALOG_CACHE_TTL")
+
+    # Кэш ответов статистики: хранилище, время жизни записи
+    # в секундах и размер LRU-кэша в памяти процесса
+    cache_backend: CacheBackendEnum = Field(
+        default=CacheBackendEnum.MEMORY,
+        alias="CACHE_BACKEND"
+    )
+    cache_ttl: float = Field(default=60.0, alias="CACHE_TTL")
+    cache_max_entries: int = Field(default=1024, alias="CACHE_MAX_ENTRIES")
+    redis_url: str = Field(default="redis://localhost:6379/0",
+                           alias="REDIS_URL")
+
+    # max-age в Cache-Control ответов с ETag (0 - клиент проверяет
+    # актуальность через If-None-Match при каждом запросе)
+    http_cache_max_age: int = Field(default=0, alias="HTTP_CACHE_MAX_AGE")
+
     # Генерация PostgresDsn
     @property
     def database_url(self) -> str:
@@ -34,6 +98,70 @@ class Settings(BaseSettings):
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
+    # DSN для асинхронного движка (psycopg 3 в режиме asyncio)
+    @property
+    def async_database_url(self) -> str:
+        return (
+            f"postgresql+psycopg://{self.postgres_user}:"
+            f"{self.postgres_password}@{self.postgres_host}:"
+            f"{self.postgres_port}/{self.postgres_db}"
+        )
+
+    # Потоковый импорт NDJSON: размер пакета (одна транзакция
+    # на пакет), сколько ошибок строк возвращать в ответе
+    # и максимальная длина строки в байтах
+    import_batch_size: int = Field(default=1000, alias="IMPORT_BATCH_SIZE")
+    import_max_errors: int = Field(default=100, alias="IMPORT_MAX_ERRORS")
+    import_max_line_bytes: int = Field(default=65536,
+                                       alias="IMPORT_MAX_LINE_BYTES")
+
+    # Логирование: уровень и формат записей
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_format: LogFormatEnum = Field(default=LogFormatEnum.TEXT,
+                                      alias="LOG_FORMAT")
+    # Журнал запросов: доля записываемых запросов (0..1) и порог
+    # медленного запроса в миллисекундах. Медленные запросы
+    # и ответы 5xx записываются всегда
+    request_log_sample_rate: float = Field(default=1.0, ge=0.0, le=1.0,
+                                           alias="REQUEST_LOG_SAMPLE_RATE")
+    request_log_slow_ms: float = Field(default=500.0,
+                                       alias="REQUEST_LOG_SLOW_MS")
+
+    # Метрики /metrics. При нескольких воркерах каждый сохраняет
+    # снимок своих метрик в METRICS_DIR раз в METRICS_FLUSH_INTERVAL
+    # секунд (каталог очищается при развертывании); без каталога
+    # /metrics показывает метрики одного воркера
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    metrics_dir: str = Field(default="", alias="METRICS_DIR")
+    metrics_flush_interval: float = Field(default=5.0,
+                                          alias="METRICS_FLUSH_INTERVAL")
+
+    # Журнал SQL-запросов: бюджет запросов на HTTP-запрос (общий
+    # и для отдельных маршрутов, JSON {"шаблон маршрута": число}),
+    # сколько повторов одного запроса считать признаком N+1
+    query_budget: int = Field(default=10, alias="QUERY_BUDGET")
+    query_budgets: dict[str, int] = Field(default_factory=dict,
+                                          alias="QUERY_BUDGETS")
+    query_repeat_threshold: int = Field(default=5,
+                                        alias="QUERY_REPEAT_THRESHOLD")
+    # Порог медленного SQL-запроса в миллисекундах (0 - не
+    # отслеживать) и запись его плана EXPLAIN в лог не чаще раза
+    # в SLOW_QUERY_EXPLAIN_INTERVAL секунд для одного шаблона
+    slow_query_ms: float = Field(default=200.0, alias="SLOW_QUERY_MS")
+    slow_query_explain: bool = Field(default=True,
+                                     alias="SLOW_QUERY_EXPLAIN")
+    slow_query_explain_interval: float = Field(
+        default=300.0,
+        alias="SLOW_QUERY_EXPLAIN_INTERVAL"
+    )
+
+    # Заполнение пустой базы генератором данных: при старте
+    # воркера (по умолчанию выключено, штатно - однократной командой
+    # make seed), примерное число выдач достижений и зерно генератора
+    seed_on_startup: bool = Field(default=False, alias="SEED_ON_STARTUP")
+    seed_scale: int = Field(default=1000, alias="SEED_SCALE")
+    seed_random_seed: int = Field(default=42, alias="SEED_RANDOM_SEED")
+
     # Настройки Nginx
     nginx_port: int = Field(alias="NGINX_PORT")
 
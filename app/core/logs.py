@@ -0,0 +1,78 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from app.core.config import Settings
+from app.enums.log_formats import LogFormatEnum
+
+# Атрибуты LogRecord, которые есть у любой записи; остальные
+# атрибуты пришли через extra и попадают в JSON как поля
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись в одну JSON-строку, включая поля из extra.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в вызывающем потоке.
+
+    Стандартный prepare() форматирует сообщение до постановки
+    в очередь, то есть в цикле событий. Очередь живет в этом же
+    процессе, поэтому запись можно передать как есть: форматирование
+    и запись в поток вывода выполняет поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(settings: Settings) -> QueueListener:
+    """
+    Настраивает корневой логгер: записи кладутся в очередь без
+    блокировки, а выводит их фоновый поток.
+    :param settings: Настройки приложения.
+    :return: Запущенный QueueListener.
+    """
+    handler = logging.StreamHandler()
+    if settings.log_format == LogFormatEnum.JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(levelname)s - %(asctime)s - %(message)s"
+        ))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(settings.log_level.upper())
+
+    listener = QueueListener(log_queue, handler,
+                             respect_handler_level=True)
+    listener.start()
+    # При завершении процесса дописать записи, оставшиеся в очереди
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм времени в секундах
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Тип ответа в текстовом формате Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    """
+    Счетчик с метками. Метки передаются кортежем значений в порядке
+    labelnames.
+
+    Все метрики изменяются только в потоке цикла событий (middleware
+    и сбор снимка), поэтому блокировки не нужны.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> list:
+        return [[list(labels), value]
+                for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """
+    Текущее значение с метками.
+    """
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple = (), value: float = 0.0):
+        self.values[labels] = value
+
+
+class Histogram:
+    """
+    Гистограмма с метками. Для каждого набора меток хранятся
+    некумулятивные счетчики корзин (последняя - +Inf) и сумма.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values: dict[tuple, list[float]] = {}
+
+    def observe(self, labels: tuple, value: float):
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> list:
+        return [[list(labels), list(counts)]
+                for labels, counts in self.values.items()]
+
+
+Metric = Counter | Gauge | Histogram
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса и сбор метрик всех воркеров.
+
+    Каждый воркер периодически сохраняет снимок своих метрик
+    в METRICS_DIR (файл <pid>.json), а /metrics объединяет снимки:
+    счетчики и гистограммы суммируются, в том числе от завершившихся
+    воркеров (иначе счетчики уменьшались бы), а значения gauge
+    завершившихся воркеров отбрасываются.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        # Функции, обновляющие gauge перед снимком (состояние пулов)
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS
+                  ) -> Histogram:
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """
+        Снимок метрик процесса.
+        :return: Словарь, пригодный для сохранения в JSON.
+        """
+        for collector in self._collectors:
+            collector()
+        return {
+            "pid": os.getpid(),
+            "metrics": {
+                name: {
+                    "kind": metric.kind,
+                    "help": metric.documentation,
+                    "labels": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", ())),
+                    "samples": metric.samples(),
+                }
+                for name, metric in self._metrics.items()
+            },
+        }
+
+    def write_snapshot(self, directory: str):
+        """
+        Атомарно сохраняет снимок метрик процесса в каталог.
+        :param directory: Каталог снимков (METRICS_DIR).
+        """
+        path = Path(directory, f"{os.getpid()}.json")
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(orjson.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def collect(self, directory: Optional[str] = None) -> list[dict]:
+        """
+        Снимки всех воркеров: текущий процесс - из памяти,
+        остальные - из файлов каталога.
+        :param directory: Каталог снимков или None (один процесс).
+        :return: Список снимков.
+        """
+        own = self.snapshot()
+        snapshots = [own]
+        if not directory:
+            return snapshots
+        for path in Path(directory).glob("*.json"):
+            if path.stem == str(own["pid"]):
+                continue
+            try:
+                snapshot = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError) as error:
+                logger.warning("Skip metrics snapshot %s: %s", path, error)
+                continue
+            snapshot["alive"] = _pid_alive(snapshot["pid"])
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """
+        Метрики всех воркеров в текстовом формате Prometheus.
+        :param directory: Каталог снимков или None (один процесс).
+        :return: Текст ответа /metrics.
+        """
+        return render(merge(self.collect(directory)))
+
+    async def flush_periodically(self, directory: str, interval: float):
+        """
+        Фоновая задача воркера: сохраняет снимок метрик раз
+        в interval секунд и при остановке.
+        """
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        try:
+            while True:
+                self.write_snapshot(directory)
+                await asyncio.sleep(interval)
+        finally:
+            self.write_snapshot(directory)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots: Iterable[dict]) -> dict:
+    """
+    Объединяет снимки воркеров.
+    :param snapshots: Снимки (ключ alive=False - воркер завершился).
+    :return: Метрики в формате снимка с суммированными значениями.
+    """
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        alive = snapshot.get("alive", True)
+        for name, metric in snapshot["metrics"].items():
+            if metric["kind"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            values = target["samples"]
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = value
+                elif isinstance(value, list):
+                    values[key] = [a + b for a, b in zip(values[key], value)]
+                else:
+                    values[key] += value
+    return merged
+
+
+def _escape(value) -> str:
+    return (str(value).replace("\\", r"\\")
+            .replace("\n", r"\n").replace('"', r'\"'))
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render(metrics: dict) -> str:
+    """
+    Текстовый формат Prometheus (exposition format 0.0.4).
+    :param metrics: Результат merge.
+    :return: Текст с метриками.
+    """
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labels"]
+        for labels, value in sorted(metric["samples"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} "
+                             f"{_number(value)}")
+                continue
+            cumulative = 0
+            bounds = [*map(_number, metric["buckets"]), "+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                bucket_labels = _labels([*names, "le"], [*labels, bound])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} "
+                         f"{_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} "
+                         f"{cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# Метрики процесса
+registry = MetricsRegistry()
@@ -0,0 +1,20 @@
+from datetime import datetime, UTC
+from typing import Optional
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Приводит время к UTC без часового пояса - в форме колонок
+    timestamp without time zone (issued_at). Время без пояса
+    считается временем UTC.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def utc_now() -> datetime:
+    """
+    Текущее время UTC без часового пояса.
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
@@ -6,3 +6,4 @@ Base = declarative_base()
 
 from app.models.achievement import *
 from app.models.user import *
+from app.models.stats import *
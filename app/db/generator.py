@@ -0,0 +1,385 @@
+"""
+Генератор синтетических данных: пользователи, каталог достижений
+и история выдачи.
+
+Данные загружаются через COPY параллельными частями (диапазонами
+пользователей), каждая часть генерируется своим процессом со своим
+генератором случайных чисел, поэтому результат зависит только
+от seed и параметров распределений, но не от числа процессов.
+
+Пример запуска:
+    poetry run python -m app.db.generator --scale 5e7 --workers 8
+"""
+import argparse
+import io
+import logging
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+
+import psycopg2
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.enums.awards_distributions import AwardsDistributionEnum
+from app.enums.languages import LanguageEnum
+from app.services.streaks import refresh_user_streaks
+from app.services.user_stats import refresh_user_stats
+
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, индексы и ограничения которых пересоздаются после
+# загрузки большого набора (--rebuild-indexes): история выдачи
+# и закрепленные выдачи (уникальность пары пользователь-достижение)
+AWARDS_TABLE = "user_achievements"
+CLAIMS_TABLE = "user_achievement_claims"
+
+
+@dataclass
+class GeneratorConfig:
+    """
+    Параметры набора данных.
+    """
+    # Примерное число выдач достижений (строк user_achievements)
+    scale: int = 1000
+    # Размер каталога достижений
+    achievements: int = 1000
+    # Число достижений у пользователя: распределение и среднее
+    # (не больше размера каталога: пара пользователь-достижение
+    # уникальна)
+    awards_distribution: AwardsDistributionEnum = (
+        AwardsDistributionEnum.UNIFORM
+    )
+    awards_per_user: int = 50
+    # Доля пользователей, получающих достижения каждый день подряд
+    # (серии); остальные получают их в случайные дни периода
+    streak_share: float = 0.3
+    period_days: int = 365
+    # Очки достижений: от min до max, skew > 1 смещает значения
+    # к min (редкие дорогие достижения)
+    points_min: int = 1
+    points_max: int = 200
+    points_skew: float = 1.0
+    # Доля пользователей с языком en
+    english_share: float = 0.5
+    seed: int = 42
+    # Параллельная загрузка: число процессов и пользователей в части
+    workers: int = 1
+    chunk_users: int = 20_000
+    # Конец периода выдачи (по умолчанию - текущий момент)
+    now: Optional[datetime] = field(default=None, repr=False)
+
+    @property
+    def users(self) -> int:
+        return max(self.scale // self.awards_per_user, 1)
+
+
+def _copy(cursor, table: str, columns: str, buffer: io.StringIO):
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN", buffer
+    )
+
+
+def _awards_count(rng: random.Random, config: GeneratorConfig) -> int:
+    mean = config.awards_per_user
+    if config.awards_distribution == AwardsDistributionEnum.FIXED:
+        count = mean
+    elif config.awards_distribution == AwardsDistributionEnum.PARETO:
+        # Pareto с alpha=1.5 имеет среднее 3 * xm
+        count = int(rng.paretovariate(1.5) * mean / 3)
+    else:
+        count = rng.randint(1, 2 * mean - 1)
+    return min(max(count, 1), config.achievements)
+
+
+def _coprime_step(size: int) -> int:
+    step = 7919
+    while math.gcd(step, size) != 1:
+        step += 2
+    return step
+
+
+def generate_achievements(config: GeneratorConfig) -> io.StringIO:
+    rng = random.Random(f"{config.seed}:achievements")
+    span = config.points_max - config.points_min
+    buffer = io.StringIO()
+    for achievement_id in range(1, config.achievements + 1):
+        points = config.points_min + int(
+            span * rng.random() ** config.points_skew
+        )
+        buffer.write(
+            f"{achievement_id}\tAchievement {achievement_id}\t"
+            f"Достижение {achievement_id}\t"
+            f"Generated achievement number {achievement_id}\t"
+            f"Сгенерированное достижение номер {achievement_id}\t"
+            f"{points}\n"
+        )
+    return buffer
+
+
+def generate_chunk(
+        config: GeneratorConfig,
+        first_user: int,
+        last_user: int
+) -> tuple[io.StringIO, io.StringIO, io.StringIO, int]:
+    """
+    Генерирует пользователей first_user..last_user и их выдачи.
+    :return: Буферы COPY для users, user_achievements
+    и user_achievement_claims и число выдач.
+    """
+    rng = random.Random(f"{config.seed}:{first_user}")
+    end = config.now or datetime.now(UTC).replace(tzinfo=None)
+    # Строки дат и времени готовятся заранее: форматирование
+    # datetime на каждую строку заметно дороже
+    days = [
+        (end - timedelta(days=offset)).strftime("%Y-%m-%d")
+        for offset in range(config.period_days + 1)
+    ]
+    minutes = [f"{m // 60:02d}:{m % 60:02d}:00" for m in range(1440)]
+    step = _coprime_step(config.achievements)
+
+    users = io.StringIO()
+    awards = io.StringIO()
+    claims = io.StringIO()
+    total = 0
+    for user_id in range(first_user, last_user + 1):
+        language = (
+            LanguageEnum.EN.value
+            if rng.random() < config.english_share
+            else LanguageEnum.RU.value
+        )
+        users.write(f"{user_id}\tuser_{user_id}\t{language}\n")
+
+        count = _awards_count(rng, config)
+        total += count
+        # Различные достижения: start + k * step по модулю размера
+        # каталога, step взаимно прост с размером
+        start = rng.randrange(config.achievements)
+        daily = rng.random() < config.streak_share
+        last_offset = rng.randrange(3)
+        for k in range(count):
+            achievement_id = (start + k * step) % config.achievements + 1
+            if daily:
+                offset = min(last_offset + k, config.period_days)
+            else:
+                offset = rng.randrange(config.period_days + 1)
+            awards.write(
+                f"{user_id}\t{achievement_id}\t{days[offset]} "
+                f"{minutes[rng.randrange(1440)]}\n"
+            )
+            claims.write(f"{user_id}\t{achievement_id}\n")
+    return users, awards, claims, total
+
+
+def load_chunk(url: str, config: GeneratorConfig, first_user: int,
+               last_user: int) -> int:
+    """
+    Генерирует и загружает одну часть в отдельной транзакции.
+    :return: Число загруженных выдач.
+    """
+    users, awards, claims, total = generate_chunk(config, first_user,
+                                                  last_user)
+    connection = psycopg2.connect(url)
+    try:
+        with connection.cursor() as cursor:
+            _copy(cursor, "users", "id, name, language", users)
+            _copy(cursor, AWARDS_TABLE,
+                  "user_id, achievement_id, issued_at", awards)
+            _copy(cursor, CLAIMS_TABLE, "user_id, achievement_id", claims)
+        connection.commit()
+    finally:
+        connection.close()
+    return total
+
+
+def _drop_indexes(cursor, table: str) -> list[str]:
+    """
+    Удаляет вторичные индексы и ограничения таблицы (кроме
+    первичного ключа): построить их после загрузки быстрее, чем
+    обновлять на каждую строку.
+    :return: Команды для их восстановления.
+    """
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('u', 'f')
+        """,
+        (table,)
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.tablename = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conname = i.indexname
+          )
+        """,
+        (table,)
+    )
+    indexes = cursor.fetchall()
+
+    restore = []
+    for name, definition in constraints:
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        restore.append(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"
+        )
+    for name, definition in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+        # Определение индекса секционированной таблицы содержит
+        # ON ONLY: такой индекс не создается в секциях
+        restore.append(definition.replace(" ON ONLY ", " ON ", 1))
+    return restore
+
+
+def _reset_sequences(cursor):
+    for table in ("users", "achievements", AWARDS_TABLE):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)"
+        )
+
+
+def generate(url: str, config: GeneratorConfig,
+             rebuild_indexes: Optional[bool] = None) -> dict:
+    """
+    Заполняет пустую базу синтетическими данными и пересчитывает
+    агрегаты (user_stats, user_streaks).
+    :param url: DSN базы данных (postgresql://...).
+    :param config: Параметры набора данных.
+    :param rebuild_indexes: Пересоздать индексы таблицы выдач после
+    загрузки (None - для наборов от миллиона выдач).
+    :return: Сводка: число строк и время этапов.
+    """
+    if rebuild_indexes is None:
+        rebuild_indexes = config.scale >= 1_000_000
+    timings = {}
+    started = time.perf_counter()
+
+    connection = psycopg2.connect(url)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM users)")
+            if cursor.fetchone()[0]:
+                raise RuntimeError("Database already contains users")
+            restore = []
+            if rebuild_indexes:
+                for table in (AWARDS_TABLE, CLAIMS_TABLE):
+                    restore += _drop_indexes(cursor, table)
+            # Секции месяцев периода выдачи создаются до загрузки:
+            # строки не попадают в секцию по умолчанию
+            end = config.now or datetime.now(UTC).replace(tzinfo=None)
+            cursor.execute(
+                "SELECT ensure_user_achievements_partitions(%s, %s)",
+                (end - timedelta(days=config.period_days), end)
+            )
+            _copy(cursor, "achievements",
+                  "id, name_en, name_ru, description_en, description_ru, "
+                  "points",
+                  generate_achievements(config))
+        connection.commit()
+
+        bounds = [
+            (first, min(first + config.chunk_users - 1, config.users))
+            for first in range(1, config.users + 1, config.chunk_users)
+        ]
+        try:
+            if config.workers > 1:
+                with ProcessPoolExecutor(config.workers) as pool:
+                    awards = sum(pool.map(
+                        load_chunk,
+                        *zip(*[(url, config, first, last)
+                               for first, last in bounds])
+                    ))
+            else:
+                awards = sum(load_chunk(url, config, first, last)
+                             for first, last in bounds)
+            timings["load_s"] = round(time.perf_counter() - started, 2)
+        finally:
+            # Индексы восстанавливаются и после ошибки загрузки
+            with connection.cursor() as cursor:
+                for statement in restore:
+                    cursor.execute(statement)
+                _reset_sequences(cursor)
+            connection.commit()
+        timings["indexes_s"] = round(
+            time.perf_counter() - started - timings["load_s"], 2
+        )
+    finally:
+        connection.close()
+
+    engine = create_engine(url)
+    try:
+        with Session(engine) as db:
+            refresh_user_stats(db)
+            refresh_user_streaks(db)
+            db.commit()
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("ANALYZE")
+    finally:
+        engine.dispose()
+    timings["total_s"] = round(time.perf_counter() - started, 2)
+
+    return {
+        "users": config.users,
+        "achievements": config.achievements,
+        "awards": awards,
+        **timings,
+    }
+
+
+def main():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--scale", type=lambda v: int(float(v)),
+                        default=defaults.scale)
+    parser.add_argument("--achievements", type=int,
+                        default=defaults.achievements)
+    parser.add_argument("--awards-distribution",
+                        type=AwardsDistributionEnum,
+                        default=defaults.awards_distribution)
+    parser.add_argument("--awards-per-user", type=int,
+                        default=defaults.awards_per_user)
+    parser.add_argument("--streak-share", type=float,
+                        default=defaults.streak_share)
+    parser.add_argument("--period-days", type=int,
+                        default=defaults.period_days)
+    parser.add_argument("--points-min", type=int,
+                        default=defaults.points_min)
+    parser.add_argument("--points-max", type=int,
+                        default=defaults.points_max)
+    parser.add_argument("--points-skew", type=float,
+                        default=defaults.points_skew)
+    parser.add_argument("--english-share", type=float,
+                        default=defaults.english_share)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--chunk-users", type=int,
+                        default=defaults.chunk_users)
+    parser.add_argument("--rebuild-indexes",
+                        action=argparse.BooleanOptionalAction)
+    args = vars(parser.parse_args())
+    url = args.pop("database_url")
+    rebuild_indexes = args.pop("rebuild_indexes")
+    config = GeneratorConfig(**args)
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Generating dataset: %s", asdict(config))
+    logger.info("Done: %s", generate(url, config, rebuild_indexes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.ledger import current_ledger, explainer
+from app.db.pool import PoolStats
+
+
+pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Connections of the worker pool by state",
+    ("engine", "state")
+)
+pool_wait_seconds = registry.counter(
+    "db_pool_wait_seconds_total",
+    "Time spent waiting for a free pool connection",
+    ("engine",)
+)
+pool_timeouts = registry.counter(
+    "db_pool_timeouts_total",
+    "Pool checkouts that timed out",
+    ("engine",)
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters,
+                           context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters,
+                          context, executemany):
+    ledger = current_ledger.get()
+    if ledger is None or context is None:
+        return
+    duration = time.perf_counter() - context._metrics_start
+    ledger.record(statement, duration)
+    if (
+            settings.slow_query_ms
+            and duration * 1000 >= settings.slow_query_ms
+    ):
+        explainer.submit(statement, parameters, duration, ledger.route)
+
+
+def instrument_engine(engine: Engine, name: str, stats: PoolStats):
+    """
+    Подключает журнал SQL-запросов и метрики пула соединений
+    к движку.
+
+    Запросы записываются в журнал текущего HTTP-запроса
+    (current_ledger), метрики по маршрутам обновляет middleware.
+    Запросы вне HTTP-запросов (старт, фоновые задачи)
+    не учитываются.
+    :param engine: Синхронный движок (для AsyncEngine - sync_engine).
+    :param name: Значение метки engine (sync/async).
+    :param stats: Статистика пула из attach_pool_stats.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not settings.metrics_enabled:
+        return
+
+    def collect_pool():
+        pool = engine.pool
+        snapshot = stats.snapshot()
+        pool_connections.set((name, "in_use"), snapshot["in_use"])
+        if isinstance(pool, QueuePool):
+            pool_connections.set((name, "idle"), pool.checkedin())
+            pool_connections.set((name, "overflow"),
+                                 max(pool.overflow(), 0))
+            # Сколько соединений пул может выдать (pool_size +
+            # max_overflow): насыщение - in_use / capacity
+            pool_connections.set((name, "capacity"),
+                                 pool.size() + pool._max_overflow)
+        pool_wait_seconds.values[(name,)] = snapshot["wait_total_s"]
+        pool_timeouts.values[(name,)] = snapshot["timeouts"]
+
+    registry.add_collector(collect_pool)
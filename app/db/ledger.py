@@ -0,0 +1,198 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Списки параметров: IN (...) и строки VALUES пакетной вставки
+_PARAM_LIST = re.compile(
+    r"\((?:\s*(?:%\(\w+\)s(?:::\w+)?|\d+)\s*,?)+\)"
+)
+_VALUES_ROWS = re.compile(r"VALUES \(\.\.\.\)(?:, \(\.\.\.\))+")
+# Операторы, для которых можно получить план без выполнения
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def route_label(scope: Optional[dict]) -> str:
+    """
+    Шаблон маршрута запроса (маршрутизатор дополняет scope найденным
+    маршрутом) или unmatched, если маршрут не найден.
+    """
+    route = scope.get("route") if scope else None
+    return route.path if route is not None else "unmatched"
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Приводит SQL к шаблону: одинаковые запросы с разным числом
+    параметров (IN, пакетная вставка) дают один шаблон.
+    Тексты запросов SQLAlchemy кэширует, поэтому нормализация
+    выполняется один раз на запрос приложения.
+    :param statement: Текст запроса с параметрами драйвера.
+    :return: Шаблон запроса.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAM_LIST.sub("(...)", statement)
+    return _VALUES_ROWS.sub("VALUES (...)", statement)
+
+
+class QueryLedger:
+    """
+    Журнал SQL-запросов одного HTTP-запроса: число, длительности
+    и шаблоны запросов.
+
+    Журнал создает middleware, события движка дописывают в него
+    из потока пула или из run_sync: контекст копируется в оба места,
+    поэтому запись идет в журнал своего запроса. Одновременно журнал
+    изменяет только один поток.
+    """
+
+    __slots__ = ("scope", "durations", "statements")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.durations: list[float] = []
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def count(self) -> int:
+        return len(self.durations)
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations)
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+    def record(self, statement: str, duration: float):
+        self.durations.append(duration)
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated(self) -> Optional[tuple[str, int]]:
+        """
+        Самый частый шаблон, если он повторяется не реже порога
+        QUERY_REPEAT_THRESHOLD (признак N+1), иначе None.
+        """
+        if not self.statements:
+            return None
+        statement, count = self.statements.most_common(1)[0]
+        if count < settings.query_repeat_threshold:
+            return None
+        return statement, count
+
+    def budget(self) -> int:
+        return settings.query_budgets.get(self.route, settings.query_budget)
+
+    def check(self):
+        """
+        Предупреждает о превышении бюджета запросов маршрута
+        и о повторяющихся запросах.
+        """
+        budget = self.budget()
+        if self.count > budget:
+            logger.warning(
+                "Query budget exceeded: %s made %d queries (budget %d)",
+                self.route, self.count, budget
+            )
+        repeated = self.repeated()
+        if repeated is not None:
+            statement, count = repeated
+            logger.warning(
+                "Possible N+1 in %s: statement executed %d times: %s",
+                self.route, count, statement
+            )
+
+    def server_timing(self) -> str:
+        """
+        Значение заголовка Server-Timing.
+        """
+        return (f'db;dur={self.total * 1000:.1f};'
+                f'desc="{self.count} queries"')
+
+
+# Журнал SQL-запросов текущего HTTP-запроса
+current_ledger: ContextVar[Optional[QueryLedger]] = ContextVar(
+    "current_ledger", default=None
+)
+
+
+class SlowQueryExplainer:
+    """
+    Записывает в лог планы медленных запросов.
+
+    EXPLAIN (без ANALYZE, запрос не выполняется) выполняется
+    в отдельном потоке на отдельном соединении: ошибка EXPLAIN
+    в транзакции запроса прервала бы эту транзакцию. Для каждого
+    шаблона план записывается не чаще раза
+    в SLOW_QUERY_EXPLAIN_INTERVAL секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._explained: dict[str, float] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, statement: str, parameters, duration: float,
+               route: str):
+        normalized = normalize_statement(statement)
+        logger.warning("Slow query %.1fms in %s: %s",
+                       duration * 1000, route, normalized)
+        if (
+                not settings.slow_query_explain
+                or not isinstance(parameters, (dict, tuple))
+                or not normalized.upper().startswith(_EXPLAINABLE)
+        ):
+            return
+        now = time.monotonic()
+        with self._lock:
+            explained_at = self._explained.get(normalized)
+            if (
+                    explained_at is not None
+                    and now - explained_at
+                    < settings.slow_query_explain_interval
+            ):
+                return
+            self._explained[normalized] = now
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="explain"
+                )
+        self._executor.submit(self._explain, statement, parameters,
+                              normalized)
+
+    @staticmethod
+    def _explain(statement: str, parameters, normalized: str):
+        # Синхронный движок: параметры в формате pyformat подходят
+        # и для запросов асинхронного движка
+        from app.db.session import engine
+
+        try:
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                connection.rollback()
+            finally:
+                connection.close()
+        except Exception as error:
+            logger.warning("EXPLAIN failed for %s: %s", normalized, error)
+            return
+        logger.warning("Plan of slow query %s:\n%s", normalized, plan)
+
+
+# Планы медленных запросов процесса
+explainer = SlowQueryExplainer()
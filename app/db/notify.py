@@ -0,0 +1,129 @@
+import logging
+import threading
+import uuid
+from typing import Callable, Optional
+
+import psycopg
+from psycopg import sql
+from sqlalchemy import String, cast, func, literal, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор процесса в уведомлениях: слушатель пропускает
+# уведомления, отправленные этим же процессом
+PROCESS_TOKEN = uuid.uuid4().hex
+
+# Обработчик получает полезную нагрузку уведомления или None,
+# если уведомления могли быть потеряны (нет соединения LISTEN)
+Handler = Callable[[Optional[str]], None]
+
+
+def notify_clause(channel: str, payload) -> ColumnElement:
+    """
+    Выражение pg_notify для встраивания в запрос изменения данных.
+    :param channel: Имя канала.
+    :param payload: Полезная нагрузка: строка или SQL-выражение.
+    :return: Вызов pg_notify с идентификатором процесса в нагрузке.
+    """
+    return func.pg_notify(
+        channel,
+        literal(f"{PROCESS_TOKEN}:") + cast(payload, String)
+    )
+
+
+def notify(db: Session, channel: str, payload: str = ""):
+    """
+    Отправляет уведомление в канал Postgres (pg_notify).
+    Postgres доставляет уведомление только после коммита транзакции,
+    поэтому другие воркеры не увидят незафиксированных изменений.
+    :param db: Сессия базы данных.
+    :param channel: Имя канала.
+    :param payload: Полезная нагрузка уведомления.
+    """
+    db.execute(select(notify_clause(channel, payload)))
+
+
+class NotificationListener:
+    """
+    Слушатель уведомлений Postgres (LISTEN) в фоновом потоке.
+
+    Держит отдельное соединение вне пула и вызывает обработчики
+    каналов. После (пере)подключения каждый обработчик вызывается
+    с None: пока соединения не было, уведомления могли быть потеряны.
+    """
+
+    def __init__(
+            self,
+            dsn: str,
+            poll_timeout: float = 1.0,
+            reconnect_delay: float = 1.0
+    ):
+        self._dsn = dsn
+        self._poll_timeout = poll_timeout
+        self._reconnect_delay = reconnect_delay
+        self._handlers: dict[str, list[Handler]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = False
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def start(self):
+        if self._thread is not None or not self._handlers:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="pg-listener",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_timeout * 2)
+            self._thread = None
+
+    def _dispatch(self, channel: str, payload: Optional[str]):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notification handler failed: %s", channel)
+
+    def _listen(self, conn: psycopg.Connection):
+        for channel in self._handlers:
+            conn.execute(
+                sql.SQL("LISTEN {}").format(sql.Identifier(channel))
+            )
+        for channel in self._handlers:
+            self._dispatch(channel, None)
+        self.connected = True
+
+        while not self._stop.is_set():
+            for notification in conn.notifies(timeout=self._poll_timeout):
+                sender, _, payload = notification.payload.partition(":")
+                if sender != PROCESS_TOKEN:
+                    self._dispatch(notification.channel, payload)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    self._listen(conn)
+            except psycopg.Error as error:
+                logger.warning("LISTEN connection lost: %s", error)
+            finally:
+                self.connected = False
+            self._stop.wait(self._reconnect_delay)
+
+
+# Слушатель уведомлений процесса (запускается при старте приложения)
+listener = NotificationListener(settings.database_url)
@@ -0,0 +1,166 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import Settings
+
+
+class PoolStats:
+    """
+    Счетчики использования пула соединений.
+
+    Время ожидания соединения измеряется вокруг получения соединения
+    из очереди пула, поэтому оно отражает именно нехватку соединений,
+    а не время установки TCP-соединения с базой.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.in_use = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_total_s": round(self.wait_total, 6),
+                "wait_avg_s": round(
+                    self.wait_total / self.wait_count, 6
+                ) if self.wait_count else 0.0,
+                "wait_max_s": round(self.wait_max, 6),
+            }
+
+
+class _TimedPoolMixin:
+    """
+    Примесь к QueuePool, замеряющая время ожидания свободного
+    соединения.
+    """
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - start,
+                                   timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() пересоздает пул - статистику переносим
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings: Settings, is_async: bool = False) -> dict:
+    """
+    Формирует параметры движка SQLAlchemy из настроек приложения.
+    :param settings: Настройки приложения.
+    :param is_async: Параметры для асинхронного движка.
+    :return: Словарь аргументов для create_engine/create_async_engine.
+    """
+    if settings.db_pgbouncer:
+        # PgBouncer сам держит пул соединений, а в режиме пулинга
+        # транзакций соседние транзакции могут попасть на разные
+        # серверные соединения - prepared statements там недопустимы.
+        options = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    return {
+        "poolclass": (
+            TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+        ),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def attach_pool_stats(engine: Engine) -> PoolStats:
+    """
+    Подключает сбор статистики к пулу движка.
+    :param engine: Синхронный движок (для AsyncEngine - sync_engine).
+    :return: Объект статистики пула.
+    """
+    stats = PoolStats()
+    # Пулу статистика нужна для замера ожидания в _do_get
+    engine.pool.stats = stats
+    event.listen(engine, "connect", stats.on_connect)
+    event.listen(engine, "checkout", stats.on_checkout)
+    event.listen(engine, "checkin", stats.on_checkin)
+    return stats
+
+
+def pool_status(engine: Engine, stats: PoolStats) -> dict:
+    """
+    Текущее состояние пула соединений движка.
+    :param engine: Синхронный движок (для AsyncEngine - sync_engine).
+    :param stats: Статистика, подключенная через attach_pool_stats.
+    :return: Словарь с заполненностью пула и временем ожидания.
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() отсчитывается от -pool_size
+            "overflow": max(pool.overflow(), 0),
+        })
+
+    status.update(stats.snapshot())
+    return status
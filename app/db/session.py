@@ -1,14 +1,31 @@
-from typing import Annotated
+from typing import Annotated, AsyncGenerator, Callable, TypeVar
 
 from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker, Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.db.instrumentation import instrument_engine
+from app.db.pool import attach_pool_stats, engine_options
+
+
+T = TypeVar("T")
 
 
 # Создаем движок для базы данных
-engine = create_engine(settings.database_url, echo=False)
+engine = create_engine(
+    settings.database_url,
+    echo=False,
+    **engine_options(settings)
+)
+engine_pool_stats = attach_pool_stats(engine)
+instrument_engine(engine, "sync", engine_pool_stats)
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(
@@ -17,6 +34,39 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Асинхронный движок создается только в асинхронном режиме,
+# чтобы синхронный режим не держал лишний пул соединений
+async_engine = (
+    create_async_engine(
+        settings.async_database_url,
+        echo=False,
+        **engine_options(settings, is_async=True)
+    )
+    if settings.db_async
+    else None
+)
+async_engine_pool_stats = (
+    attach_pool_stats(async_engine.sync_engine)
+    if async_engine is not None
+    else None
+)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine, "async",
+                      async_engine_pool_stats)
+
+# Фабрика асинхронных сессий. expire_on_commit=False, чтобы
+# возвращаемые из сервисов ORM-объекты можно было сериализовать
+# после коммита без ленивой подгрузки вне event loop.
+AsyncSessionLocal = (
+    async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    if async_engine is not None
+    else None
+)
+
 
 # Генератор сессий баз данных
 def get_db():
@@ -27,8 +77,42 @@ def get_db():
         db.close()
 
 
+# Генератор асинхронных сессий баз данных
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_db(
+        db: Session | AsyncSession,
+        fn: Callable[..., T],
+        /,
+        *args,
+        **kwargs
+) -> T:
+    """
+    Выполняет функцию сервиса в текущем режиме работы с БД.
+
+    Сервисы написаны для синхронной `Session` и принимают ее
+    первым аргументом. В асинхронном режиме функция выполняется
+    через `AsyncSession.run_sync`: запросы идут через asyncio-драйвер,
+    а ожидание ответа Postgres не блокирует event loop и не занимает
+    поток из пула. В синхронном режиме функция выполняется в пуле
+    потоков, как это делает FastAPI для обычных `def`-эндпоинтов.
+    :param db: Сессия базы данных (синхронная или асинхронная).
+    :param fn: Функция сервиса.
+    :return: Результат функции сервиса.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
 # Тип SessionDep
 # Указывает, что при использовании SessionDep
-# FastAPI должно вызвать функцию get_db через
-# Depends для получения объекта типа Session.
-SessionDep = Annotated[Session, Depends(get_db)]
+# FastAPI должно вызвать функцию get_db (или get_async_db
+# в асинхронном режиме) через Depends для получения объекта сессии.
+if settings.db_async:
+    SessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+else:
+    SessionDep = Annotated[Session, Depends(get_db)]
@@ -0,0 +1,11 @@
+import enum
+
+
+class AwardsDistributionEnum(str, enum.Enum):
+    """
+    Распределения числа достижений у пользователя
+    в генераторе данных
+    """
+    FIXED = 'fixed'  # У всех пользователей одинаковое число
+    UNIFORM = 'uniform'  # Равномерно от 1 до 2 * среднее - 1
+    PARETO = 'pareto'  # Тяжелый хвост: немного очень активных
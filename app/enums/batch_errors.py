@@ -0,0 +1,10 @@
+import enum
+
+
+class BatchErrorEnum(str, enum.Enum):
+    """
+    Причины, по которым элемент пакетной выдачи не был выдан
+    """
+    USER_NOT_FOUND = 'user_not_found'
+    ACHIEVEMENT_NOT_FOUND = 'achievement_not_found'
+    ALREADY_AWARDED = 'already_awarded'
@@ -0,0 +1,10 @@
+import enum
+
+
+class CacheBackendEnum(str, enum.Enum):
+    """
+    Хранилища кэша ответов
+    """
+    MEMORY = 'memory'  # LRU-кэш в памяти процесса
+    REDIS = 'redis'  # Общий кэш воркеров (Redis или совместимый сервер)
+    NONE = 'none'  # Кэширование отключено
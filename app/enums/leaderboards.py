@@ -0,0 +1,9 @@
+import enum
+
+
+class LeaderboardMetricEnum(str, enum.Enum):
+    """
+    Показатели рейтинга пользователей
+    """
+    POINTS = 'points'  # Сумма очков достижений
+    ACHIEVEMENTS = 'achievements'  # Количество достижений
@@ -0,0 +1,9 @@
+import enum
+
+
+class LogFormatEnum(str, enum.Enum):
+    """
+    Форматы логов приложения
+    """
+    TEXT = 'text'  # Строка "уровень - время - сообщение"
+    JSON = 'json'  # Одна JSON-строка на запись (для сборщиков логов)
@@ -0,0 +1,10 @@
+import enum
+
+
+class ResponseModeEnum(str, enum.Enum):
+    """
+    Режимы ответа на выдачу достижения
+    """
+    FULL = 'full'  # Вся история достижений пользователя
+    MINIMAL = 'minimal'  # Только выданное достижение
+    RECENT = 'recent'  # Ограниченная страница последних достижений
@@ -0,0 +1,20 @@
+import enum
+
+
+class StatsWindowEnum(str, enum.Enum):
+    """
+    Именованные окна статистики: последние дни, включая сегодняшний
+    """
+    TODAY = 'today'
+    WEEK = 'week'  # 7 дней
+    MONTH = 'month'  # 30 дней
+    YEAR = 'year'  # 365 дней
+
+    @property
+    def days(self) -> int:
+        return {
+            StatsWindowEnum.TODAY: 1,
+            StatsWindowEnum.WEEK: 7,
+            StatsWindowEnum.MONTH: 30,
+            StatsWindowEnum.YEAR: 365,
+        }[self]
@@ -0,0 +1,9 @@
+import enum
+
+
+class StreakKindEnum(str, enum.Enum):
+    """
+    Виды серий дней подряд с выдачей достижений
+    """
+    CURRENT = 'current'  # Серия, которая продолжается сегодня или вчера
+    LONGEST = 'longest'  # Самая длинная серия за всю историю
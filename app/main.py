@@ -1,58 +1,86 @@
-import logging
-import time
+import asyncio
 from typing import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from app.api import api_router
-from app.db.session import get_db
-from app.db.utils import init_db
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.core.metrics import registry
+from app.db.notify import listener
+from app.db.session import async_engine
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_ledger import QueryLedgerMiddleware
+from app.middleware.request_logging import RequestLoggingMiddleware
+from app.services.cache import stats_cache
+from app.services.partitions import maintain_partitions_periodically
+from app.services.warmup import startup, warm_up
 
 
-# Настройка логгера
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s - %(asctime)s - %(message)s",
-)
-logger = logging.getLogger(__name__)
-
-
-# Создание middleware для логгирования
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-
-        # Логирование запроса
-        logger.info(f"Request: {request.method} {request.url}")
-
-        # Обработка запроса и получение ответа
-        response = await call_next(request)
-
-        # Логирование ответа
-        process_time = time.time() - start_time
-        logger.info(
-            f"Response: {response.status_code} |"
-            f" Processing time: {process_time:.4f}s")
-
-        return response
+# Настройка логгера: записи выводит фоновый поток
+setup_logging(settings)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    db = next(get_db())
-    init_db(db)  # Инициализация данных при старте
+    # Прогрев идет в фоне: воркер сразу принимает соединения,
+    # а /ready отвечает 503 до окончания прогрева
+    warm_up_task = asyncio.create_task(warm_up(startup))
+    if settings.db_listen:
+        listener.start()  # Инвалидация кэшей по уведомлениям
+    metrics_flush = None
+    if settings.metrics_enabled and settings.metrics_dir:
+        # Снимки метрик воркера для /metrics других воркеров
+        metrics_flush = asyncio.create_task(registry.flush_periodically(
+            settings.metrics_dir, settings.metrics_flush_interval
+        ))
+    partitions = None
+    if settings.partition_maintenance_interval > 0:
+        # Секции следующих месяцев у долго работающих воркеров
+        # (выполняет один воркер, не входит в прогрев)
+        partitions = asyncio.create_task(maintain_partitions_periodically(
+            settings.partition_maintenance_interval
+        ))
     yield
+    warm_up_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warm_up_task
+    if partitions is not None:
+        partitions.cancel()
+        with suppress(asyncio.CancelledError):
+            await partitions
+    if metrics_flush is not None:
+        metrics_flush.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_flush
+    listener.stop()
+    await stats_cache.close()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 app = FastAPI(
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
 # Добавление middleware
-app.add_middleware(LoggingMiddleware)
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=settings.request_log_sample_rate,
+    slow_ms=settings.request_log_slow_ms
+)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+# Внешний по отношению к MetricsMiddleware: метрики берут время
+# SQL-запросов из журнала. Server-Timing - только при разработке
+app.add_middleware(
+    QueryLedgerMiddleware,
+    server_timing=settings.environment == "development"
+)
 
 
 @app.get("/")
@@ -0,0 +1,89 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.db.ledger import current_ledger, route_label
+
+
+requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ("method", "route", "status")
+)
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency up to the last body chunk",
+    ("method", "route")
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests being processed"
+)
+db_queries = registry.counter(
+    "db_queries_total",
+    "SQL statements executed while serving the route",
+    ("route",)
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by route",
+    ("route",)
+)
+db_time_per_request = registry.histogram(
+    "db_request_time_seconds",
+    "Total SQL time of one HTTP request",
+    ("route",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware метрик запросов по шаблону маршрута
+    (например, /api/v1/users/{user_id}/achievements).
+
+    Метрики обновляются в цикле событий после ответа, длительности
+    SQL-запросов берутся из журнала запроса (QueryLedgerMiddleware
+    должен быть внешним по отношению к этому middleware). Запросы,
+    не попавшие ни в один маршрут, получают метку unmatched:
+    путь в метке сделал бы число рядов неограниченным.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        requests_in_flight.inc()
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            requests_in_flight.dec()
+            self.record(scope, status_code, duration)
+
+    @staticmethod
+    def record(scope: Scope, status_code: int, duration: float):
+        route = route_label(scope)
+        method = scope["method"]
+        requests_total.inc((method, route, str(status_code)))
+        request_duration.observe((method, route), duration)
+        ledger = current_ledger.get()
+        if ledger is not None and ledger.durations:
+            labels = (route,)
+            db_queries.inc(labels, ledger.count)
+            for seconds in ledger.durations:
+                db_query_duration.observe(labels, seconds)
+            db_time_per_request.observe(labels, ledger.total)
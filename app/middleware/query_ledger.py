@@ -0,0 +1,42 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.ledger import QueryLedger, current_ledger
+
+
+class QueryLedgerMiddleware:
+    """
+    ASGI-middleware журнала SQL-запросов: создает журнал на время
+    запроса, после ответа предупреждает в логе о превышении бюджета
+    запросов маршрута и о повторяющихся запросах (N+1).
+
+    С server_timing=True (режим разработки) добавляет в ответ
+    заголовок Server-Timing с числом и суммарным временем запросов.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ledger = QueryLedger(scope)
+        token = current_ledger.set(ledger)
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start" and ledger.count:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", ledger.server_timing())
+            await send(message)
+
+        try:
+            await self.app(
+                scope, receive,
+                send_with_timing if self.server_timing else send
+            )
+        finally:
+            current_ledger.reset(token)
+        ledger.check()
@@ -0,0 +1,75 @@
+import logging
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger("app.requests")
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI-middleware журнала запросов: одна запись на запрос
+    с методом, путем, статусом и временем обработки.
+
+    В отличие от BaseHTTPMiddleware не создает отдельную задачу
+    и поток тела ответа, поэтому не мешает потоковым ответам.
+    Время измеряется до отправки последнего фрагмента тела.
+    Записывается доля sample_rate запросов; медленные запросы
+    (не быстрее slow_ms) и ответы 5xx записываются всегда
+    с уровнем WARNING.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0,
+                 slow_ms: float = 500.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.log(scope, status_code,
+                     (time.perf_counter() - start) * 1000)
+
+    def log(self, scope: Scope, status_code: int, duration_ms: float):
+        if duration_ms >= self.slow_ms or status_code >= 500:
+            level = logging.WARNING
+        elif (
+                self.sample_rate >= 1.0
+                or random.random() < self.sample_rate
+        ):
+            level = logging.INFO
+        else:
+            return
+        if not logger.isEnabledFor(level):
+            return
+        # makeRecord вместо logger.log: место вызова всегда одно,
+        # поэтому обход стека (findCaller) не нужен
+        logger.handle(logger.makeRecord(
+            logger.name, level, __file__, 0,
+            "%s %s %s %.1fms",
+            (scope["method"], scope["path"], status_code, duration_ms),
+            None,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration_ms, 3),
+            }
+        ))
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String
+from sqlalchemy import ForeignKey, Integer, String
 from app.db.base import Base
 
 
@@ -12,3 +12,20 @@ class Achievement(Base):
     description_en: Mapped[str] = mapped_column(String, nullable=False)
     description_ru: Mapped[str] = mapped_column(String, nullable=False)
     points: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class AchievementTranslation(Base):
+    """
+    Переводы достижений на языки, для которых в achievements нет
+    колонок name_* и description_*.
+    """
+    __tablename__ = "achievement_translations"
+
+    achievement_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("achievements.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    language: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str] = mapped_column(String, nullable=False)
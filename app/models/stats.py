@@ -0,0 +1,111 @@
+from datetime import date, datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Sequence,
+)
+from app.db.base import Base
+
+
+# Версия данных о выдаче достижений: увеличивается при каждой
+# выдаче и входит в ключи кэша статистики
+data_version_seq = Sequence("data_version_seq", metadata=Base.metadata)
+
+
+class UserStats(Base):
+    """
+    Агрегаты по достижениям пользователя. Обновляются в той же
+    транзакции, что и выдача достижения.
+    """
+    __tablename__ = "user_stats"
+    __table_args__ = (
+        # Рейтинги: максимум, постраничный обход по убыванию
+        # и число различных значений выше заданного (место
+        # пользователя) читаются только из индекса
+        Index("ix_user_stats_total_points_user_id",
+              "total_points", "user_id"),
+        Index("ix_user_stats_achievement_count_user_id",
+              "achievement_count", "user_id"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True
+    )
+    achievement_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0
+    )
+    total_points: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0
+    )
+    last_issued_at: Mapped[datetime | None] = mapped_column(
+        DateTime,
+        nullable=True
+    )
+
+
+class UserDailyStats(Base):
+    """
+    Агрегаты выдачи достижений пользователя за день (UTC): из них
+    статистика за окно читается по дням, а не по истории выдачи.
+    Обновляются в той же транзакции, что и выдача достижения.
+    """
+    __tablename__ = "user_daily_stats"
+
+    # День - первая колонка ключа: окно читается диапазоном дней
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True
+    )
+    achievement_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0
+    )
+    total_points: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0
+    )
+
+
+class UserStreak(Base):
+    """
+    Серии дней подряд с выдачей достижений. Текущая серия обновляется
+    в той же транзакции, что и выдача достижения.
+    """
+    __tablename__ = "user_streaks"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True
+    )
+    # Длина последней серии (актуальна, если она не прервалась)
+    current_streak: Mapped[int] = mapped_column(
+        Integer,
+        index=True,
+        nullable=False,
+        default=0
+    )
+    longest_streak: Mapped[int] = mapped_column(
+        Integer,
+        index=True,
+        nullable=False,
+        default=0
+    )
+    current_start: Mapped[date] = mapped_column(Date, nullable=False)
+    last_award_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -1,7 +1,14 @@
-from datetime import datetime, UTC
+from datetime import datetime
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey, DateTime
+from sqlalchemy import (
+    Integer,
+    String,
+    ForeignKey,
+    DateTime,
+    Index,
+)
+from app.core.timestamps import utc_now
 from app.db.base import Base
 
 
@@ -21,11 +28,28 @@ class User(Base):
 
 class UserAchievement(Base):
     __tablename__ = "user_achievements"
+    __table_args__ = (
+        # Постраничная выборка истории пользователя по курсору
+        # в порядке выдачи
+        Index("ix_user_achievements_user_id_issued_at_id",
+              "user_id", "issued_at", "id"),
+        # Неполные дни на границах окна статистики: строки
+        # добавляются в порядке выдачи, BRIN хранит диапазоны блоков
+        Index("ix_user_achievements_issued_at", "issued_at",
+              postgresql_using="brin"),
+        # Помесячные секции по времени выдачи (секции создаются
+        # функцией ensure_user_achievements_partitions, см.
+        # app/services/partitions.py); уникальность выдачи -
+        # в UserAchievementClaim
+        {"postgresql_partition_by": "RANGE (issued_at)"},
+    )
 
+    # Первичный ключ секционированной таблицы включает ключ
+    # секционирования
     id: Mapped[int] = mapped_column(
         Integer,
         primary_key=True,
-        index=True
+        autoincrement=True
     )
     user_id: Mapped[int] = mapped_column(
         Integer,
@@ -39,7 +63,8 @@ class UserAchievement(Base):
     )
     issued_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.now(UTC)
+        primary_key=True,
+        default=utc_now
     )
 
     user: Mapped["User"] = relationship(
@@ -47,3 +72,22 @@ class UserAchievement(Base):
         back_populates="achievements"
     )
     achievement: Mapped["Achievement"] = relationship("Achievement")
+
+
+class UserAchievementClaim(Base):
+    """
+    Выданные пары (пользователь, достижение): одно и то же
+    достижение выдается пользователю только один раз.
+    """
+    __tablename__ = "user_achievement_claims"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True
+    )
+    achievement_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("achievements.id"),
+        primary_key=True
+    )
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+from app.enums.leaderboards import LeaderboardMetricEnum
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    user_name: str
+    achievement_count: int
+    total_points: int
+
+
+class UserRank(LeaderboardEntry):
+    metric: LeaderboardMetricEnum
+
+
+class LiveLeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    total_points: int
+
+
+class LivePosition(LiveLeaderboardEntry):
+    above: list[LiveLeaderboardEntry] = []
+    below: list[LiveLeaderboardEntry] = []
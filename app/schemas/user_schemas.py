@@ -3,6 +3,7 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from app.enums.batch_errors import BatchErrorEnum
 from app.enums.languages import LanguageEnum
 
 
@@ -31,6 +32,28 @@ class UserAchievementCreate(BaseModel):
     achievement_id: int
 
 
+class UserAchievementBatchItem(UserAchievementCreate):
+    user_id: int
+    issued_at: Optional[datetime] = None
+
+
+class UserAchievementBatch(BaseModel):
+    items: list[UserAchievementBatchItem] = Field(
+        min_length=1,
+        max_length=10_000
+    )
+
+
+class UserAchievementBatchError(BaseModel):
+    index: int
+    reason: BatchErrorEnum
+
+
+class UserAchievementBatchResult(BaseModel):
+    inserted: int
+    errors: list[UserAchievementBatchError] = []
+
+
 class UserAchievement(UserAchievementBase):
     id: int
     issued_at: datetime
@@ -1,10 +1,30 @@
+from itertools import islice
+from typing import Optional
+
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import func, over, Integer
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, or_, select
 
+from app.enums.leaderboards import LeaderboardMetricEnum
+from app.enums.streaks import StreakKindEnum
 from app.models.achievement import Achievement
-from app.models.user import User, UserAchievement
+from app.models.user import User
 from app.schemas.achievement_schemas import AchievementCreate
+from app.services.catalog import catalog
+from app.services.leaderboard import get_leaders, stats_source
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    Page,
+    decode_cursor,
+    paginate,
+)
+from app.services.points_difference import (
+    UserTotal,
+    max_difference_pairs,
+    min_difference_pairs,
+)
+from app.services.streaks import get_streaks
+from app.services.windows import StatsWindow
 
 
 def create_achievement(
@@ -19,156 +39,123 @@ def create_achievement(
     """
     db_achievement = Achievement(**achievement.model_dump())
     db.add(db_achievement)
+    catalog.changed(db)
     db.commit()
+    catalog.invalidate()
     db.refresh(db_achievement)
     return db_achievement
 
 
-def get_achievements(db: Session):
-    return db.query(Achievement).all()
+def create_achievements_bulk(
+        db: Session,
+        achievements: list[dict]
+):
+    """
+    Вставка пакета достижений одной транзакцией.
+    :param db: Сессия базы данных.
+    :param achievements: Данные достижений (поля схемы AchievementCreate).
+    """
+    db.execute(insert(Achievement), achievements)
+    catalog.changed(db)
+    db.commit()
+    catalog.invalidate()
 
 
-def users_with_max_achievements(db: Session):
+def get_achievements(
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_LIMIT
+) -> Page:
     """
-    Находит пользователей с максимальным количеством достижений.
+    Страница достижений в порядке идентификаторов.
+    Читается из кэша каталога достижений без запроса к базе.
     :param db: Сессия базы данных.
-    :return: Список словарей с информацией о пользователях.
+    :param cursor: Курсор страницы (None - первая страница).
+    :param limit: Размер страницы.
+    :return: Страница достижений.
     """
-    # Шаг 1: Получаем максимальное количество достижений
-    max_achievements = (
-        db.query(func.count(UserAchievement.id))
-        .select_from(UserAchievement)
-        .join(User, User.id == UserAchievement.user_id)
-        .group_by(UserAchievement.user_id)
-        .order_by(func.count(UserAchievement.id).desc())
-        .limit(1)
-        .scalar()
+    after = decode_cursor(cursor, 1)
+    return paginate(
+        catalog.page(db, after[0] if after is not None else None, limit + 1),
+        limit,
+        key=lambda achievement: (achievement["id"],)
     )
 
-    # Шаг 2: Получаем пользователей с максимальным количеством достижений
-    max_users = (
-        db.query(
-            User.id.label("user_id"),
-            User.name.label("user_name"),
-            func.count(UserAchievement.id).label("achievement_count")
-        )
-        .join(UserAchievement, User.id == UserAchievement.user_id)
-        .group_by(User.id)
-        .having(func.count(UserAchievement.id) == max_achievements)
-        .all()
-    )
 
-    return [
-        {
-            "user_id": user.user_id,
-            "user_name": user.user_name,
-            "achievement_count": user.achievement_count,
-        }
-        for user in max_users
-    ]
+def users_with_max_achievements(
+        db: Session,
+        window: Optional[StatsWindow] = None
+):
+    """
+    Находит пользователей с максимальным количеством достижений
+    (первое место рейтинга по количеству достижений).
+    :param db: Сессия базы данных.
+    :param window: Окно статистики (None - за все время).
+    :return: Список словарей с информацией о пользователях.
+    """
+    return get_leaders(db, LeaderboardMetricEnum.ACHIEVEMENTS, window)
 
 
-def user_with_max_points(db: Session):
+def user_with_max_points(
+        db: Session,
+        window: Optional[StatsWindow] = None
+):
     """
-    Находит пользователей с максимальным количеством очков достижений.
+    Находит пользователей с максимальным количеством очков достижений
+    (первое место рейтинга по очкам).
     :param db: Сессия базы данных.
+    :param window: Окно статистики (None - за все время).
     :return: Список пользователей с максимальным количеством очков.
     """
-    # Подзапрос для вычисления сумм очков для каждого пользователя
-    subquery = (
-        db.query(
-            User.id.label("user_id"),
-            User.name.label("user_name"),
-            func.sum(Achievement.points).label("total_points")
-        )
-        .join(UserAchievement, User.id == UserAchievement.user_id)
-        .join(Achievement, UserAchievement.achievement_id == Achievement.id)
-        .group_by(User.id)
-        .subquery()
-    )
-
-    # Подзапрос для нахождения максимальной суммы очков
-    max_points = (
-        db.query(func.max(subquery.c.total_points))
-        .scalar()
-    )
-
-    # Запрос для получения пользователей с максимальной суммой очков
-    result = (
-        db.query(
-            subquery.c.user_id,
-            subquery.c.user_name,
-            subquery.c.total_points,
-        )
-        .filter(subquery.c.total_points == max_points)
-        .all()
-    )
-
-    users = [
-        {
-            "user_id": user.user_id,
-            "user_name": user.user_name,
-            "total_points": user.total_points,
-        }
-        for user in result
-    ]
-
-    return users
+    return get_leaders(db, LeaderboardMetricEnum.POINTS, window)
 
 
 def get_users_with_points_difference(
         db: Session,
-        find_max: bool = True
+        find_max: bool = True,
+        limit: int = 100,
+        window: Optional[StatsWindow] = None
 ):
     """
     Универсальная функция для поиска пользователей с максимальной
     или минимальной разницей очков достижений.
+    Работает по отсортированным суммам очков из user_stats (или из
+    агрегатов за окно): максимум ищется между крайними значениями
+    (только пользователи с минимальной и максимальной суммой),
+    минимум - между соседними суммами за один потоковый проход.
     :param db: Сессия базы данных.
     :param find_max: Если флаг равен True - ищет максимальную
     разницу, иначе минимальную.
+    :param limit: Максимальное количество пар в ответе.
+    :param window: Окно статистики (None - за все время).
     :return: Список пар пользователей с соответствующей разностью очков.
     """
-    # Подзапрос для получения суммарных очков пользователей
-    user_points = (
-        db.query(
-            User.id.label("user_id"),
-            User.name.label("user_name"),
-            func.sum(Achievement.points).label("total_points")
+    source = stats_source(window)
+    total_points = source.c.total_points
+    user_points = db.query(
+        User.id,
+        User.name,
+        total_points,
+    ).join(source, User.id == source.c.user_id)
+
+    if find_max:
+        lowest = select(func.min(total_points)).scalar_subquery()
+        highest = select(func.max(total_points)).scalar_subquery()
+        extremes = user_points.filter(
+            or_(total_points == lowest, total_points == highest)
         )
-        .join(UserAchievement, User.id == UserAchievement.user_id)
-        .join(Achievement, UserAchievement.achievement_id == Achievement.id)
-        .group_by(User.id)
-        .subquery()
-    )
-
-    # Создание алиасов для самосоединения
-    user1 = aliased(user_points)
-    user2 = aliased(user_points)
-
-    # Запрос для получения пар пользователей и разности очков
-    paired_users = (
-        db.query(
-            user1.c.user_id.label("user_1_id"),
-            user1.c.user_name.label("user_1_name"),
-            user1.c.total_points.label("user_1_points"),
-            user2.c.user_id.label("user_2_id"),
-            user2.c.user_name.label("user_2_name"),
-            user2.c.total_points.label("user_2_points"),
-            func.abs(
-                user1.c.total_points - user2.c.total_points
-            ).label("points_difference"),
+        points_difference, pairs = max_difference_pairs(
+            UserTotal(*row) for row in extremes
+        )
+    else:
+        sorted_totals = (
+            user_points
+            .order_by(total_points)
+            .yield_per(10_000)
+        )
+        points_difference, pairs = min_difference_pairs(
+            UserTotal(*row) for row in sorted_totals
         )
-        # Исключаем повторяющиеся пары
-        .filter(user1.c.user_id < user2.c.user_id)
-        .subquery()
-    )
-
-    # Определяем, искать максимальную или минимальную разницу
-    points_difference = (
-        db.query(func.max(paired_users.c.points_difference)).scalar()
-        if find_max
-        else db.query(func.min(paired_users.c.points_difference)).scalar()
-    )
 
     if points_difference is None:
         raise HTTPException(
@@ -176,69 +163,28 @@ def get_users_with_points_difference(
             detail="Not enough data to calculate differences"
         )
 
-    # Получение всех пар с соответствующей разностью
-    result = (
-        db.query(paired_users)
-        .filter(paired_users.c.points_difference == points_difference)
-        .all()
-    )
-
-    return [
-        {
-            "user_1": {
-                "id": pair.user_1_id,
-                "name": pair.user_1_name,
-                "total_points": pair.user_1_points,
-            },
-            "user_2": {
-                "id": pair.user_2_id,
-                "name": pair.user_2_name,
-                "total_points": pair.user_2_points,
-            },
-            "points_difference": pair.points_difference,
-        }
-        for pair in result
-    ]
+    return list(islice(pairs, limit))
 
 
-def users_with_7_day_streak(db: Session):
+def users_with_7_day_streak(
+        db: Session,
+        window: Optional[StatsWindow] = None
+):
     """
     Находит пользователей, которые получали достижения 7 дней подряд.
+    Читает самые длинные серии из user_streaks по индексу (для окна -
+    серии из дней окна).
     :param db: Сессия базы данных.
-    :return: Список пользователей с информацией о 7-дневной серии.
+    :param window: Окно статистики (None - за все время).
+    :return: Список идентификаторов пользователей.
     """
-    # Оконная функция для ROW_NUMBER
-    streak_row_number = over(
-        func.row_number(),
-        partition_by=UserAchievement.user_id,
-        order_by=func.date(UserAchievement.issued_at)
-    )
-
-    # Группирующий идентификатор последовательности
-    streak_group = func.date_part(
-        'epoch',
-        func.date(UserAchievement.issued_at)
-    ) // (24 * 60 * 60) - streak_row_number.cast(Integer)
-
-    # Подзапрос для вычисления streak_group
-    subquery = (
-        db.query(
-            UserAchievement.user_id,
-            func.date(UserAchievement.issued_at).label("achievement_date"),
-            streak_group.label("streak_group")
+    return [
+        row["user_id"]
+        for row in get_streaks(
+            db,
+            kind=StreakKindEnum.LONGEST,
+            min_days=7,
+            limit=None,
+            window=window
         )
-        .subquery()
-    )
-
-    # Запрос для нахождения групп с минимум 7 днями подряд
-    streak_query = (
-        db.query(subquery.c.user_id)
-        .group_by(subquery.c.user_id, subquery.c.streak_group)
-        .having(func.count().label("streak_length") >= 6)
-    )
-
-    # Выполнение запроса и получение результатов
-    result = streak_query.all()
-
-    # Возвращаем id пользователей
-    return set(row.user_id for row in result)
+    ]
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlencode
+
+from app.core.config import Settings, settings
+from app.enums.cache_backends import CacheBackendEnum
+from app.services.serialization import dumps
+from app.services.versions import data_version
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Необязательная зависимость (extras "redis")
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Отсутствие значения в кэше
+MISSING = object()
+
+
+class MemoryCache:
+    """
+    LRU-кэш с ограничением числа записей и временем жизни записи
+    в памяти процесса.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = (
+            OrderedDict()
+        )
+
+    async def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    async def close(self):
+        pass
+
+
+class RedisCache:
+    """
+    Общий для воркеров кэш в Redis (или совместимом сервере).
+    При недоступности сервера запросы выполняются без кэша.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "achievements:"):
+        if redis is None:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the 'redis' package"
+            )
+        self._client = redis.Redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Any:
+        try:
+            raw = await self._client.get(self._prefix + key)
+        except redis.RedisError as error:
+            logger.warning("Cache get failed: %s", error)
+            return MISSING
+        return MISSING if raw is None else raw
+
+    async def set(self, key: str, value: bytes):
+        try:
+            await self._client.set(
+                self._prefix + key,
+                value,
+                px=int(self._ttl * 1000)
+            )
+        except redis.RedisError as error:
+            logger.warning("Cache set failed: %s", error)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class NullCache:
+    """
+    Кэш, который ничего не хранит (CACHE_BACKEND=none).
+    """
+
+    async def get(self, key: str) -> Any:
+        return MISSING
+
+    async def set(self, key: str, value: bytes):
+        pass
+
+    async def close(self):
+        pass
+
+
+def create_cache(settings: Settings) -> MemoryCache | RedisCache | NullCache:
+    """
+    Создает хранилище кэша по настройкам.
+    :param settings: Настройки приложения.
+    :return: Хранилище кэша.
+    """
+    if settings.cache_backend == CacheBackendEnum.REDIS:
+        return RedisCache(settings.redis_url, settings.cache_ttl)
+    if settings.cache_backend == CacheBackendEnum.MEMORY:
+        return MemoryCache(settings.cache_max_entries, settings.cache_ttl)
+    return NullCache()
+
+
+async def cached(
+        name: str,
+        compute: Callable[[], Awaitable[Any]],
+        **params
+) -> bytes:
+    """
+    Возвращает ответ из кэша или вычисляет и сохраняет его.
+    В кэше хранится готовый JSON, поэтому попадание в кэш
+    не требует ни запроса, ни сериализации.
+
+    Ключ содержит версию данных, поэтому после выдачи достижения
+    старые записи перестают использоваться и вытесняются по LRU/TTL.
+    Версия фиксируется до вычисления: если данные изменились
+    во время вычисления, результат сохранится под старой версией.
+    Исключения (например, HTTPException) не кэшируются.
+    :param name: Имя кэшируемого запроса.
+    :param compute: Функция, вычисляющая значение.
+    :param params: Параметры запроса, входящие в ключ.
+    :return: Ответ в виде JSON в байтах.
+    """
+    key = f"{name}:v{data_version.value}:{urlencode(sorted(params.items()))}"
+    value = await stats_cache.get(key)
+    if value is MISSING:
+        value = dumps(await compute())
+        await stats_cache.set(key, value)
+    return value
+
+
+# Кэш ответов статистики
+stats_cache = create_cache(settings)
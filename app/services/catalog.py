@@ -0,0 +1,222 @@
+import hashlib
+import threading
+import time
+from bisect import bisect_right
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.notify import listener, notify
+from app.enums.languages import LanguageEnum
+from app.models.achievement import Achievement, AchievementTranslation
+from app.services.localization import (
+    COLUMN_LANGUAGES,
+    DEFAULT_LANGUAGE,
+    TABLE_LANGUAGES,
+)
+
+
+# Канал уведомлений об изменении каталога достижений
+CATALOG_CHANNEL = "achievement_catalog"
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    loaded_at: float
+    # Хеш содержимого каталога (для ETag ответов, зависящих от него)
+    etag: str
+    # Идентификаторы достижений по возрастанию
+    ids: list[int]
+    # Достижения в формате схемы Achievement
+    achievements: dict[int, dict]
+    # Язык -> локализованные достижения в порядке полей
+    # AchievementOut (без issued_at)
+    views: dict[str, dict[int, dict]]
+
+
+def build_snapshot(
+        version: int,
+        rows: Iterable,
+        translations: Iterable = ()
+) -> CatalogSnapshot:
+    """
+    Строит снимок каталога с готовыми представлениями для всех языков.
+    :param version: Версия каталога, для которой читались строки.
+    :param rows: Строки achievements в порядке идентификаторов.
+    :param translations: Строки achievement_translations для языков
+    без колонок в achievements.
+    :return: Снимок каталога.
+    """
+    achievements = {row.id: dict(row._mapping) for row in rows}
+    translated = {language: {} for language in TABLE_LANGUAGES}
+    for row in translations:
+        translated[row.language][row.achievement_id] = (
+            row.name, row.description
+        )
+    etag = hashlib.blake2b(
+        repr((list(achievements.values()), translated)).encode(),
+        digest_size=12
+    ).hexdigest()
+
+    def localize(achievement: dict, language: str) -> tuple[str, str]:
+        if language in COLUMN_LANGUAGES:
+            return (achievement[f"name_{language}"],
+                    achievement[f"description_{language}"])
+        return translated.get(language, {}).get(achievement["id"]) or (
+            achievement[f"name_{DEFAULT_LANGUAGE}"],
+            achievement[f"description_{DEFAULT_LANGUAGE}"],
+        )
+
+    views = {}
+    for language in (language.value for language in LanguageEnum):
+        views[language] = {}
+        for achievement_id, achievement in achievements.items():
+            name, description = localize(achievement, language)
+            views[language][achievement_id] = {
+                "id": achievement_id,
+                "name": name,
+                "description": description,
+                "points": achievement["points"],
+            }
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=time.monotonic(),
+        etag=etag,
+        ids=list(achievements),
+        achievements=achievements,
+        views=views,
+    )
+
+
+class AchievementCatalog:
+    """
+    Кэш каталога достижений в памяти процесса.
+
+    Каталог мал и почти не меняется, поэтому читается целиком.
+    Счетчик версии увеличивается при каждом изменении каталога:
+    в этом процессе - сразу после коммита, в других воркерах -
+    по уведомлению LISTEN/NOTIFY. Загрузка, начатая до увеличения
+    версии, не сохраняется. TTL ограничивает устаревание, если
+    уведомления недоступны (например, за PgBouncer).
+    """
+
+    def __init__(self, ttl: float):
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self, payload: Optional[str] = None):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def _load(self, db: Session) -> CatalogSnapshot:
+        version = self._version
+        rows = db.execute(
+            # Порядок колонок совпадает с порядком полей схемы Achievement
+            select(
+                Achievement.name_en,
+                Achievement.name_ru,
+                Achievement.points,
+                Achievement.description_en,
+                Achievement.description_ru,
+                Achievement.id,
+            ).order_by(Achievement.id)
+        ).all()
+        translations = []
+        if TABLE_LANGUAGES:
+            translations = db.execute(
+                select(AchievementTranslation).where(
+                    AchievementTranslation.language.in_(TABLE_LANGUAGES)
+                )
+            ).scalars().all()
+        snapshot = build_snapshot(version, rows, translations)
+        with self._lock:
+            if self._version == version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Актуальный снимок каталога без обращения к базе.
+        :return: Снимок или None, если его нужно загрузить.
+        """
+        snapshot = self._snapshot
+        if (snapshot is not None
+                and time.monotonic() - snapshot.loaded_at < self._ttl):
+            return snapshot
+        return None
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        """
+        Возвращает актуальный снимок каталога, загружая его при промахе.
+        :param db: Сессия базы данных.
+        :return: Снимок каталога.
+        """
+        return self.current() or self._load(db)
+
+    def localized(
+            self,
+            db: Session,
+            language: str,
+            achievement_ids: Iterable[int] = ()
+    ) -> dict[int, dict]:
+        """
+        Локализованные достижения для языка пользователя.
+        :param db: Сессия базы данных.
+        :param language: Язык пользователя.
+        :param achievement_ids: Идентификаторы, которые должны быть
+        в каталоге. Если какого-то нет (достижение создано другим
+        воркером, а уведомление еще не пришло), каталог перечитывается
+        один раз.
+        :return: Словарь идентификатор -> локализованное достижение.
+        """
+        snapshot = self.get(db)
+        if not snapshot.achievements.keys() >= set(achievement_ids):
+            self.invalidate()
+            snapshot = self._load(db)
+        return snapshot.views.get(
+            language, snapshot.views[DEFAULT_LANGUAGE]
+        )
+
+    def page(
+            self,
+            db: Session,
+            after: Optional[int],
+            limit: int
+    ) -> list[dict]:
+        """
+        Достижения с идентификатором больше after в порядке
+        идентификаторов (не более limit).
+        :param db: Сессия базы данных.
+        :param after: Идентификатор последнего достижения предыдущей
+        страницы (None - первая страница).
+        :param limit: Количество достижений.
+        :return: Список достижений в формате схемы Achievement.
+        """
+        snapshot = self.get(db)
+        start = 0 if after is None else bisect_right(snapshot.ids, after)
+        return [
+            snapshot.achievements[achievement_id]
+            for achievement_id in snapshot.ids[start:start + limit]
+        ]
+
+    def changed(self, db: Session):
+        """
+        Сообщает другим воркерам об изменении каталога.
+        Вызывается до коммита транзакции, изменившей каталог.
+        :param db: Сессия базы данных.
+        """
+        notify(db, CATALOG_CHANNEL)
+
+
+# Каталог процесса
+catalog = AchievementCatalog(ttl=settings.catalog_cache_ttl)
+listener.subscribe(CATALOG_CHANNEL, catalog.invalidate)
@@ -0,0 +1,113 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from starlette import status
+
+from app.core.config import settings
+from app.services.cache import cached
+from app.services.catalog import catalog
+from app.services.serialization import trusted_response
+from app.services.versions import data_version
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит сильный ETag из маркеров версии данных и параметров запроса.
+    :param parts: Значения, от которых зависит тело ответа.
+    :return: ETag в кавычках.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def catalog_etag(*parts: Any) -> Optional[str]:
+    """
+    ETag ответа, зависящего от каталога достижений.
+    :param parts: Остальные значения, от которых зависит тело ответа.
+    :return: ETag или None, если снимок каталога еще не загружен.
+    """
+    snapshot = catalog.current()
+    if snapshot is None:
+        return None
+    return make_etag(snapshot.etag, *parts)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in header.split(",")
+    )
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"max-age={settings.http_cache_max_age}, must-revalidate"
+        ),
+    }
+
+
+def conditional(
+        request: Request,
+        response: Response,
+        etag: Optional[str]
+) -> Optional[Response]:
+    """
+    Обрабатывает условный GET.
+    :param request: Запрос.
+    :param response: Ответ эндпоинта (в него добавляются ETag
+    и Cache-Control).
+    :param etag: ETag актуального ответа или None, если маркер
+    версии неизвестен (тогда условный GET не поддерживается).
+    :return: Ответ 304, если у клиента актуальная версия, иначе None.
+    """
+    if etag is None:
+        return None
+    headers = cache_headers(etag)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def cached_stats(
+        request: Request,
+        response: Response,
+        name: str,
+        compute: Callable[[], Awaitable[Any]],
+        **params
+) -> Response:
+    """
+    Ответ эндпоинта статистики с ETag по версии данных и кэшем.
+
+    Если версия данных известна без запроса к базе, ETag строится
+    из нее, и при совпадении с If-None-Match возвращается 304
+    без выполнения запроса сервиса и без обращения к кэшу.
+    :param request: Запрос.
+    :param response: Ответ эндпоинта.
+    :param name: Имя запроса статистики.
+    :param compute: Функция, вычисляющая ответ.
+    :param params: Параметры запроса, от которых зависит ответ.
+    :return: Ответ 304 или ответ с JSON из кэша.
+    """
+    version = data_version.known()
+    etag = (
+        make_etag(name, version, sorted(params.items()))
+        if version is not None
+        else None
+    )
+    not_modified = conditional(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return trusted_response(await cached(name, compute, **params), response)
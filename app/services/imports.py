@@ -0,0 +1,147 @@
+import json
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.session import run_db
+
+
+logger = logging.getLogger(__name__)
+
+# Описание тела запроса для OpenAPI: тело читается потоком,
+# поэтому FastAPI не может вывести его из сигнатуры эндпоинта
+NDJSON_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+    }
+}
+
+
+async def iter_lines(
+        stream: AsyncIterator[bytes],
+        max_line_bytes: int
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    Разбивает поток байтов тела запроса на строки по мере поступления.
+    Строка длиннее max_line_bytes не накапливается в памяти: вместо нее
+    возвращается None, а ее остаток пропускается до перевода строки.
+    :param stream: Поток фрагментов тела запроса.
+    :param max_line_bytes: Максимальная длина строки в байтах.
+    :return: Асинхронный итератор строк без символа перевода строки
+    (None - слишком длинная строка).
+    """
+    tail = b""
+    # Пропускается остаток слишком длинной строки
+    skipping = False
+    async for chunk in stream:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line if len(line) <= max_line_bytes else None
+        if len(tail) > max_line_bytes:
+            if not skipping:
+                yield None
+            skipping = True
+            tail = b""
+    if tail and not skipping:
+        yield tail
+
+
+async def import_ndjson(
+        db,
+        stream: AsyncIterator[bytes],
+        schema: type[BaseModel],
+        insert_rows: Callable[[Session, list[dict]], None],
+        batch_size: int,
+        max_errors: int,
+        max_line_bytes: int
+) -> dict:
+    """
+    Потоковый импорт NDJSON: каждая строка - JSON-объект схемы schema.
+
+    Строки разбираются по мере чтения тела запроса и вставляются
+    пакетами по batch_size, каждый пакет в своей транзакции. В памяти
+    держится только текущий пакет и не более max_errors ошибок,
+    поэтому потребление памяти не зависит от размера загрузки.
+    :param db: Сессия базы данных.
+    :param stream: Поток фрагментов тела запроса.
+    :param schema: Pydantic-схема одной строки.
+    :param insert_rows: Функция сервиса, вставляющая пакет строк.
+    :param batch_size: Размер пакета.
+    :param max_errors: Сколько ошибок возвращать в ответе.
+    :param max_line_bytes: Максимальная длина строки в байтах,
+    более длинные строки считаются ошибочными.
+    :return: Итоги импорта: количество строк, вставленных записей,
+    пакетов и ошибок, а также первые max_errors ошибок.
+    """
+    summary = {
+        "processed": 0,
+        "inserted": 0,
+        "batches": 0,
+        "failed": 0,
+        "errors": [],
+    }
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+
+    def add_error(line: int, error: str):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"line": line, "error": error})
+
+    async def flush():
+        summary["batches"] += 1
+        try:
+            await run_db(db, insert_rows, batch)
+        except SQLAlchemyError as error:
+            await run_db(db, Session.rollback)
+            for line in batch_lines:
+                add_error(line, f"Batch rejected: {error.__class__.__name__}")
+        else:
+            summary["inserted"] += len(batch)
+        logger.info(
+            "Import %s: batch %d, processed %d, inserted %d, failed %d",
+            schema.__name__, summary["batches"], summary["processed"],
+            summary["inserted"], summary["failed"]
+        )
+        batch.clear()
+        batch_lines.clear()
+
+    line_number = 0
+    async for line in iter_lines(stream, max_line_bytes):
+        line_number += 1
+        if line is None:
+            summary["processed"] += 1
+            add_error(line_number, f"Line exceeds {max_line_bytes} bytes")
+            continue
+        if not line.strip():
+            continue
+        summary["processed"] += 1
+        try:
+            item = schema.model_validate(json.loads(line))
+        except ValueError as error:
+            # ValidationError и JSONDecodeError - наследники ValueError
+            message = (
+                error.errors(include_url=False)[0]["msg"]
+                if isinstance(error, ValidationError)
+                else "Invalid JSON"
+            )
+            add_error(line_number, message)
+            continue
+
+        batch.append(item.model_dump(mode="json"))
+        batch_lines.append(line_number)
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return summary
@@ -0,0 +1,222 @@
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    FromClause,
+    Select,
+    func,
+    select,
+    tuple_,
+)
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app.enums.leaderboards import LeaderboardMetricEnum
+from app.models.stats import UserStats
+from app.models.user import User
+from app.services.live_leaderboard import points_board
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    Page,
+    decode_cursor,
+    encode_cursor,
+)
+from app.services.windows import StatsWindow, window_totals
+
+
+def stats_source(window: Optional[StatsWindow] = None) -> FromClause:
+    """
+    Источник агрегатов пользователей: user_stats за все время
+    или агрегаты за окно той же формы (CTE: вычисляется один раз,
+    даже если запрос ссылается на него несколько раз).
+    """
+    if window is None:
+        return UserStats.__table__
+    return window_totals(window).cte("window_stats")
+
+
+def metric_column(metric: LeaderboardMetricEnum,
+                  source: Optional[FromClause] = None):
+    """
+    Колонка агрегатов (по умолчанию user_stats) с показателем
+    рейтинга.
+    """
+    columns = (source if source is not None else UserStats.__table__).c
+    if metric == LeaderboardMetricEnum.ACHIEVEMENTS:
+        return columns.achievement_count
+    return columns.total_points
+
+
+def user_totals(source: Optional[FromClause] = None) -> Select:
+    """
+    Агрегаты пользователей с именами: основа рейтингов и статистики
+    лидеров. Агрегаты читаются из user_stats (или из агрегатов
+    за окно), поэтому в рейтинг попадают пользователи, у которых
+    есть достижения.
+    """
+    if source is None:
+        source = UserStats.__table__
+    return (
+        select(
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            source.c.achievement_count,
+            source.c.total_points,
+        )
+        .join(source, User.id == source.c.user_id)
+    )
+
+
+def get_leaders(
+        db: Session,
+        metric: LeaderboardMetricEnum,
+        window: Optional[StatsWindow] = None
+) -> list[dict]:
+    """
+    Пользователи с максимальным значением показателя (первое место
+    рейтинга). За все время максимум и пользователи с ним находятся
+    по индексу за один запрос, за окно - по агрегатам окна.
+    :param db: Сессия базы данных.
+    :param metric: Показатель рейтинга.
+    :param window: Окно статистики (None - за все время).
+    :return: Список словарей с пользователем и значением показателя.
+    """
+    source = stats_source(window)
+    column = metric_column(metric, source)
+    rows = db.execute(
+        user_totals(source)
+        .with_only_columns(User.id.label("user_id"),
+                           User.name.label("user_name"),
+                           column)
+        .where(column == select(func.max(column)).scalar_subquery())
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def get_leaderboard(
+        db: Session,
+        metric: LeaderboardMetricEnum,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_LIMIT
+) -> Page:
+    """
+    Страница рейтинга по убыванию показателя с плотными местами
+    (равные значения - одно место, следующее значение - следующее
+    место).
+
+    Обход идет по индексу (показатель, user_id) в обратном порядке
+    с продолжением от курсора. Курсор несет и место последней строки
+    страницы, поэтому места следующей страницы считаются по ней
+    без подсчета строк выше.
+    :param db: Сессия базы данных.
+    :param metric: Показатель рейтинга.
+    :param cursor: Курсор страницы (None - первая страница).
+    :param limit: Размер страницы.
+    :return: Страница строк рейтинга.
+    """
+    column = metric_column(metric)
+    after = decode_cursor(cursor, 3)
+    query = user_totals()
+    if after is not None:
+        query = query.where(
+            tuple_(column, UserStats.user_id) < tuple_(after[0], after[1])
+        )
+    rows = db.execute(
+        query
+        .order_by(column.desc(), UserStats.user_id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    if after is None:
+        rank, previous = 0, None
+    else:
+        rank, previous = after[2], after[0]
+    items = []
+    for row in rows[:limit]:
+        value = row._mapping[column.key]
+        if value != previous:
+            rank += 1
+            previous = value
+        items.append({"rank": rank, **row._mapping})
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last[column.key], last["user_id"],
+                                    last["rank"])
+    return Page(items, next_cursor)
+
+
+def count_values_above(db: Session, column, value: int) -> int:
+    """
+    Число различных значений показателя выше value.
+
+    Значения перебираются по индексу (показатель, user_id) рекурсивным
+    запросом: каждый шаг - поиск следующего большего значения
+    за логарифмическое время, поэтому стоимость зависит от числа
+    различных значений выше (плотного места), а не от числа
+    пользователей выше.
+    :param db: Сессия базы данных.
+    :param column: Колонка показателя в user_stats.
+    :param value: Значение показателя.
+    :return: Число различных значений больше value.
+    """
+    values = (
+        select(func.min(column).label("value"))
+        .where(column > value)
+        .cte("values_above", recursive=True)
+    )
+    values = values.union_all(
+        select(
+            select(func.min(column))
+            .where(column > values.c.value)
+            .scalar_subquery()
+        )
+        .where(values.c.value.is_not(None))
+    )
+    return db.execute(select(func.count(values.c.value))).scalar_one()
+
+
+def get_user_rank(
+        db: Session,
+        user_id: int,
+        metric: LeaderboardMetricEnum
+) -> dict:
+    """
+    Место пользователя в рейтинге.
+
+    Плотное место - единица плюс число различных значений показателя
+    выше значения пользователя. Место по очкам при построенном
+    рейтинге в памяти (LEADERBOARD_MEMORY) находится бинарным поиском
+    по различным суммам без обращения к базе, иначе различные
+    значения выше считаются по индексу (count_values_above).
+    :param db: Сессия базы данных.
+    :param user_id: Идентификатор пользователя.
+    :param metric: Показатель рейтинга.
+    :return: Словарь с агрегатами и местом пользователя (у пользователя
+    без достижений показатели равны нулю).
+    """
+    column = metric_column(metric)
+    user = db.execute(
+        select(
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            func.coalesce(UserStats.achievement_count, 0)
+            .label("achievement_count"),
+            func.coalesce(UserStats.total_points, 0).label("total_points"),
+        )
+        .outerjoin(UserStats, User.id == UserStats.user_id)
+        .where(User.id == user_id)
+    ).one_or_none()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    value = user._mapping[column.key]
+    if metric == LeaderboardMetricEnum.POINTS and points_board.ready:
+        rank = points_board.rank(value)
+    else:
+        rank = count_values_above(db, column, value) + 1
+    return {"rank": rank, "metric": metric, **user._mapping}
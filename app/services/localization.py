@@ -0,0 +1,82 @@
+"""
+Локализация названий и описаний достижений.
+
+Для английского и русского в achievements есть колонки
+name_<язык> и description_<язык>. Остальные языки LanguageEnum
+читаются из таблицы achievement_translations (без перевода -
+английский вариант), поэтому новый язык не требует новых колонок.
+"""
+from typing import Union
+
+from sqlalchemy import ColumnElement, FromClause, case, func, select
+
+from app.enums.languages import LanguageEnum
+from app.models.achievement import Achievement, AchievementTranslation
+
+
+DEFAULT_LANGUAGE = LanguageEnum.EN.value
+# Языки с колонками в achievements
+COLUMN_LANGUAGES = tuple(
+    language.value for language in LanguageEnum
+    if f"name_{language.value}" in Achievement.__table__.c
+)
+# Языки, переводы на которые хранятся в achievement_translations
+TABLE_LANGUAGES = tuple(
+    language.value for language in LanguageEnum
+    if language.value not in COLUMN_LANGUAGES
+)
+
+
+def _translated(achievement: FromClause, language, field: str,
+                fallback: ColumnElement) -> ColumnElement:
+    translation = (
+        select(getattr(AchievementTranslation, field))
+        .where(AchievementTranslation.achievement_id == achievement.c.id,
+               AchievementTranslation.language == language)
+        .scalar_subquery()
+    )
+    return func.coalesce(translation, fallback)
+
+
+def _field(achievement: FromClause,
+           language: Union[str, ColumnElement],
+           field: str) -> ColumnElement:
+    columns = achievement.c
+    if isinstance(language, str):
+        if language in COLUMN_LANGUAGES:
+            return columns[f"{field}_{language}"]
+        fallback = columns[f"{field}_{DEFAULT_LANGUAGE}"]
+        if language in TABLE_LANGUAGES:
+            return _translated(achievement, language, field, fallback)
+        return fallback
+
+    value = columns[f"{field}_{DEFAULT_LANGUAGE}"]
+    whens = {
+        code: columns[f"{field}_{code}"]
+        for code in COLUMN_LANGUAGES if code != DEFAULT_LANGUAGE
+    }
+    if whens:
+        value = case(whens, value=language, else_=value)
+    if TABLE_LANGUAGES:
+        # Подзапрос к переводам строится, только если есть языки
+        # без колонок
+        value = _translated(achievement, language, field, value)
+    return value
+
+
+def localized_columns(
+        achievement: FromClause,
+        language: Union[str, ColumnElement]
+) -> tuple[ColumnElement, ColumnElement]:
+    """
+    Колонки name и description на языке пользователя, вычисляемые
+    в запросе: из базы передаются только поля одного языка.
+    :param achievement: Таблица achievements или CTE с ее колонками.
+    :param language: Код языка или SQL-выражение с ним (например,
+    колонка языка пользователя в том же запросе).
+    :return: Выражения с метками name и description.
+    """
+    return (
+        _field(achievement, language, "name").label("name"),
+        _field(achievement, language, "description").label("description"),
+    )
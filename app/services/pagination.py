@@ -0,0 +1,118 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, Response
+from starlette import status
+
+
+# Размер страницы по умолчанию и максимальный (больший limit
+# уменьшается до него)
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+
+# Время в ключе курсора - микросекунды от начала эпохи (UTC)
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+
+
+def encode_cursor(*key: int) -> str:
+    """
+    Кодирует ключ последней записи страницы в непрозрачный курсор.
+    :param key: Значения ключа сортировки.
+    :return: Курсор (base64url без выравнивания).
+    """
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[list[int]]:
+    """
+    Декодирует курсор, полученный от клиента.
+    :param cursor: Курсор или None для первой страницы.
+    :param size: Ожидаемое количество значений ключа.
+    :return: Значения ключа или None для первой страницы.
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        key = None
+
+    if (not isinstance(key, list) or len(key) != size
+            or not all(type(value) is int for value in key)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return key
+
+
+def encode_time(value: datetime) -> int:
+    """
+    Значение ключа курсора для времени UTC без часового пояса.
+    """
+    return (value - EPOCH) // MICROSECOND
+
+
+def decode_time(value: int) -> datetime:
+    """
+    Время из значения ключа курсора (encode_time).
+    """
+    try:
+        return EPOCH + value * MICROSECOND
+    except OverflowError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def page_limit(limit: int) -> int:
+    """
+    Размер страницы запроса списка: limit из запроса, не больше
+    MAX_PAGE_LIMIT, чтобы страница и память на ее ответ были
+    ограничены.
+    :param limit: Размер страницы из запроса.
+    :return: Размер страницы.
+    """
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def paginate(rows: list[Any], limit: int, key) -> Page:
+    """
+    Формирует страницу из выборки размером limit + 1.
+    :param rows: Строки, выбранные с LIMIT limit + 1.
+    :param limit: Размер страницы.
+    :param key: Функция, возвращающая кортеж ключа сортировки строки.
+    :return: Страница и курсор следующей страницы (None - последняя).
+    """
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(*key(rows[-1])))
+
+
+def set_pagination_headers(
+        request: Request,
+        response: Response,
+        next_cursor: Optional[str]
+):
+    """
+    Передает курсор следующей страницы в заголовках ответа
+    (`X-Next-Cursor` и `Link: <...>; rel="next"`).
+    """
+    if next_cursor is None:
+        return
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+from typing import Optional
+
+from sqlalchemy import DateTime, column, func, literal, select, table
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки обслуживания секций: одновременно
+# секции обслуживает один процесс
+PARTITIONS_LOCK_KEY = 0x9A47
+
+# Секция по умолчанию: выдачи за месяцы, для которых еще нет секции
+DEFAULT_PARTITION = table("user_achievements_default", column("issued_at"))
+
+
+def _month_start(value: datetime, months: int = 0) -> datetime:
+    years, month = divmod(value.month - 1 + months, 12)
+    return datetime(value.year + years, month + 1, 1)
+
+
+def ensure_partitions(db: Session, first: datetime, last: datetime) -> int:
+    """
+    Создает помесячные секции user_achievements с месяца first
+    по месяц last (существующие пропускаются). Строки этих месяцев
+    переносятся в новые секции из секции по умолчанию.
+    Выполняется в текущей транзакции, коммит - на вызывающей стороне.
+    :param db: Сессия базы данных.
+    :param first: Момент в первом месяце.
+    :param last: Момент в последнем месяце.
+    :return: Число созданных секций.
+    """
+    return db.scalar(
+        select(func.ensure_user_achievements_partitions(
+            literal(first, DateTime),
+            literal(last, DateTime),
+        ))
+    )
+
+
+def maintain_partitions(
+        db: Session,
+        months_ahead: Optional[int] = None
+) -> int:
+    """
+    Обслуживание секций: секции с текущего месяца на months_ahead
+    месяцев вперед и секции месяцев, строки которых попали в секцию
+    по умолчанию (выдача задним числом или раньше создания секции).
+    :param db: Сессия базы данных.
+    :param months_ahead: На сколько месяцев вперед создавать секции
+    (None - PARTITION_MONTHS_AHEAD).
+    :return: Число созданных секций.
+    """
+    if months_ahead is None:
+        months_ahead = settings.partition_months_ahead
+    now = datetime.now(UTC).replace(tzinfo=None)
+    created = ensure_partitions(db, now, _month_start(now, months_ahead))
+
+    # Только месяцы, в которых есть строки: единичная выдача
+    # с далекой датой не создает пустые секции между ней и текущим
+    # месяцем
+    month = func.date_trunc("month", DEFAULT_PARTITION.c.issued_at)
+    for (first,) in db.execute(select(month).distinct()).all():
+        created += ensure_partitions(db, first, first)
+    db.commit()
+    if created:
+        logger.info("Created %d user_achievements partitions", created)
+    return created
+
+
+def try_maintain_partitions(db: Session) -> Optional[int]:
+    """
+    Обслуживание секций (maintain_partitions), если его сейчас
+    не выполняет другой процесс: advisory-блокировка транзакции
+    снимается коммитом обслуживания.
+    :param db: Сессия базы данных.
+    :return: Число созданных секций или None, если блокировку
+    держит другой процесс.
+    """
+    locked = db.scalar(
+        select(func.pg_try_advisory_xact_lock(PARTITIONS_LOCK_KEY))
+    )
+    if not locked:
+        db.rollback()
+        return None
+    return maintain_partitions(db)
+
+
+def _maintain() -> Optional[int]:
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        return try_maintain_partitions(db)
+
+
+async def maintain_partitions_periodically(interval: float):
+    """
+    Фоновая задача воркера: обслуживание секций раз в interval
+    секунд. Воркеры, запустившиеся вместе, просыпаются почти
+    одновременно, обслуживание выполняет тот, кто взял блокировку,
+    остальные пропускают этот раз. Первый раз секции обслуживаются
+    при старте контейнера (make partitions), а не воркером.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(_maintain)
+        except Exception:
+            logger.exception("Partition maintenance failed")
+
+
+if __name__ == "__main__":
+    # Обслуживание секций при старте контейнера
+    # (scripts/entry-point.sh, make partitions)
+    logging.basicConfig(level=logging.INFO)
+    _maintain()
@@ -0,0 +1,125 @@
+"""
+Поиск пар пользователей с максимальной и минимальной разностью
+суммарных очков без перебора всех n² пар.
+
+- Максимальная разность всегда достигается между крайними значениями:
+  любой пользователь с минимальной суммой и любой с максимальной.
+- Минимальная разность достигается между соседями в отсортированном
+  списке сумм: либо внутри группы одинаковых сумм (разность 0),
+  либо между двумя соседними различными суммами.
+
+Пары генерируются лениво, поэтому огромное множество равных пар
+не материализуется целиком.
+"""
+from itertools import combinations, product
+from typing import Iterable, Iterator, NamedTuple
+
+
+class UserTotal(NamedTuple):
+    id: int
+    name: str
+    total_points: int
+
+
+def _pair(first: UserTotal, second: UserTotal) -> dict:
+    # Первым в паре идет пользователь с меньшим идентификатором
+    if second.id < first.id:
+        first, second = second, first
+    return {
+        "user_1": {
+            "id": first.id,
+            "name": first.name,
+            "total_points": first.total_points,
+        },
+        "user_2": {
+            "id": second.id,
+            "name": second.name,
+            "total_points": second.total_points,
+        },
+        "points_difference": abs(first.total_points - second.total_points),
+    }
+
+
+def _sorted_by_id(group: list[UserTotal]) -> list[UserTotal]:
+    return sorted(group, key=lambda user: user.id)
+
+
+def max_difference_pairs(
+        extremes: Iterable[UserTotal]
+) -> tuple[int | None, Iterator[dict]]:
+    """
+    Пары с максимальной разностью очков.
+    :param extremes: Пользователи с минимальной и максимальной суммой
+    очков (в любом порядке).
+    :return: Максимальная разность (None, если пользователей меньше
+    двух) и ленивый итератор пар.
+    """
+    users = list(extremes)
+    if len(users) < 2:
+        return None, iter(())
+
+    low = min(user.total_points for user in users)
+    high = max(user.total_points for user in users)
+
+    if low == high:
+        # Все суммы равны - разность 0 у каждой пары
+        return 0, (
+            _pair(a, b) for a, b in combinations(_sorted_by_id(users), 2)
+        )
+
+    lowest = _sorted_by_id([u for u in users if u.total_points == low])
+    highest = _sorted_by_id([u for u in users if u.total_points == high])
+    return high - low, (_pair(a, b) for a, b in product(lowest, highest))
+
+
+def min_difference_pairs(
+        sorted_totals: Iterable[UserTotal]
+) -> tuple[int | None, Iterator[dict]]:
+    """
+    Пары с минимальной разностью очков за один проход по суммам,
+    отсортированным по возрастанию.
+    :param sorted_totals: Пользователи, упорядоченные по total_points.
+    :return: Минимальная разность (None, если пользователей меньше
+    двух) и ленивый итератор пар.
+    """
+    best = None
+    # Кандидаты: одна группа (пары внутри нее) или две соседние группы
+    candidates: list[tuple[list[UserTotal], ...]] = []
+    previous: list[UserTotal] | None = None
+    current: list[UserTotal] = []
+
+    def close_group():
+        nonlocal best, candidates, previous
+        if len(current) >= 2:
+            if best != 0:
+                best, candidates = 0, []
+            candidates.append((current,))
+        if previous is not None and best != 0:
+            gap = current[0].total_points - previous[0].total_points
+            if best is None or gap < best:
+                best, candidates = gap, []
+            if gap == best:
+                candidates.append((previous, current))
+        previous = current
+
+    for user in sorted_totals:
+        if current and user.total_points != current[0].total_points:
+            close_group()
+            current = []
+        current.append(user)
+
+    if current:
+        close_group()
+
+    def pairs() -> Iterator[dict]:
+        for candidate in candidates:
+            if len(candidate) == 1:
+                group = _sorted_by_id(candidate[0])
+                for a, b in combinations(group, 2):
+                    yield _pair(a, b)
+            else:
+                lower, upper = map(_sorted_by_id, candidate)
+                for a, b in product(lower, upper):
+                    yield _pair(a, b)
+
+    return best, pairs()
@@ -0,0 +1,53 @@
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from starlette import status
+
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Заголовки тела задает новый ответ
+BODY_HEADERS = (b"content-length", b"content-type")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Сериализует данные в JSON (orjson: datetime, date и enum
+    поддерживаются без jsonable_encoder).
+    :param content: Данные, уже имеющие форму ответа.
+    :return: JSON в байтах.
+    """
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(
+        content: Any,
+        response: Optional[Response] = None,
+        status_code: int = status.HTTP_200_OK
+) -> Response:
+    """
+    Ответ из данных, которые сервис уже построил в форме схемы ответа.
+
+    FastAPI не применяет response_model к возвращенному Response,
+    поэтому данные сериализуются один раз, без повторной валидации.
+    response_model эндпоинта остается для документации OpenAPI.
+    :param content: Данные ответа или готовый JSON в байтах.
+    :param response: Ответ эндпоинта, заголовки которого нужно
+    перенести (пагинация, ETag и т.п.).
+    :param status_code: Статус ответа.
+    :return: Ответ с JSON-телом.
+    """
+    result = Response(
+        content=content if isinstance(content, bytes) else dumps(content),
+        status_code=status_code,
+        media_type=JSON_MEDIA_TYPE
+    )
+    if response is not None:
+        # Сырые заголовки: повторяющиеся (Set-Cookie, Link)
+        # переносятся все, а не только последний
+        result.raw_headers.extend(
+            (name, value) for name, value in response.headers.raw
+            if name not in BODY_HEADERS
+        )
+    return result
@@ -0,0 +1,287 @@
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import (
+    Date,
+    FromClause,
+    Insert,
+    Integer,
+    Select,
+    Subquery,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.timestamps import utc_now
+from app.enums.streaks import StreakKindEnum
+from app.models.stats import UserStreak
+from app.models.user import User, UserAchievement
+from app.services.windows import StatsWindow, window_days
+
+
+STREAK_COLUMNS = [
+    "user_id",
+    "current_streak",
+    "longest_streak",
+    "current_start",
+    "last_award_date",
+]
+
+
+def streak_upsert(source: Select) -> Insert:
+    """
+    Строит upsert серий пользователей по дню новой выдачи.
+
+    Выдача в день последней выдачи серию не меняет, на следующий
+    день - продлевает, позже - начинает новую серию. Выдача задним
+    числом (раньше последнего дня) серию не меняет: такие выдачи
+    пересчитываются через refresh_user_streaks.
+    :param source: SELECT с колонками user_id и award_date,
+    не более одной строки на пользователя.
+    :return: INSERT ... ON CONFLICT DO UPDATE для user_streaks.
+    """
+    rows = source.subquery("award_days")
+    stmt = pg_insert(UserStreak).from_select(
+        STREAK_COLUMNS,
+        select(
+            rows.c.user_id,
+            literal(1),
+            literal(1),
+            rows.c.award_date,
+            rows.c.award_date,
+        )
+    )
+    award_date = stmt.excluded.last_award_date
+    next_day = award_date == UserStreak.last_award_date + 1
+    later = award_date > UserStreak.last_award_date + 1
+    current = case(
+        (next_day, UserStreak.current_streak + 1),
+        (later, 1),
+        else_=UserStreak.current_streak
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStreak.user_id],
+        set_={
+            "current_streak": current,
+            "longest_streak": func.greatest(UserStreak.longest_streak,
+                                            current),
+            "current_start": case(
+                (later, award_date),
+                else_=UserStreak.current_start
+            ),
+            "last_award_date": func.greatest(UserStreak.last_award_date,
+                                             award_date),
+        }
+    )
+
+
+def streak_rows(days: Subquery) -> Select:
+    """
+    Последняя серия каждого пользователя и самая длинная по дням
+    выдачи.
+    :param days: Подзапрос с колонками user_id и day (без повторов).
+    :return: SELECT с колонками user_id, length, longest, start
+    и last_day, одна строка на пользователя.
+    """
+    # Дни одной серии дают одинаковую разность "день - номер дня"
+    islands = select(
+        days.c.user_id,
+        days.c.day,
+        (
+            days.c.day
+            - func.row_number().over(
+                partition_by=days.c.user_id,
+                order_by=days.c.day
+            ).cast(Integer)
+        ).label("island")
+    ).subquery("islands")
+
+    runs = select(
+        islands.c.user_id,
+        func.count().label("length"),
+        func.min(islands.c.day).label("start"),
+        func.max(islands.c.day).label("last_day"),
+    ).group_by(islands.c.user_id, islands.c.island).subquery("runs")
+
+    ranked = select(
+        runs.c.user_id,
+        runs.c.length,
+        runs.c.start,
+        runs.c.last_day,
+        func.max(runs.c.length).over(
+            partition_by=runs.c.user_id
+        ).label("longest"),
+        func.row_number().over(
+            partition_by=runs.c.user_id,
+            order_by=runs.c.last_day.desc()
+        ).label("position"),
+    ).subquery("ranked")
+
+    # Последняя серия пользователя и самая длинная за историю
+    return select(
+        ranked.c.user_id,
+        ranked.c.length,
+        ranked.c.longest,
+        ranked.c.start,
+        ranked.c.last_day,
+    ).where(ranked.c.position == 1)
+
+
+def refresh_user_streaks(
+        db: Session,
+        user_ids: Optional[Iterable[int]] = None
+):
+    """
+    Пересчитывает серии по истории выдачи достижений (backfill).
+    Выполняется в текущей транзакции, коммит - на вызывающей стороне.
+    :param db: Сессия базы данных.
+    :param user_ids: Пользователи для пересчета (None - все).
+    """
+    days = select(
+        UserAchievement.user_id,
+        func.date(UserAchievement.issued_at).label("day")
+    ).distinct()
+    if user_ids is not None:
+        days = days.where(
+            UserAchievement.user_id == func.any(
+                literal(list(user_ids), ARRAY(Integer))
+            )
+        )
+    days = days.subquery("days")
+
+    source = streak_rows(days)
+
+    if user_ids is None:
+        db.execute(delete(UserStreak))
+        db.execute(insert(UserStreak).from_select(STREAK_COLUMNS, source))
+        return
+
+    stmt = pg_insert(UserStreak).from_select(STREAK_COLUMNS, source)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserStreak.user_id],
+            set_={
+                name: stmt.excluded[name]
+                for name in STREAK_COLUMNS[1:]
+            }
+        )
+    )
+
+
+def window_streaks(window: StatsWindow) -> Subquery:
+    """
+    Серии пользователей по дням выдачи внутри окна в форме
+    user_streaks.
+    :param window: Окно статистики.
+    :return: Подзапрос с колонками user_id, current_streak,
+    longest_streak и last_award_date.
+    """
+    rows = streak_rows(window_days(window)).subquery("window_runs")
+    return select(
+        rows.c.user_id,
+        rows.c.length.label("current_streak"),
+        rows.c.longest.label("longest_streak"),
+        rows.c.last_day.label("last_award_date"),
+    ).subquery("window_streaks")
+
+
+def streak_length(
+        kind: StreakKindEnum,
+        source: Optional[FromClause] = None,
+        reference: Optional[date] = None
+):
+    """
+    Выражение длины серии указанного вида.
+    Текущая серия считается прерванной, если последняя выдача
+    была раньше дня накануне опорного.
+    :param kind: Вид серии: текущая или самая длинная.
+    :param source: Таблица или подзапрос с колонками user_streaks
+    (None - user_streaks).
+    :param reference: Опорный день (None - сегодняшний).
+    """
+    if source is None:
+        source = UserStreak.__table__
+    if kind == StreakKindEnum.LONGEST:
+        return source.c.longest_streak
+    # Сегодняшний день по UTC, как и день выдачи в user_streaks:
+    # current_date зависит от часового пояса сессии
+    if reference is None:
+        reference = utc_now().date()
+    day = literal(reference, Date)
+    return case(
+        (source.c.last_award_date >= day - 1, source.c.current_streak),
+        else_=0
+    )
+
+
+def get_streaks(
+        db: Session,
+        kind: StreakKindEnum = StreakKindEnum.CURRENT,
+        min_days: int = 1,
+        limit: int = 100,
+        window: Optional[StatsWindow] = None
+) -> list[dict]:
+    """
+    Рейтинг пользователей по длине серии.
+    Читает готовые серии из user_streaks без обхода истории выдачи.
+    Для окна серии считаются по дням выдачи внутри окна (из дневных
+    агрегатов), текущая - относительно последнего дня окна.
+    :param db: Сессия базы данных.
+    :param kind: Вид серии: текущая или самая длинная.
+    :param min_days: Минимальная длина серии в днях.
+    :param limit: Максимальное количество пользователей.
+    :param window: Окно статистики (None - за все время).
+    :return: Список словарей с местом в рейтинге, пользователем
+    и его сериями.
+    """
+    if window is None:
+        source, reference = UserStreak.__table__, None
+    else:
+        source, reference = window_streaks(window), window.last_day()
+    current = streak_length(StreakKindEnum.CURRENT, source, reference)
+    streak = streak_length(kind, source, reference)
+    # Фильтр по колонке, а не по выражению, чтобы работал индекс
+    filters = [
+        source.c.longest_streak >= min_days
+        if kind == StreakKindEnum.LONGEST
+        else source.c.current_streak >= min_days,
+        streak >= min_days,
+    ]
+
+    rows = db.execute(
+        select(
+            func.dense_rank().over(order_by=streak.desc()).label("rank"),
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            current.label("current_streak"),
+            source.c.longest_streak,
+            source.c.last_award_date,
+        )
+        .join(User, User.id == source.c.user_id)
+        .where(*filters)
+        .order_by(streak.desc(), source.c.user_id)
+        .limit(limit)
+    ).all()
+
+    return [dict(row._mapping) for row in rows]
+
+
+def backfill():
+    """
+    Полный пересчет серий всех пользователей (make backfill-streaks).
+    """
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        refresh_user_streaks(db)
+        db.commit()
+
+
+if __name__ == "__main__":
+    backfill()
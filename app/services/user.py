@@ -1,12 +1,60 @@
+from datetime import datetime
+from typing import Optional
+
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Select,
+    and_,
+    column,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
 from starlette import status
 
+from app.core.config import settings
+from app.core.timestamps import naive_utc, utc_now
+from app.enums.batch_errors import BatchErrorEnum
+from app.enums.languages import LanguageEnum
+from app.enums.response_modes import ResponseModeEnum
 from app.models.achievement import Achievement
 from app.models.user import User
 from app.schemas.user_schemas import UserCreate
-from app.schemas.user_schemas import UserAchievementCreate
-from app.models.user import UserAchievement
+from app.schemas.user_schemas import (
+    UserAchievementBatch,
+    UserAchievementCreate,
+)
+from app.models.stats import UserStats
+from app.models.user import UserAchievement, UserAchievementClaim
+from app.services.catalog import catalog
+from app.services.live_leaderboard import (
+    points_board,
+    points_notify_clause,
+)
+from app.services.localization import localized_columns
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    Page,
+    decode_cursor,
+    decode_time,
+    encode_time,
+    paginate,
+)
+from app.services.streaks import refresh_user_streaks, streak_upsert
+from app.services.user_stats import daily_stats_upsert, stats_upsert
+from app.services.versions import (
+    bump_data_version,
+    data_version,
+    version_bump,
+)
 
 
 def create_user(
@@ -20,112 +68,573 @@ def create_user(
     return db_user
 
 
-def get_users(db: Session):
-    return db.query(User).all()
+def create_users_bulk(
+        db: Session,
+        users: list[dict]
+):
+    """
+    Вставка пакета пользователей одной транзакцией.
+    :param db: Сессия базы данных.
+    :param users: Данные пользователей (поля схемы UserCreate).
+    """
+    for user in users:
+        user["language"] = user["language"] or LanguageEnum.EN.value
+    db.execute(insert(User), users)
+    db.commit()
+
+
+def get_users(
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_LIMIT
+) -> Page:
+    """
+    Страница пользователей в порядке идентификаторов.
+    Строки сразу имеют форму схемы User.
+    :param db: Сессия базы данных.
+    :param cursor: Курсор страницы (None - первая страница).
+    :param limit: Размер страницы.
+    :return: Страница пользователей.
+    """
+    after = decode_cursor(cursor, 1)
+    query = select(User.name, User.language, User.id).order_by(User.id)
+    if after is not None:
+        query = query.where(User.id > after[0])
+    query = query.limit(limit + 1)
+
+    rows = db.execute(query).all()
+    return paginate(
+        [dict(row._mapping) for row in rows],
+        limit,
+        key=lambda user: (user["id"],)
+    )
+
+
+def issue_statement(
+        user_id: int,
+        achievement_id: int,
+        issued_at: datetime
+) -> Select:
+    """
+    Строит единый запрос выдачи достижения.
+
+    Проверка пользователя и достижения, закрепление выдачи
+    в user_achievement_claims с ON CONFLICT DO NOTHING, вставка
+    в историю, обновление user_stats, user_daily_stats, user_streaks
+    и версии данных выполняются одним выражением с CTE,
+    поэтому выдача занимает один round trip и не подвержена гонке
+    между проверкой и вставкой.
+    :param user_id: Идентификатор пользователя.
+    :param achievement_id: Идентификатор достижения.
+    :param issued_at: Время выдачи.
+    :return: SELECT, возвращающий одну строку с колонками
+    user_language (NULL - пользователь не найден), полями достижения
+    id, points, name и description на языке пользователя
+    (NULL - достижение не найдено),
+    user_achievement_id (NULL - достижение уже было выдано),
+    issued_at, total_points (новая сумма очков пользователя)
+    и data_version (новая версия данных при выдаче).
+    """
+    target_user = (
+        select(User.id, User.language)
+        .where(User.id == user_id)
+        .cte("target_user")
+    )
+    target_achievement = (
+        select(
+            Achievement.id,
+            Achievement.points,
+            Achievement.name_en,
+            Achievement.name_ru,
+            Achievement.description_en,
+            Achievement.description_ru,
+        )
+        .where(Achievement.id == achievement_id)
+        .cte("target_achievement")
+    )
+
+    # Секционированная история выдачи не хранит уникальность пары
+    # (пользователь, достижение): выдачу закрепляет вставка в claims
+    claimed = (
+        pg_insert(UserAchievementClaim)
+        .from_select(
+            ["user_id", "achievement_id"],
+            select(
+                target_user.c.id,
+                target_achievement.c.id,
+            ).select_from(target_user.join(target_achievement, true()))
+        )
+        .on_conflict_do_nothing(
+            index_elements=["user_id", "achievement_id"]
+        )
+        .returning(
+            UserAchievementClaim.user_id,
+            UserAchievementClaim.achievement_id,
+        )
+        .cte("claimed")
+    )
+
+    inserted = (
+        insert(UserAchievement)
+        .from_select(
+            ["user_id", "achievement_id", "issued_at"],
+            select(
+                claimed.c.user_id,
+                claimed.c.achievement_id,
+                literal(issued_at, DateTime),
+            )
+        )
+        .returning(
+            UserAchievement.id,
+            UserAchievement.user_id,
+            UserAchievement.issued_at,
+        )
+        .cte("inserted")
+    )
+
+    stats = stats_upsert(
+        select(
+            inserted.c.user_id,
+            literal(1),
+            target_achievement.c.points,
+            inserted.c.issued_at,
+        ).select_from(inserted.join(target_achievement, true()))
+    ).returning(UserStats.user_id, UserStats.total_points).cte("stats")
+
+    points = stats
+    if settings.leaderboard_memory:
+        # Новая сумма очков - рейтингам в памяти других воркеров
+        points = select(
+            stats.c.total_points,
+            points_notify_clause(stats.c.user_id,
+                                 stats.c.total_points).label("notified"),
+        ).cte("points_notify")
+
+    daily = daily_stats_upsert(
+        select(
+            func.date(inserted.c.issued_at),
+            inserted.c.user_id,
+            literal(1),
+            target_achievement.c.points,
+        ).select_from(inserted.join(target_achievement, true()))
+    ).cte("daily")
+
+    streaks = streak_upsert(
+        select(
+            inserted.c.user_id,
+            func.date(inserted.c.issued_at).label("award_date"),
+        )
+    ).cte("streaks")
+
+    bump = version_bump(when=exists(select(inserted.c.id)))
+
+    # Однострочная основа гарантирует ровно одну строку результата,
+    # даже если не найдены ни пользователь, ни достижение
+    probe = select(literal(1).label("one")).subquery("probe")
+    return (
+        select(
+            target_user.c.language.label("user_language"),
+            target_achievement.c.id,
+            target_achievement.c.points,
+            # Из базы передаются только поля языка пользователя
+            *localized_columns(target_achievement,
+                               target_user.c.language),
+            inserted.c.id.label("user_achievement_id"),
+            inserted.c.issued_at,
+            points.c.total_points,
+            bump.c.version.label("data_version"),
+        )
+        .select_from(
+            probe
+            .outerjoin(target_user, true())
+            .outerjoin(target_achievement, true())
+            .outerjoin(inserted, true())
+            .outerjoin(points, true())
+            .outerjoin(bump, true())
+        )
+        # CTE изменения данных выполняются, даже если на них
+        # нет ссылок в основном запросе
+        .add_cte(daily, streaks)
+    )
+
+
+def localize_achievement(achievement, issued_at: datetime) -> dict:
+    """
+    Формирует представление выданного достижения.
+    :param achievement: Строка с полями id, points и локализованными
+    name и description (см. localized_columns).
+    :param issued_at: Время выдачи.
+    :return: Словарь в формате AchievementOut.
+    """
+    return {
+        "id": achievement.id,
+        "name": achievement.name,
+        "description": achievement.description,
+        "points": achievement.points,
+        "issued_at": issued_at
+    }
+
+
+def localize_history(db: Session, language: str, rows: list) -> list[dict]:
+    """
+    Локализует записи истории выдачи через кэш каталога достижений.
+    :param db: Сессия базы данных.
+    :param language: Язык пользователя.
+    :param rows: Строки с полями achievement_id и issued_at.
+    :return: Список словарей в формате AchievementOut.
+    """
+    views = catalog.localized(
+        db,
+        language,
+        {row.achievement_id for row in rows}
+    )
+    return [
+        {**views[row.achievement_id], "issued_at": row.issued_at}
+        for row in rows
+    ]
 
 
 def issue_achievement(
-        user_id,
         db: Session,
-        user_achievement: UserAchievementCreate
+        user_id: int,
+        user_achievement: UserAchievementCreate,
+        response_mode: ResponseModeEnum = ResponseModeEnum.FULL,
+        recent_limit: int = 10
 ):
-    # Проверяем, существует ли пользователь
-    user = db.query(User).filter(User.id == user_id).first()
+    """
+    Выдача достижения пользователю.
+    :param db: Сессия базы данных.
+    :param user_id: Идентификатор пользователя.
+    :param user_achievement: Данные о выдаваемом достижении.
+    :param response_mode: Что вернуть в ответе: всю историю,
+    только выданное достижение или последние recent_limit достижений.
+    :param recent_limit: Размер страницы для режима RECENT.
+    :return: Словарь в формате UserAchievementsOut.
+    """
+    issued = db.execute(
+        issue_statement(
+            user_id=user_id,
+            achievement_id=user_achievement.achievement_id,
+            issued_at=utc_now()
+        )
+    ).one()
 
-    if not user:
+    if issued.user_language is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # Проверяем, не было ли уже выдано это достижение пользователю
-    existing_achievement = db.query(UserAchievement).filter(
-        UserAchievement.user_id == user_id,
-        UserAchievement.achievement_id == user_achievement.achievement_id
-    ).first()
+    if issued.id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Achievement not found"
+        )
 
-    if existing_achievement:
+    if issued.user_achievement_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Achievement already awarded"
         )
 
-    # Создание нового достижения для пользователя
-    db_user_achievement = UserAchievement(
-        **user_achievement.model_dump(),
-        user_id=user_id
-    )
-    db.add(db_user_achievement)
     db.commit()
-    db.refresh(db_user_achievement)
+    data_version.advance(issued.data_version)
+    points_board.update(user_id, issued.total_points)
+    language = issued.user_language
 
-    # Получаем все достижения пользователя с их локализованными данными
-    user_achievements = (
-        db.query(UserAchievement)
-        .join(Achievement)
+    if response_mode == ResponseModeEnum.MINIMAL:
+        # Все данные уже получены запросом выдачи
+        return {
+            "user_id": user_id,
+            "achievements": [
+                localize_achievement(issued, issued.issued_at)
+            ],
+        }
+
+    # История читается без join: поля достижений берутся
+    # из локализованного кэша каталога
+    query = (
+        db.query(UserAchievement.achievement_id, UserAchievement.issued_at)
         .filter(UserAchievement.user_id == user_id)
-        # Оптимизация запроса для подгрузки достижений
-        .options(joinedload(UserAchievement.achievement))
-        .all()
     )
+    if response_mode == ResponseModeEnum.RECENT:
+        # Пакетная выдача может выдать достижение задним числом,
+        # поэтому последние - по времени выдачи, а не по id
+        query = query.order_by(
+            UserAchievement.issued_at.desc(),
+            UserAchievement.id.desc()
+        ).limit(recent_limit)
+
+    return {
+        "user_id": user_id,
+        "achievements": localize_history(db, language, query.all()),
+    }
+
+
+def issue_achievements_batch(
+        db: Session,
+        batch: UserAchievementBatch
+) -> dict:
+    """
+    Пакетная выдача достижений одним запросом.
+
+    Элементы передаются массивами и разворачиваются через unnest,
+    выдачи закрепляются одним INSERT ... ON CONFLICT DO NOTHING
+    в user_achievement_claims, история - одним многострочным INSERT,
+    а user_stats обновляется одним upsert по сгруппированному приросту.
+    Серии пользователей, получивших достижения, пересчитываются
+    в той же транзакции.
+    В ответ возвращаются только элементы, которые не были выданы.
+    :param db: Сессия базы данных.
+    :param batch: Пакет элементов (user_id, achievement_id, issued_at).
+    :return: Словарь в формате UserAchievementBatchResult.
+    """
+    now = utc_now()
+    errors = []
+    seen = set()
+    user_ids, achievement_ids, issued_ats, indexes = [], [], [], []
 
-    achievements = []
-    for ua in user_achievements:
-        achievement = ua.achievement
-        achievements.append({
-            "id": achievement.id,
-            "name": getattr(achievement,
-                            f"name_{user.language}",
-                            achievement.name_en),  # Локализация имени
-            "points": achievement.points,
-            "description": getattr(
-                achievement,
-                f"description_{user.language}",
-                achievement.description_en),  # Локализация описания
-            "issued_at": ua.issued_at
-        })
-
-    return {"user_id": user_id, "achievements": achievements}
+    for index, item in enumerate(batch.items):
+        key = (item.user_id, item.achievement_id)
+        # Повтор внутри пакета - то же, что повторная выдача
+        if key in seen:
+            errors.append({"index": index,
+                           "reason": BatchErrorEnum.ALREADY_AWARDED})
+            continue
+        seen.add(key)
+        # issued_at хранится в UTC без часового пояса: привязка
+        # времени с поясом зависела бы от TimeZone сессии
+        issued_at = naive_utc(item.issued_at) or now
+        user_ids.append(item.user_id)
+        achievement_ids.append(item.achievement_id)
+        issued_ats.append(issued_at)
+        indexes.append(index)
+
+    rows = func.unnest(
+        literal(user_ids, ARRAY(Integer)),
+        literal(achievement_ids, ARRAY(Integer)),
+        literal(issued_ats, ARRAY(DateTime)),
+        literal(indexes, ARRAY(Integer)),
+    ).table_valued(
+        column("user_id", Integer),
+        column("achievement_id", Integer),
+        column("issued_at", DateTime),
+        column("idx", Integer),
+    ).render_derived(name="batch_rows")
+    items = select(rows).cte("items")
+
+    claimed = (
+        pg_insert(UserAchievementClaim)
+        .from_select(
+            ["user_id", "achievement_id"],
+            select(items.c.user_id, items.c.achievement_id)
+            .select_from(
+                items
+                .join(User, User.id == items.c.user_id)
+                .join(Achievement, Achievement.id == items.c.achievement_id)
+            )
+        )
+        .on_conflict_do_nothing(
+            index_elements=["user_id", "achievement_id"]
+        )
+        .returning(
+            UserAchievementClaim.user_id,
+            UserAchievementClaim.achievement_id,
+        )
+        .cte("claimed")
+    )
+
+    inserted = (
+        insert(UserAchievement)
+        .from_select(
+            ["user_id", "achievement_id", "issued_at"],
+            select(items.c.user_id,
+                   items.c.achievement_id,
+                   items.c.issued_at)
+            .select_from(
+                items.join(
+                    claimed,
+                    and_(claimed.c.user_id == items.c.user_id,
+                         claimed.c.achievement_id == items.c.achievement_id)
+                )
+            )
+            .order_by(items.c.idx)
+        )
+        .returning(
+            UserAchievement.user_id,
+            UserAchievement.achievement_id,
+            UserAchievement.issued_at,
+        )
+        .cte("inserted")
+    )
+
+    stats = stats_upsert(
+        select(
+            inserted.c.user_id,
+            func.count(),
+            func.sum(Achievement.points),
+            func.max(inserted.c.issued_at),
+        )
+        .select_from(
+            inserted.join(Achievement,
+                          Achievement.id == inserted.c.achievement_id)
+        )
+        .group_by(inserted.c.user_id)
+    ).cte("stats")
+
+    award_day = func.date(inserted.c.issued_at)
+    daily = daily_stats_upsert(
+        select(
+            award_day,
+            inserted.c.user_id,
+            func.count(),
+            func.sum(Achievement.points),
+        )
+        .select_from(
+            inserted.join(Achievement,
+                          Achievement.id == inserted.c.achievement_id)
+        )
+        .group_by(award_day, inserted.c.user_id)
+    ).cte("daily")
+
+    rejected = db.execute(
+        select(
+            items.c.idx,
+            User.id.label("user_id"),
+            Achievement.id.label("achievement_id"),
+        )
+        .select_from(
+            items
+            .outerjoin(User, User.id == items.c.user_id)
+            .outerjoin(Achievement, Achievement.id == items.c.achievement_id)
+            .outerjoin(
+                inserted,
+                and_(inserted.c.user_id == items.c.user_id,
+                     inserted.c.achievement_id == items.c.achievement_id)
+            )
+        )
+        .where(inserted.c.user_id.is_(None))
+        .add_cte(stats, daily)
+    ).all()
+
+    # Элементы пакета могут быть выданы задним числом и в любом
+    # порядке, поэтому серии затронутых пользователей пересчитываются
+    rejected_indexes = {row.idx for row in rejected}
+    issued_users = {
+        user_id
+        for user_id, index in zip(user_ids, indexes)
+        if index not in rejected_indexes
+    }
+    version = None
+    totals = []
+    if issued_users:
+        refresh_user_streaks(db, issued_users)
+        version = bump_data_version(db)
+        if settings.leaderboard_memory:
+            totals = db.execute(
+                select(
+                    UserStats.user_id,
+                    UserStats.total_points,
+                    points_notify_clause(UserStats.user_id,
+                                         UserStats.total_points),
+                ).where(UserStats.user_id.in_(issued_users))
+            ).all()
+    db.commit()
+    data_version.advance(version)
+    points_board.update_many(row[:2] for row in totals)
+
+    for row in rejected:
+        if row.user_id is None:
+            reason = BatchErrorEnum.USER_NOT_FOUND
+        elif row.achievement_id is None:
+            reason = BatchErrorEnum.ACHIEVEMENT_NOT_FOUND
+        else:
+            reason = BatchErrorEnum.ALREADY_AWARDED
+        errors.append({"index": row.idx, "reason": reason})
+
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "inserted": len(batch.items) - len(errors),
+        "errors": errors,
+    }
+
+
+def get_history_marker(db: Session, user_id: int) -> Optional[tuple]:
+    """
+    Маркер версии истории достижений пользователя для ETag.
+    Читается из users и user_stats по первичному ключу: количество
+    и время последней выдачи меняются при каждой выдаче.
+    :param db: Сессия базы данных.
+    :param user_id: Идентификатор пользователя.
+    :return: Кортеж маркера или None, если пользователь не найден.
+    """
+    row = db.execute(
+        select(
+            User.language,
+            UserStats.achievement_count,
+            UserStats.last_issued_at,
+        )
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .where(User.id == user_id)
+    ).one_or_none()
+    return None if row is None else tuple(row)
 
 
 def get_user_achievements(
+        db: Session,
         user_id: int,
-        db: Session
-):
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_LIMIT
+) -> Page:
+    """
+    Страница истории достижений пользователя в порядке выдачи
+    (issued_at, id). Выборка идет по индексу (user_id, issued_at, id)
+    с продолжением от курсора; секции месяцев раньше курсора
+    отсекаются условием на issued_at.
+    :param db: Сессия базы данных.
+    :param user_id: Идентификатор пользователя.
+    :param cursor: Курсор страницы (None - первая страница).
+    :param limit: Размер страницы.
+    :return: Страница с объектом UserAchievementsOut.
+    """
+    after = decode_cursor(cursor, 2)
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_achievements = (
+    query = (
         db.query(
             UserAchievement.id,
-            Achievement.id.label("achievement_id"),
-            Achievement.name_en,
-            Achievement.name_ru,
-            Achievement.points,
-            Achievement.description_en,
-            Achievement.description_ru,
+            UserAchievement.achievement_id,
             UserAchievement.issued_at
         )
-        .join(Achievement, UserAchievement.achievement_id == Achievement.id)
         .filter(UserAchievement.user_id == user_id)
-        .all()
+    )
+    if after is not None:
+        issued_at = decode_time(after[0])
+        query = query.filter(
+            # Отдельное условие на ключ секционирования: сравнение
+            # кортежей не отсекает секции
+            UserAchievement.issued_at >= issued_at,
+            tuple_(UserAchievement.issued_at, UserAchievement.id)
+            > tuple_(literal(issued_at, DateTime), after[1])
+        )
+    query = (
+        query.order_by(UserAchievement.issued_at, UserAchievement.id)
+        .limit(limit + 1)
     )
 
-    achievements = [
-        {
-            "id": row.achievement_id,
-            "name": getattr(row, f"name_{user.language}", row.name_en),
-            "description":  getattr(row,
-                                    f"description_{user.language}",
-                                    row.description_en),
-            "points":  row.points,
-            "issued_at": row.issued_at,
-        }
-        for row in user_achievements
-    ]
+    page = paginate(
+        query.all(),
+        limit,
+        key=lambda row: (encode_time(row.issued_at), row.id)
+    )
 
-    return {
-        "user_id": user.id,
-        "achievements": achievements
-    }
+    return Page(
+        {
+            "user_id": user.id,
+            "achievements": localize_history(db, user.language, page.items)
+        },
+        page.next_cursor
+    )
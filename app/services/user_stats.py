@@ -0,0 +1,105 @@
+from sqlalchemy import Insert, Select, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.achievement import Achievement
+from app.models.stats import UserDailyStats, UserStats
+from app.models.user import UserAchievement
+
+
+def stats_upsert(source: Select) -> Insert:
+    """
+    Строит upsert агрегатов пользователей по приросту.
+    Выполняется в той же транзакции, что и выдача достижений,
+    поэтому агрегаты фиксируются вместе с самой выдачей.
+    :param source: SELECT, возвращающий колонки user_id,
+    achievement_count, total_points и last_issued_at прироста.
+    :return: INSERT ... ON CONFLICT DO UPDATE для user_stats.
+    """
+    stmt = pg_insert(UserStats).from_select(
+        ["user_id", "achievement_count", "total_points", "last_issued_at"],
+        source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "achievement_count": (
+                UserStats.achievement_count
+                + stmt.excluded.achievement_count
+            ),
+            "total_points": (
+                UserStats.total_points + stmt.excluded.total_points
+            ),
+            "last_issued_at": func.greatest(
+                UserStats.last_issued_at,
+                stmt.excluded.last_issued_at
+            ),
+        }
+    )
+
+
+def daily_stats_upsert(source: Select) -> Insert:
+    """
+    Строит upsert дневных агрегатов пользователей по приросту.
+    :param source: SELECT, возвращающий колонки day, user_id,
+    achievement_count и total_points прироста (не более одной строки
+    на день и пользователя).
+    :return: INSERT ... ON CONFLICT DO UPDATE для user_daily_stats.
+    """
+    stmt = pg_insert(UserDailyStats).from_select(
+        ["day", "user_id", "achievement_count", "total_points"],
+        source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDailyStats.day, UserDailyStats.user_id],
+        set_={
+            "achievement_count": (
+                UserDailyStats.achievement_count
+                + stmt.excluded.achievement_count
+            ),
+            "total_points": (
+                UserDailyStats.total_points + stmt.excluded.total_points
+            ),
+        }
+    )
+
+
+def refresh_user_stats(db: Session):
+    """
+    Полностью пересчитывает агрегаты пользователей (в том числе
+    дневные) по истории выдачи достижений (backfill).
+    :param db: Сессия базы данных.
+    """
+    db.execute(delete(UserStats))
+    db.execute(
+        insert(UserStats).from_select(
+            ["user_id", "achievement_count",
+             "total_points", "last_issued_at"],
+            select(
+                UserAchievement.user_id,
+                func.count(UserAchievement.id),
+                func.sum(Achievement.points),
+                func.max(UserAchievement.issued_at),
+            )
+            .join(Achievement,
+                  UserAchievement.achievement_id == Achievement.id)
+            .group_by(UserAchievement.user_id)
+        )
+    )
+    day = func.date(UserAchievement.issued_at)
+    db.execute(delete(UserDailyStats))
+    db.execute(
+        insert(UserDailyStats).from_select(
+            ["day", "user_id", "achievement_count", "total_points"],
+            select(
+                day,
+                UserAchievement.user_id,
+                func.count(UserAchievement.id),
+                func.sum(Achievement.points),
+            )
+            .join(Achievement,
+                  UserAchievement.achievement_id == Achievement.id)
+            .group_by(day, UserAchievement.user_id)
+        )
+    )
+    db.commit()
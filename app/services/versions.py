@@ -0,0 +1,99 @@
+import threading
+from typing import Optional
+
+from sqlalchemy import CTE, select, text
+from sqlalchemy.orm import Session
+
+from app.db.notify import listener, notify_clause
+from app.models.stats import data_version_seq
+
+# Канал уведомлений о новой версии данных
+DATA_VERSION_CHANNEL = "data_version"
+
+
+class DataVersion:
+    """
+    Версия данных о выдаче достижений в памяти процесса.
+
+    Значение берется из последовательности data_version_seq, поэтому
+    у всех воркеров (и у общего кэша) одна нумерация версий. Воркер,
+    выдавший достижение, продвигает версию после коммита, остальные -
+    по уведомлению LISTEN/NOTIFY с номером новой версии.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def advance(self, value: Optional[int]):
+        if value is None:
+            return
+        with self._lock:
+            if value > self._value:
+                self._value = value
+
+    def sync(self):
+        """
+        Читает текущую версию из последовательности (при старте
+        и после переподключения слушателя уведомлений).
+        """
+        from app.db.session import engine
+
+        with engine.connect() as conn:
+            last_value, is_called = conn.execute(
+                text(f"SELECT last_value, is_called "
+                     f"FROM {data_version_seq.name}")
+            ).one()
+        self.advance(last_value if is_called else 0)
+
+    def known(self) -> Optional[int]:
+        """
+        Версия, если она гарантированно актуальна (слушатель
+        уведомлений подключен), иначе None.
+        """
+        return self._value if listener.connected else None
+
+    def on_notify(self, payload: Optional[str]):
+        if payload is None:
+            self.sync()
+        else:
+            self.advance(int(payload))
+
+
+def version_bump(when=None) -> CTE:
+    """
+    CTE, получающий следующую версию данных и рассылающий ее
+    другим воркерам (уведомление уходит после коммита).
+    :param when: Условие: версия увеличивается, только если оно
+    выполнено (например, если вставка вернула строки).
+    :return: CTE с колонками version и notified.
+    """
+    next_version = select(data_version_seq.next_value().label("version"))
+    if when is not None:
+        next_version = next_version.where(when)
+    next_version = next_version.cte("next_version")
+    # Функции с побочными эффектами в CTE выполняются один раз
+    return select(
+        next_version.c.version,
+        notify_clause(DATA_VERSION_CHANNEL,
+                      next_version.c.version).label("notified"),
+    ).cte("version_bump")
+
+
+def bump_data_version(db: Session) -> int:
+    """
+    Увеличивает версию данных в текущей транзакции.
+    После коммита результат передается в data_version.advance.
+    :param db: Сессия базы данных.
+    :return: Новая версия.
+    """
+    return db.execute(select(version_bump().c.version)).scalar_one()
+
+
+# Версия данных процесса
+data_version = DataVersion()
+listener.subscribe(DATA_VERSION_CHANNEL, data_version.on_notify)
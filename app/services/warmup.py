@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db import session
+from app.db.utils import init_db
+from app.services.catalog import catalog
+from app.services.live_leaderboard import points_board
+from app.services.versions import data_version
+
+
+logger = logging.getLogger(__name__)
+
+# Момент импорта приложения - начало отсчета времени старта
+PROCESS_STARTED = time.perf_counter()
+
+startup_seconds = registry.gauge(
+    "app_startup_seconds",
+    "Time from application import until warm-up finished"
+)
+ready_gauge = registry.gauge(
+    "app_ready",
+    "1 once warm-up finished and the worker accepts traffic"
+)
+
+
+class StartupState:
+    """
+    Состояние прогрева воркера для эндпоинта готовности.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: dict[str, float] = {}
+        self.startup_s: Optional[float] = None
+
+    async def step(self, name: str, fn: Callable[[], Awaitable]):
+        """
+        Выполняет шаг прогрева, повторяя его при ошибке с растущей
+        задержкой, пока он не завершится успешно (например, пока
+        не станет доступна база). Длительность шага - с первой попытки.
+        """
+        start = time.perf_counter()
+        delay = settings.warm_up_retry_delay
+        while True:
+            try:
+                await fn()
+                break
+            except Exception as error:
+                self.error = f"{name}: {error}"
+                logger.exception("Warm-up step %s failed, retry in %.1fs",
+                                 name, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.warm_up_retry_max_delay)
+        self.error = None
+        self.steps[name] = round(time.perf_counter() - start, 4)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else (
+                "retrying" if self.error else "starting"
+            ),
+            "startup_s": self.startup_s,
+            "steps": self.steps,
+            "error": self.error,
+        }
+
+
+def _seed():
+    with session.SessionLocal() as db:
+        init_db(db)
+
+
+def _prefill_sync_pool():
+    # Закрытые соединения возвращаются в пул и остаются открытыми
+    connections = [session.engine.connect()
+                   for _ in range(settings.db_pool_size)]
+    for connection in connections:
+        connection.close()
+
+
+async def prefill_pool():
+    """
+    Открывает pool_size соединений заранее, чтобы первые запросы
+    не ждали установки соединений. С NullPool (PgBouncer) пропускается.
+    """
+    if session.async_engine is not None:
+        engine = session.async_engine
+        if not isinstance(engine.sync_engine.pool, QueuePool):
+            return
+        connections = await asyncio.gather(
+            *(engine.connect() for _ in range(settings.db_pool_size))
+        )
+        for connection in connections:
+            await connection.close()
+        return
+    if isinstance(session.engine.pool, QueuePool):
+        await run_in_threadpool(_prefill_sync_pool)
+
+
+async def prefill_catalog():
+    def load():
+        with session.SessionLocal() as db:
+            catalog.get(db)
+
+    await run_in_threadpool(load)
+
+
+async def build_leaderboard():
+    def build():
+        with session.SessionLocal() as db:
+            points_board.build(db)
+
+    await run_in_threadpool(build)
+
+
+async def warm_up(state: StartupState):
+    """
+    Прогрев воркера после старта: (по SEED_ON_STARTUP) заполнение
+    пустой базы, версия данных, соединения пула, кэш каталога
+    и (по LEADERBOARD_MEMORY) рейтинг в памяти. Секции истории
+    выдачи прогрев не создает (make partitions и фоновая задача
+    maintain_partitions_periodically).
+    Шаги с ошибкой повторяются до успеха, до окончания прогрева
+    эндпоинт готовности отвечает 503.
+    :param state: Состояние прогрева.
+    """
+    if settings.seed_on_startup:
+        await state.step("seed", lambda: run_in_threadpool(_seed))
+    await state.step("data_version",
+                     lambda: run_in_threadpool(data_version.sync))
+    await state.step("pool", prefill_pool)
+    await state.step("catalog", prefill_catalog)
+    if settings.leaderboard_memory:
+        await state.step("leaderboard", build_leaderboard)
+    state.startup_s = round(time.perf_counter() - PROCESS_STARTED, 4)
+    state.ready = True
+    startup_seconds.set(value=state.startup_s)
+    ready_gauge.set(value=1)
+    logger.info("Worker ready in %.3fs (warm-up steps: %s)",
+                state.startup_s, state.steps)
+
+
+# Состояние прогрева процесса
+startup = StartupState()
@@ -0,0 +1,212 @@
+from datetime import date, datetime, time, timedelta, UTC
+from typing import Annotated, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Query
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    Select,
+    Subquery,
+    func,
+    literal,
+    select,
+    union_all,
+)
+from starlette import status
+
+from app.core.timestamps import naive_utc
+from app.enums.stats_windows import StatsWindowEnum
+from app.models.achievement import Achievement
+from app.models.stats import UserDailyStats
+from app.models.user import UserAchievement
+
+
+class StatsWindow(NamedTuple):
+    """
+    Окно статистики [since, until) во времени UTC без часового пояса
+    (как issued_at). None - без границы.
+    """
+    since: Optional[datetime]
+    until: Optional[datetime]
+
+    def cache_params(self) -> dict:
+        """
+        Параметры окна для ключа кэша и ETag.
+        """
+        return {
+            "since": self.since.isoformat() if self.since else "",
+            "until": self.until.isoformat() if self.until else "",
+        }
+
+    def full_days(self) -> tuple[Optional[date], Optional[date]]:
+        """
+        Полные дни окна [first, end): читаются из дневных агрегатов.
+        """
+        first = None
+        if self.since is not None:
+            first = self.since.date()
+            if self.since.time() != time.min:
+                first += timedelta(days=1)
+        end = self.until.date() if self.until is not None else None
+        return first, end
+
+    def partial_ranges(self) -> list[tuple[Optional[datetime], datetime]]:
+        """
+        Неполные дни на границах окна: читаются из истории выдачи
+        по индексу issued_at.
+        """
+        first, end = self.full_days()
+        if first is not None and end is not None and first >= end:
+            return [(self.since, self.until)]
+        ranges = []
+        if first is not None and self.since.time() != time.min:
+            ranges.append((self.since, _day_start(first)))
+        if end is not None and self.until.time() != time.min:
+            ranges.append((_day_start(end), self.until))
+        return ranges
+
+    def last_day(self) -> Optional[date]:
+        """
+        Последний день окна (None - сегодняшний).
+        """
+        if self.until is None:
+            return None
+        return (self.until - timedelta(microseconds=1)).date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def resolve_window(
+        window: Optional[StatsWindowEnum] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+) -> Optional[StatsWindow]:
+    """
+    Окно статистики из параметров запроса.
+    :param window: Именованное окно (последние дни, включая сегодня).
+    :param since: Начало окна (включительно).
+    :param until: Конец окна (не включительно).
+    :return: Окно или None - статистика за все время.
+    """
+    if window is not None:
+        if since is not None or until is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either window or since/until"
+            )
+        today = datetime.now(UTC).date()
+        since = _day_start(today - timedelta(days=window.days - 1))
+    since, until = naive_utc(since), naive_utc(until)
+    if since is None and until is None:
+        return None
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be earlier than until"
+        )
+    return StatsWindow(since, until)
+
+
+def stats_window(
+        window: Optional[StatsWindowEnum] = None,
+        since: Optional[datetime] = Query(default=None),
+        until: Optional[datetime] = Query(default=None)
+) -> Optional[StatsWindow]:
+    return resolve_window(window, since, until)
+
+
+# Тип StatsWindowDep для параметров окна эндпоинтов статистики
+StatsWindowDep = Annotated[Optional[StatsWindow], Depends(stats_window)]
+
+
+def window_cache_params(window: Optional[StatsWindow]) -> dict:
+    """
+    Параметры окна для cached_stats (пусто - за все время, ключи
+    статистики за все время не меняются).
+    """
+    return window.cache_params() if window is not None else {}
+
+
+def _partial_awards(since: Optional[datetime], until: datetime):
+    filters = [UserAchievement.issued_at < until]
+    if since is not None:
+        filters.append(UserAchievement.issued_at >= since)
+    return (
+        select(
+            UserAchievement.user_id,
+            UserAchievement.issued_at,
+            Achievement.points,
+        )
+        .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .where(*filters)
+    )
+
+
+def _daily_rows(window: StatsWindow, *columns) -> list[Select]:
+    # Выборка полных дней окна из дневных агрегатов (пусто, если
+    # полных дней нет)
+    first, end = window.full_days()
+    if first is not None and end is not None and first >= end:
+        return []
+    rows = select(*columns)
+    if first is not None:
+        rows = rows.where(UserDailyStats.day >= first)
+    if end is not None:
+        rows = rows.where(UserDailyStats.day < end)
+    return [rows]
+
+
+def window_totals(window: StatsWindow) -> Select:
+    """
+    Агрегаты пользователей за окно в форме user_stats: полные дни
+    суммируются из user_daily_stats, неполные дни на границах
+    окна - из истории выдачи по индексу issued_at.
+    :param window: Окно статистики.
+    :return: SELECT с колонками user_id, achievement_count
+    и total_points.
+    """
+    parts = _daily_rows(window,
+                        UserDailyStats.user_id,
+                        UserDailyStats.achievement_count,
+                        UserDailyStats.total_points)
+    for since, until in window.partial_ranges():
+        awards = _partial_awards(since, until).subquery()
+        parts.append(
+            select(awards.c.user_id,
+                   literal(1, Integer),
+                   awards.c.points)
+        )
+
+    rows = union_all(*parts).subquery("window_rows")
+    user_id, count, points = rows.c
+    return (
+        select(
+            user_id.label("user_id"),
+            func.sum(count).cast(Integer).label("achievement_count"),
+            func.sum(points).cast(BigInteger).label("total_points"),
+        )
+        .group_by(user_id)
+    )
+
+
+def window_days(window: StatsWindow) -> Subquery:
+    """
+    Дни окна, в которые пользователи получали достижения.
+    :param window: Окно статистики.
+    :return: Подзапрос с колонками user_id и day (без повторов).
+    """
+    parts = _daily_rows(window, UserDailyStats.user_id, UserDailyStats.day)
+    for since, until in window.partial_ranges():
+        awards = _partial_awards(since, until).subquery()
+        parts.append(
+            select(awards.c.user_id, func.date(awards.c.issued_at))
+        )
+    rows = union_all(*parts).subquery("window_day_rows")
+    user_id, day = rows.c
+    return (
+        select(user_id.label("user_id"), day.label("day"))
+        .distinct()
+        .subquery("window_days")
+    )
@@ -0,0 +1,172 @@
+"""
+Синтетические наборы данных для бенчмарков.
+
+Для каждого масштаба (число строк user_achievements) создается
+отдельная база {POSTGRES_DB}_bench_<масштаб>, к ней применяются
+миграции, и она заполняется генератором данных (app.db.generator)
+один раз: повторные прогоны используют уже заполненную базу.
+
+Пример запуска:
+    poetry run python -m benchmarks.dataset --scale 1e5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+import psycopg2
+from psycopg2 import sql
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.generator import GeneratorConfig, generate
+from app.enums.awards_distributions import AwardsDistributionEnum
+
+
+# Размер каталога достижений и среднее число достижений
+# у пользователя (не больше размера каталога: пара
+# пользователь-достижение уникальна)
+ACHIEVEMENTS = 1000
+PER_USER = 50
+MIN_USERS = 20
+
+
+@dataclass(frozen=True)
+class Dataset:
+    scale: int
+    users: int
+    achievements: int
+    per_user: int
+
+    @property
+    def label(self) -> str:
+        exponent = len(str(self.scale)) - 1
+        if self.scale == 10 ** exponent:
+            return f"1e{exponent}"
+        return str(self.scale)
+
+    @property
+    def database(self) -> str:
+        return f"{settings.postgres_db}_bench_{self.label}"
+
+    @property
+    def rows(self) -> int:
+        return self.users * self.per_user
+
+    @property
+    def env(self) -> dict:
+        """
+        Переменные окружения для приложения, работающего с базой
+        набора данных.
+        """
+        return dict(os.environ, POSTGRES_DB=self.database)
+
+    @property
+    def url(self) -> str:
+        return settings.database_url.rsplit("/", 1)[0] + f"/{self.database}"
+
+
+def parse_scale(value: str) -> int:
+    """
+    Масштаб в виде 1e5 или 100000.
+    """
+    return int(float(value))
+
+
+def dataset_for(scale: int) -> Dataset:
+    """
+    Параметры набора данных с заданным числом выдач достижений.
+    :param scale: Число строк user_achievements.
+    :return: Параметры набора данных.
+    """
+    per_user = min(PER_USER, ACHIEVEMENTS, max(scale // MIN_USERS, 1))
+    users = max(scale // per_user, 1)
+    return Dataset(scale=scale, users=users,
+                   achievements=ACHIEVEMENTS, per_user=per_user)
+
+
+def create_database(dataset: Dataset) -> bool:
+    """
+    Создает базу набора данных, если ее нет.
+    :return: True, если база создана.
+    """
+    connection = psycopg2.connect(
+        settings.database_url.rsplit("/", 1)[0] + "/postgres"
+    )
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s",
+                           (dataset.database,))
+            if cursor.fetchone():
+                return False
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(
+                sql.Identifier(dataset.database)
+            ))
+            return True
+    finally:
+        connection.close()
+
+
+def migrate(dataset: Dataset):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        env=dataset.env,
+        check=True,
+    )
+
+
+def seed(dataset: Dataset, seed_value: int = 42):
+    """
+    Заполняет пустую базу набора данных генератором данных.
+    :param dataset: Параметры набора данных.
+    :param seed_value: Зерно генератора.
+    """
+    engine = create_engine(dataset.url)
+    try:
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT count(*) FROM users")).scalar():
+                return
+    finally:
+        engine.dispose()
+    generate(dataset.url, GeneratorConfig(
+        scale=dataset.scale,
+        achievements=dataset.achievements,
+        awards_distribution=AwardsDistributionEnum.FIXED,
+        awards_per_user=dataset.per_user,
+        seed=seed_value,
+        workers=os.cpu_count() or 1,
+    ))
+
+
+def prepare(scale: int) -> Dataset:
+    """
+    Создает, мигрирует и заполняет базу набора данных
+    (заполненная база используется повторно).
+    :param scale: Число строк user_achievements.
+    :return: Параметры набора данных.
+    """
+    dataset = dataset_for(scale)
+    started = time.perf_counter()
+    create_database(dataset)
+    migrate(dataset)
+    seed(dataset)
+    print(f"Dataset {dataset.database}: {dataset.users} users, "
+          f"{dataset.rows} awards ready in "
+          f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=parse_scale, action="append",
+                        required=True)
+    args = parser.parse_args()
+    for scale in args.scale:
+        prepare(scale)
+
+
+if __name__ == "__main__":
+    main()
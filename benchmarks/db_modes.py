@@ -0,0 +1,150 @@
+"""
+Сравнение пропускной способности синхронного и асинхронного
+режимов работы с базой данных.
+
+Скрипт поднимает приложение дважды (DB_ASYNC=false и DB_ASYNC=true)
+на разных портах, нагружает одни и те же эндпоинты заданным числом
+конкурентных клиентов и печатает сводку (запросов в секунду, p50, p99).
+
+Пример запуска:
+    poetry run python -m benchmarks.db_modes --concurrency 64 \\
+        --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+DEFAULT_PATHS = [
+    "/api/v1/users/",
+    "/api/v1/achievements/",
+    "/api/v1/users/1/achievements",
+    "/api/v1/achievements/stats/top-user",
+]
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0):
+    """
+    Ожидает окончания прогрева сервера (эндпоинт готовности).
+    :param base_url: Адрес сервера.
+    :param timeout: Максимальное время ожидания в секундах.
+    """
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                response = await client.get("/ready")
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server {base_url} did not start in {timeout}s")
+
+
+async def run_load(
+        base_url: str,
+        paths: list[str],
+        total_requests: int,
+        concurrency: int
+) -> dict:
+    """
+    Нагружает сервер запросами и собирает задержки.
+    :param base_url: Адрес сервера.
+    :param paths: Пути эндпоинтов, запрашиваемые по кругу.
+    :param total_requests: Общее количество запросов.
+    :param concurrency: Количество одновременных клиентов.
+    :return: Словарь с метриками прогона.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url,
+                                 limits=limits,
+                                 timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total_requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(
+            latencies[int(len(latencies) * 0.99) - 1] * 1000, 2
+        ),
+    }
+
+
+def start_server(db_async: bool, port: int) -> subprocess.Popen:
+    """
+    Запускает uvicorn с заданным режимом работы с БД.
+    :param db_async: Включить асинхронный режим.
+    :param port: Порт сервера.
+    :return: Процесс сервера.
+    """
+    env = dict(os.environ, DB_ASYNC="true" if db_async else "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--path", action="append", dest="paths")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    results = {}
+    for offset, db_async in enumerate((False, True)):
+        mode = "async" if db_async else "sync"
+        port = args.port + offset
+        server = start_server(db_async, port)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_until_up(base_url)
+            # Прогрев пула соединений перед замером
+            await run_load(base_url, paths, args.concurrency,
+                           args.concurrency)
+            results[mode] = await run_load(base_url, paths,
+                                           args.requests,
+                                           args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+
+    results["speedup"] = round(
+        results["async"]["rps"] / results["sync"]["rps"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,398 @@
+"""
+Бенчмарк всех эндпоинтов API на синтетических наборах данных.
+
+Для каждого масштаба (число строк user_achievements) скрипт готовит
+базу (benchmarks.dataset), поднимает приложение на этой базе
+и нагружает каждый маршрут по отдельности заданным числом
+конкурентных клиентов. Результат - JSON с задержками (p50, p90,
+p95, p99, max) и пропускной способностью по маршрутам, который
+можно сравнить с результатом другой ветки (--compare).
+
+Кэш статистики по умолчанию выключен (CACHE_BACKEND=none), чтобы
+замерять сами запросы статистики; --cache включает его.
+
+Пример запуска:
+    poetry run python -m benchmarks.endpoints --scale 1e3 --scale 1e5 \\
+        --output benchmarks/results/main.json
+    poetry run python -m benchmarks.endpoints \\
+        --compare benchmarks/results/main.json \\
+        benchmarks/results/feature.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from benchmarks.dataset import Dataset, parse_scale, prepare
+from benchmarks.db_modes import wait_until_up
+
+# Строк в одном запросе импорта и элементов в одной пакетной выдаче
+IMPORT_ROWS = 100
+BATCH_ITEMS = 100
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+@dataclass(frozen=True)
+class Route:
+    """
+    Маршрут бенчмарка: метод, шаблон пути (имя результата)
+    и функция, строящая конкретный запрос (путь и тело: JSON
+    или байты NDJSON).
+    """
+    method: str
+    template: str
+    build: Callable[[Dataset, random.Random],
+                    tuple[str, Optional[dict | bytes]]]
+    write: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.template}"
+
+
+def _fixed(path: str):
+    return lambda dataset, rng: (path, None)
+
+
+def _user_history(dataset: Dataset, rng: random.Random):
+    return f"/api/v1/users/{rng.randint(1, dataset.users)}/achievements", None
+
+
+def _user_rank(dataset: Dataset, rng: random.Random):
+    return f"/api/v1/users/{rng.randint(1, dataset.users)}/rank", None
+
+
+def _live_position(dataset: Dataset, rng: random.Random):
+    user_id = rng.randint(1, dataset.users)
+    return f"/api/v1/leaderboard/points/users/{user_id}?neighbors=5", None
+
+
+def _user(rng: random.Random) -> dict:
+    return {"name": f"bench_{rng.random():.12f}",
+            "language": rng.choice(["en", "ru"])}
+
+
+def _achievement(rng: random.Random) -> dict:
+    name = f"bench_{rng.random():.12f}"
+    return {"name_en": name, "name_ru": name,
+            "points": rng.randint(1, 100),
+            "description_en": name, "description_ru": name}
+
+
+def _ndjson(rows: list[dict]) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def _create_user(dataset: Dataset, rng: random.Random):
+    return "/api/v1/users/", _user(rng)
+
+
+def _import_users(dataset: Dataset, rng: random.Random):
+    return "/api/v1/users/import", _ndjson(
+        [_user(rng) for _ in range(IMPORT_ROWS)]
+    )
+
+
+def _create_achievement(dataset: Dataset, rng: random.Random):
+    return "/api/v1/achievements/", _achievement(rng)
+
+
+def _import_achievements(dataset: Dataset, rng: random.Random):
+    return "/api/v1/achievements/import", _ndjson(
+        [_achievement(rng) for _ in range(IMPORT_ROWS)]
+    )
+
+
+def _issue(dataset: Dataset, rng: random.Random):
+    user_id = rng.randint(1, dataset.users)
+    return (f"/api/v1/users/{user_id}/achievements?response_mode=minimal",
+            {"achievement_id": rng.randint(1, dataset.achievements)})
+
+
+def _issue_batch(dataset: Dataset, rng: random.Random):
+    return "/api/v1/users/achievements/batch", {"items": [
+        {"user_id": rng.randint(1, dataset.users),
+         "achievement_id": rng.randint(1, dataset.achievements)}
+        for _ in range(BATCH_ITEMS)
+    ]}
+
+
+STATS = "/api/v1/achievements/stats"
+
+ROUTES = [
+    Route("GET", "/api/v1/users/", _fixed("/api/v1/users/?limit=50")),
+    Route("GET", "/api/v1/users/{user_id}/achievements", _user_history),
+    Route("GET", "/api/v1/achievements/", _fixed("/api/v1/achievements/")),
+    Route("GET", f"{STATS}/top-user", _fixed(f"{STATS}/top-user")),
+    Route("GET", f"{STATS}/top-user-points",
+          _fixed(f"{STATS}/top-user-points")),
+    Route("GET", f"{STATS}/top-user-points?window=month",
+          _fixed(f"{STATS}/top-user-points?window=month")),
+    Route("GET", f"{STATS}/max-points-difference",
+          _fixed(f"{STATS}/max-points-difference")),
+    Route("GET", f"{STATS}/min-points-difference",
+          _fixed(f"{STATS}/min-points-difference")),
+    Route("GET", f"{STATS}/7-day-streak", _fixed(f"{STATS}/7-day-streak")),
+    Route("GET", f"{STATS}/streaks",
+          _fixed(f"{STATS}/streaks?min_days=7&kind=longest")),
+    Route("GET", f"{STATS}/streaks/top", _fixed(f"{STATS}/streaks/top")),
+    Route("GET", "/api/v1/leaderboard/{metric}",
+          _fixed("/api/v1/leaderboard/points?limit=100")),
+    Route("GET", "/api/v1/users/{user_id}/rank", _user_rank),
+    Route("GET", "/api/v1/leaderboard/points/top",
+          _fixed("/api/v1/leaderboard/points/top?limit=100")),
+    Route("GET", "/api/v1/leaderboard/points/users/{user_id}",
+          _live_position),
+    # Изменяющие данные маршруты (--writes): меняют базу набора
+    Route("POST", "/api/v1/users/", _create_user, write=True),
+    Route("POST", "/api/v1/users/import", _import_users, write=True),
+    Route("POST", "/api/v1/users/{user_id}/achievements", _issue,
+          write=True),
+    Route("POST", "/api/v1/users/achievements/batch", _issue_batch,
+          write=True),
+    Route("POST", "/api/v1/achievements/", _create_achievement,
+          write=True),
+    Route("POST", "/api/v1/achievements/import", _import_achievements,
+          write=True),
+]
+
+
+def percentile(values: list[float], share: float) -> float:
+    """
+    Перцентиль отсортированного списка (ближайший ранг).
+    """
+    index = max(int(round(share * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+async def bench_route(
+        client: httpx.AsyncClient,
+        route: Route,
+        dataset: Dataset,
+        total_requests: int,
+        concurrency: int,
+        seed: int
+) -> dict:
+    """
+    Нагружает один маршрут и собирает задержки.
+    :param client: HTTP-клиент приложения.
+    :param route: Маршрут.
+    :param dataset: Набор данных (диапазоны идентификаторов).
+    :param total_requests: Количество запросов.
+    :param concurrency: Количество одновременных клиентов.
+    :param seed: Зерно генератора параметров запросов.
+    :return: Метрики маршрута.
+    """
+    rng = random.Random(seed)
+    requests = [route.build(dataset, rng) for _ in range(total_requests)]
+    latencies = []
+    statuses = Counter()
+    counter = iter(requests)
+
+    async def worker():
+        for path, body in counter:
+            start = time.perf_counter()
+            try:
+                if isinstance(body, bytes):
+                    body_args = {"content": body, "headers": NDJSON}
+                else:
+                    body_args = {"json": body}
+                response = await client.request(route.method, path,
+                                                **body_args)
+                statuses[str(response.status_code)] += 1
+            except httpx.TransportError:
+                statuses["transport_error"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "statuses": dict(statuses),
+        "errors": sum(count for status, count in statuses.items()
+                      if not status.startswith(("2", "3", "4"))),
+        "rps": round(total_requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        **{
+            f"p{int(share * 100)}_ms": round(
+                percentile(latencies, share) * 1000, 3
+            )
+            for share in (0.5, 0.9, 0.95, 0.99)
+        },
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def start_server(dataset: Dataset, port: int, args) -> subprocess.Popen:
+    env = dict(
+        dataset.env,
+        DB_ASYNC="true" if args.db_async else "false",
+        CACHE_BACKEND="memory" if args.cache else "none",
+        # Маршруты /leaderboard/points/* отвечают из памяти воркера
+        LEADERBOARD_MEMORY="true",
+        ENV="benchmark",
+        REQUEST_LOG_SAMPLE_RATE="0",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def bench_dataset(dataset: Dataset, routes: list[Route],
+                        args) -> dict:
+    """
+    Прогон всех маршрутов на одном наборе данных.
+    """
+    server = start_server(dataset, args.port, args)
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results = {}
+    try:
+        await wait_until_up(base_url)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                     timeout=120) as client:
+            for route in routes:
+                # Прогрев: соединения пула, кэш каталога, планы
+                await bench_route(client, route, dataset,
+                                  args.concurrency, args.concurrency,
+                                  args.seed + 1)
+                results[route.name] = await bench_route(
+                    client, route, dataset, args.requests,
+                    args.concurrency, args.seed
+                )
+                print(f"{dataset.label} {route.name}: "
+                      f"p50 {results[route.name]['p50_ms']}ms, "
+                      f"p99 {results[route.name]['p99_ms']}ms, "
+                      f"{results[route.name]['rps']} rps", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "users": dataset.users,
+        "achievements": dataset.achievements,
+        "rows": dataset.rows,
+        "routes": results,
+    }
+
+
+def git_revision() -> dict:
+    def git(*command: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *command], capture_output=True, text=True,
+                check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def compare(baseline_path: str, candidate_path: str,
+            threshold: float) -> int:
+    """
+    Сравнивает два результата по p50 и p99 маршрутов.
+    :param threshold: Допустимый рост задержки (0.2 - на 20%).
+    :return: Код выхода: 1, если есть регрессии.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    candidate = json.loads(Path(candidate_path).read_text())
+    regressions = 0
+    for scale, data in candidate["scales"].items():
+        base_routes = baseline["scales"].get(scale, {}).get("routes", {})
+        for name, result in data["routes"].items():
+            base = base_routes.get(name)
+            if base is None:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                ratio = result[metric] / max(base[metric], 1e-9)
+                flag = ""
+                if ratio > 1 + threshold:
+                    flag = "  REGRESSION"
+                    regressions += 1
+                print(f"{scale:>5} {metric:>6} {base[metric]:>10.2f} -> "
+                      f"{result[metric]:>10.2f} ({ratio:5.2f}x) "
+                      f"{name}{flag}")
+    return 1 if regressions else 0
+
+
+async def run(args) -> dict:
+    routes = [route for route in ROUTES if args.writes or not route.write]
+    if args.route:
+        routes = [route for route in routes
+                  if any(part in route.name for part in args.route)]
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_async": args.db_async,
+            "cache": args.cache,
+            "writes": args.writes,
+            "seed": args.seed,
+            "cpu_count": os.cpu_count(),
+        },
+        "scales": {},
+    }
+    for scale in args.scale:
+        dataset = prepare(scale)
+        results["scales"][dataset.label] = await bench_dataset(
+            dataset, routes, args
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=parse_scale, action="append")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8111)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--route", action="append",
+                        help="Only routes whose name contains the value")
+    parser.add_argument("--db-async", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--writes", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2,
+                        metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    args.scale = args.scale or [10 ** 3, 10 ** 5]
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Микробенчмарк сериализации ответов больших списков.
+
+Сравнивает стоимость одного элемента ответа на пути FastAPI по
+умолчанию (валидация через response_model, затем jsonable_encoder /
+json.dumps в JSONResponse) и на быстром пути (данные уже в форме
+ответа, один вызов orjson). База данных не нужна.
+
+Пример запуска:
+    poetry run python -m benchmarks.serialization --items 500
+"""
+import argparse
+import asyncio
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.achievement import Achievement
+from app.schemas import achievement_schemas
+from app.services.serialization import dumps
+
+
+def achievement_fields(index: int) -> dict:
+    return {
+        "name_en": f"Achievement {index}",
+        "name_ru": f"Достижение {index}",
+        "points": index % 200,
+        "description_en": "Complete the master level " * 3,
+        "description_ru": "Пройдите уровень мастера " * 3,
+        "id": index,
+    }
+
+
+def history_item(index: int, issued_at: datetime) -> dict:
+    return {
+        "id": index,
+        "name": f"Achievement {index}",
+        "description": "Complete the master level " * 3,
+        "points": index % 200,
+        "issued_at": issued_at + timedelta(minutes=index),
+    }
+
+
+def points_pair(index: int) -> dict:
+    return {
+        "user_1": {"id": index, "name": f"user {index}",
+                   "total_points": index * 10},
+        "user_2": {"id": index + 1, "name": f"user {index + 1}",
+                   "total_points": index * 10 + 5},
+        "points_difference": 5,
+    }
+
+
+def fastapi_response(field, content) -> bytes:
+    """
+    Путь FastAPI для эндпоинта с response_model: валидация и
+    сериализация pydantic, затем json.dumps в JSONResponse.
+    """
+    value = asyncio.run(
+        serialize_response(field=field, response_content=content)
+    )
+    return JSONResponse(value).body
+
+
+def build_cases(items: int) -> list[tuple[str, Callable, Callable]]:
+    """
+    Готовит пары "до/после" для больших списочных эндпоинтов.
+    :param items: Количество элементов в ответе.
+    :return: Список (название, функция до, функция после).
+    """
+    issued_at = datetime(2026, 1, 1, 12, 0)
+
+    catalog_rows = [achievement_fields(i) for i in range(items)]
+    orm_rows = [Achievement(**row) for row in catalog_rows]
+    catalog_field = create_model_field(
+        name="Response_read_achievements",
+        type_=list[achievement_schemas.Achievement],
+        mode="serialization"
+    )
+
+    history = {
+        "user_id": 1,
+        "achievements": [history_item(i, issued_at) for i in range(items)],
+    }
+    history_field = create_model_field(
+        name="Response_get_user_achievements",
+        type_=achievement_schemas.UserAchievementsOut,
+        mode="serialization"
+    )
+
+    pairs = [points_pair(i) for i in range(items)]
+
+    return [
+        ("GET /achievements/ (ORM + response_model)",
+         lambda: fastapi_response(catalog_field, orm_rows),
+         lambda: dumps(catalog_rows)),
+        ("GET /users/{id}/achievements (response_model)",
+         lambda: fastapi_response(history_field, history),
+         lambda: dumps(history)),
+        ("GET /achievements/stats/* (jsonable_encoder)",
+         lambda: JSONResponse(jsonable_encoder(pairs)).body,
+         lambda: dumps(pairs)),
+    ]
+
+
+def per_item_us(fn, items: int, repeat: int) -> float:
+    """
+    Лучшее время сериализации одного элемента в микросекундах.
+    """
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    return best / items * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for name, before, after in build_cases(args.items):
+        assert json.loads(before()) == json.loads(after()), name
+        before_us = per_item_us(before, args.items, args.repeat)
+        after_us = per_item_us(after, args.items, args.repeat)
+        results[name] = {
+            "before_us_per_item": round(before_us, 3),
+            "after_us_per_item": round(after_us, 3),
+            "speedup": round(before_us / after_us, 1),
+        }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
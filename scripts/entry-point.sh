@@ -6,6 +6,9 @@ set -e
 echo "Run alembic migration..."
 make alembic-upgrade
 
+echo "Create user_achievements partitions..."
+make partitions
+
 echo "Starting FastAPI application..."
 poetry run uvicorn app.main:app --host 0.0.0.0 --port 8001 &
 UVICORN_PID=$!
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from uuid import uuid4
 from dotenv import load_dotenv
 
 import pytest
@@ -58,3 +59,29 @@ def override_settings(monkeypatch):
     print(f"POSTGRES_DB used: {os.getenv('POSTGRES_DB')}")
 
     yield
+
+
+# Данные для тестов: уникальные имена, база между тестами не очищается
+def create_user():
+    response = client.post(
+        settings.api_v1_prefix + "/users",
+        json={"name": f"user-{uuid4().hex[:8]}"}
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def create_achievement(points=10):
+    name = f"achievement-{uuid4().hex[:8]}"
+    response = client.post(
+        settings.api_v1_prefix + "/achievements",
+        json={
+            "name_en": name,
+            "name_ru": name,
+            "points": points,
+            "description_en": name,
+            "description_ru": name,
+        }
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
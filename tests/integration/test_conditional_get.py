@@ -0,0 +1,79 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.db.notify import listener
+from app.main import app
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+def issue(client, user_id, achievement_id):
+    response = client.post(
+        settings.api_v1_prefix + f"/users/{user_id}/achievements",
+        json={"achievement_id": achievement_id}
+    )
+    assert response.status_code == 201
+
+
+def assert_revalidation(client, url, award):
+    """
+    200 с ETag -> 304 по If-None-Match -> 200 с новым ETag
+    после выдачи достижения.
+    """
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    award()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    return response.json()
+
+
+def test_history_revalidation():
+    user_id = create_user()
+    first, second = create_achievement(), create_achievement()
+    issue(client, user_id, first)
+    url = settings.api_v1_prefix + f"/users/{user_id}/achievements"
+    # Первый запрос загружает каталог, ETag строится по его снимку
+    client.get(url)
+
+    history = assert_revalidation(
+        client, url, lambda: issue(client, user_id, second)
+    )
+
+    assert [
+        item["id"] for item in history["achievements"]
+    ] == [first, second]
+
+
+def test_stats_revalidation():
+    user_id = create_user()
+    achievement_id = create_achievement(points=10_000)
+    url = settings.api_v1_prefix + "/achievements/stats/top-user-points"
+
+    # ETag статистики строится по версии данных, известной только
+    # при подключенном слушателе уведомлений
+    with TestClient(app) as live_client:
+        deadline = time.monotonic() + 5
+        while not listener.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert listener.connected
+
+        top = assert_revalidation(
+            live_client, url,
+            lambda: issue(live_client, user_id, achievement_id)
+        )
+
+    assert user_id in [row["user_id"] for row in top]
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+def issue_batch(items):
+    response = client.post(
+        settings.api_v1_prefix + "/users/achievements/batch",
+        json={"items": items}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def days_ago(days):
+    # Полдень: день выдачи не зависит от момента запуска теста
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return (now - timedelta(days=days)).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+
+
+@pytest.mark.parametrize(
+    "second_item, reason",
+    [
+        # Несуществующий пользователь
+        (lambda user, first, other: (0, other), "user_not_found"),
+        # Несуществующее достижение
+        (lambda user, first, other: (user, 0), "achievement_not_found"),
+        # Достижение выдано до пакета
+        (lambda user, first, other: (user, other), "already_awarded"),
+        # Повтор внутри пакета
+        (lambda user, first, other: (user, first), "already_awarded"),
+    ]
+)
+def test_batch_item_errors(second_item, reason):
+    user_id = create_user()
+    first, other = create_achievement(), create_achievement()
+    if reason == "already_awarded":
+        issue_batch([{"user_id": user_id, "achievement_id": other}])
+
+    item_user_id, item_achievement_id = second_item(user_id, first, other)
+    result = issue_batch([
+        {"user_id": user_id, "achievement_id": first},
+        {"user_id": item_user_id, "achievement_id": item_achievement_id},
+    ])
+
+    # Ошибочный элемент пропускается, остальные выдаются
+    assert result == {
+        "inserted": 1,
+        "errors": [{"index": 1, "reason": reason}],
+    }
+
+
+def test_backdated_items_update_stats_and_streaks():
+    user_id = create_user()
+    achievements = [create_achievement(points) for points in (5, 10, 20)]
+
+    # Выдачи задним числом в произвольном порядке: серия из трех дней,
+    # закончившаяся позавчера
+    result = issue_batch([
+        {"user_id": user_id, "achievement_id": achievements[0],
+         "issued_at": days_ago(2).isoformat()},
+        {"user_id": user_id, "achievement_id": achievements[1],
+         "issued_at": days_ago(4).isoformat()},
+        {"user_id": user_id, "achievement_id": achievements[2],
+         "issued_at": days_ago(3).isoformat()},
+    ])
+    assert result == {"inserted": 3, "errors": []}
+
+    response = client.get(
+        settings.api_v1_prefix + f"/users/{user_id}/rank"
+    )
+    assert response.status_code == 200
+    rank = response.json()
+    assert rank["achievement_count"] == 3
+    assert rank["total_points"] == 35
+
+    response = client.get(
+        settings.api_v1_prefix + "/achievements/stats/streaks",
+        params={"kind": "longest", "min_days": 1, "limit": 10_000}
+    )
+    assert response.status_code == 200
+    streak, = [
+        row for row in response.json() if row["user_id"] == user_id
+    ]
+    assert streak["longest_streak"] == 3
+    # Последняя выдача позавчера: текущая серия прервана
+    assert streak["current_streak"] == 0
+    assert streak["last_award_date"] == days_ago(2).date().isoformat()
@@ -0,0 +1,145 @@
+import random
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, literal_column, select
+
+from app.db.session import SessionLocal
+from app.models.user import UserAchievement
+from app.services.partitions import (
+    PARTITIONS_LOCK_KEY,
+    ensure_partitions,
+    try_maintain_partitions,
+)
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+def issue(user_id, achievement_id):
+    return client.post(
+        settings.api_v1_prefix + f"/users/{user_id}/achievements",
+        json={"achievement_id": achievement_id}
+    )
+
+
+def issue_batch(items):
+    response = client.post(
+        settings.api_v1_prefix + "/users/achievements/batch",
+        json={"items": items}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def partitions(user_id) -> list[tuple[int, str]]:
+    # Секция, в которой лежит каждая строка истории пользователя
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                UserAchievement.achievement_id,
+                literal_column("tableoid::regclass::text"),
+            )
+            .where(UserAchievement.user_id == user_id)
+            .order_by(UserAchievement.achievement_id)
+        )
+        return [tuple(row) for row in rows]
+
+
+# Время повторной выдачи: в секции другого месяца и в секции
+# по умолчанию (уникальность не зависит от секции)
+@pytest.mark.parametrize(
+    "repeat_at",
+    [None, datetime(2026, 1, 15, 12), datetime(1990, 6, 1)]
+)
+def test_repeat_is_rejected(repeat_at):
+    user_id = create_user()
+    achievement_id = create_achievement()
+    item = {"user_id": user_id, "achievement_id": achievement_id}
+    if repeat_at is not None:
+        item["issued_at"] = repeat_at.isoformat()
+
+    assert issue(user_id, achievement_id).status_code == 201
+    response = issue(user_id, achievement_id)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Achievement already awarded"}
+
+    assert issue_batch([item]) == {
+        "inserted": 0,
+        "errors": [{"index": 0, "reason": "already_awarded"}],
+    }
+    assert len(partitions(user_id)) == 1
+
+
+def test_awards_land_in_month_partitions():
+    user_id = create_user()
+    now_id, backdated_id = create_achievement(), create_achievement()
+
+    assert issue(user_id, now_id).status_code == 201
+    # Секции создаются на месяцы вперед при миграции, выдача задним
+    # числом за месяц без секции попадает в секцию по умолчанию
+    issue_batch([{
+        "user_id": user_id,
+        "achievement_id": backdated_id,
+        "issued_at": "1980-02-29T10:00:00",
+    }])
+
+    with SessionLocal() as db:
+        issued_at = db.scalar(
+            select(UserAchievement.issued_at)
+            .where(UserAchievement.achievement_id == now_id)
+        )
+    assert partitions(user_id) == [
+        (now_id, f"user_achievements_{issued_at:%Y_%m}"),
+        (backdated_id, "user_achievements_default"),
+    ]
+
+
+def test_ensure_partitions_moves_rows_from_default():
+    user_id = create_user()
+    achievement_ids = [create_achievement(), create_achievement()]
+    # Месяц без секции: секции создаются только этим тестом
+    month = datetime(random.randint(1900, 1979), random.randint(1, 12), 1)
+    issue_batch([
+        {"user_id": user_id, "achievement_id": achievement_id,
+         "issued_at": month.replace(day=day).isoformat()}
+        for achievement_id, day in zip(achievement_ids, (1, 28))
+    ])
+    assert {name for _, name in partitions(user_id)} == {
+        "user_achievements_default"
+    }
+
+    with SessionLocal() as db:
+        assert ensure_partitions(db, month, month) == 1
+        db.commit()
+        # Существующая секция не создается повторно
+        assert ensure_partitions(db, month, month) == 0
+
+    assert {name for _, name in partitions(user_id)} == {
+        f"user_achievements_{month:%Y_%m}"
+    }
+    response = client.get(
+        settings.api_v1_prefix + f"/users/{user_id}/achievements"
+    )
+    assert [
+        item["id"] for item in response.json()["achievements"]
+    ] == achievement_ids
+
+
+def test_maintenance_runs_in_one_process():
+    with SessionLocal() as holder, SessionLocal() as db:
+        # Блокировку держит другой процесс: обслуживание пропускается
+        holder.execute(
+            select(func.pg_advisory_xact_lock(PARTITIONS_LOCK_KEY))
+        )
+        assert try_maintain_partitions(db) is None
+        holder.commit()
+
+        assert try_maintain_partitions(db) is not None
+        # Блокировка снята коммитом обслуживания
+        assert holder.scalar(
+            select(func.pg_try_advisory_xact_lock(PARTITIONS_LOCK_KEY))
+        )
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+# Выдачи задним числом не по порядку: история идет по времени выдачи,
+# в том числе через границы месяцев
+ISSUED_AT = [
+    datetime(2026, 3, 2, 10),
+    datetime(2026, 1, 15, 8),
+    datetime(2026, 2, 28, 23, 59),
+    datetime(2026, 1, 15, 8),
+    datetime(2025, 12, 31, 23, 59, 59, 999999),
+]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5])
+def test_history_pages_follow_issued_at(limit):
+    user_id = create_user()
+    items = [
+        {
+            "user_id": user_id,
+            "achievement_id": create_achievement(),
+            "issued_at": issued_at.isoformat(),
+        }
+        for issued_at in ISSUED_AT
+    ]
+    response = client.post(
+        settings.api_v1_prefix + "/users/achievements/batch",
+        json={"items": items}
+    )
+    assert response.json()["inserted"] == len(items)
+    expected = [
+        (item["issued_at"], item["achievement_id"])
+        for item in sorted(
+            items,
+            key=lambda item: (item["issued_at"], item["achievement_id"])
+        )
+    ]
+
+    url = settings.api_v1_prefix + f"/users/{user_id}/achievements"
+    pages, params = [], {"limit": limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append([
+            (datetime.fromisoformat(item["issued_at"]).isoformat(),
+             item["id"])
+            for item in response.json()["achievements"]
+        ])
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+
+    assert [row for page in pages for row in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+    # Без limit - страница по умолчанию, больший limit уменьшается
+    # до максимального
+    for params in ({}, {"limit": 10_000}):
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        assert "x-next-cursor" not in response.headers
+        assert [
+            item["id"] for item in response.json()["achievements"]
+        ] == [achievement_id for _, achievement_id in expected]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "WzFd",  # [1] - курсор до сортировки по времени выдачи
+        "WzEsMiwzXQ",  # [1, 2, 3]
+        "WzEwMDAwMDAwMDAwMDAwMDAwMDAwMCwxXQ",  # [10**20, 1]
+        "not-a-cursor",
+    ]
+)
+def test_history_invalid_cursor(cursor):
+    user_id = create_user()
+
+    response = client.get(
+        settings.api_v1_prefix + f"/users/{user_id}/achievements",
+        params={"cursor": cursor}
+    )
+
+    assert response.status_code == 400
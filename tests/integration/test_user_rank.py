@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.enums.leaderboards import LeaderboardMetricEnum
+from app.models.stats import UserStats
+from app.services.leaderboard import metric_column
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+def issue(user_id, achievement_id):
+    response = client.post(
+        settings.api_v1_prefix + f"/users/{user_id}/achievements",
+        json={"achievement_id": achievement_id}
+    )
+    assert response.status_code == 201
+
+
+def dense_ranks(metric) -> dict[int, int]:
+    # Плотные места всех пользователей оконной функцией
+    column = metric_column(metric)
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                UserStats.user_id,
+                func.dense_rank().over(order_by=column.desc()),
+            )
+        )
+        return dict(rows.all())
+
+
+@pytest.mark.parametrize("metric", list(LeaderboardMetricEnum))
+def test_rank_matches_dense_rank(metric):
+    # Равные суммы очков и количества достижений делят место
+    achievements = [create_achievement(points) for points in (7, 7, 14)]
+    users = [create_user() for _ in range(4)]
+    for user_id, awarded in zip(users, ([0], [1], [2], [0, 1])):
+        for index in awarded:
+            issue(user_id, achievements[index])
+
+    ranks = dense_ranks(metric)
+    for user_id in users:
+        response = client.get(
+            settings.api_v1_prefix + f"/users/{user_id}/rank",
+            params={"metric": metric.value}
+        )
+        assert response.status_code == 200
+        assert response.json()["rank"] == ranks[user_id]
+
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.achievement import Achievement
+from app.models.user import UserAchievement
+from app.services.windows import StatsWindow, window_totals
+from tests.conftest import (
+    settings,
+    client,
+    create_achievement,
+    create_user,
+)
+
+
+# Первый день выдач: дни с выдачами уже закрыты
+BASE_DAY = (datetime.now(UTC) - timedelta(days=10)).replace(
+    tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+)
+
+
+def at(day, hour=0, minute=0):
+    return BASE_DAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+# Выдачи (пользователь, очки, время): на границах дней и внутри них
+AWARDS = [
+    (0, 5, at(0, 3)),
+    (0, 10, at(0, 23, 59)),
+    (0, 20, at(1)),
+    (0, 40, at(1, 12)),
+    (1, 80, at(1, 12)),
+    (1, 160, at(2, 6)),
+    (0, 320, at(3, 18)),
+    (1, 640, at(3, 23, 59)),
+]
+
+
+@pytest.fixture(scope="module")
+def user_ids():
+    users = [create_user(), create_user()]
+    items = [
+        {
+            "user_id": users[user],
+            "achievement_id": create_achievement(points),
+            "issued_at": issued_at.isoformat(),
+        }
+        for user, points, issued_at in AWARDS
+    ]
+    response = client.post(
+        settings.api_v1_prefix + "/users/achievements/batch",
+        json={"items": items}
+    )
+    assert response.json() == {"inserted": len(AWARDS), "errors": []}
+    return users
+
+
+def raw_totals(db, window, user_ids):
+    filters = [UserAchievement.user_id.in_(user_ids)]
+    if window.since is not None:
+        filters.append(UserAchievement.issued_at >= window.since)
+    if window.until is not None:
+        filters.append(UserAchievement.issued_at < window.until)
+    rows = db.execute(
+        select(UserAchievement.user_id, func.count(),
+               func.sum(Achievement.points))
+        .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .where(*filters)
+        .group_by(UserAchievement.user_id)
+    )
+    return {tuple(row) for row in rows}
+
+
+@pytest.mark.parametrize(
+    "window",
+    [
+        # Внутри одного дня
+        StatsWindow(at(1, 6), at(1, 18)),
+        StatsWindow(at(1), at(1, 12)),
+        # Через полночь без полных дней
+        StatsWindow(at(0, 12), at(1, 6)),
+        # Конец ровно в полночь
+        StatsWindow(at(0, 12), at(2)),
+        StatsWindow(at(1), at(3)),
+        # Неполные дни на обеих границах
+        StatsWindow(at(0, 4), at(3, 20)),
+        # Только since
+        StatsWindow(at(1), None),
+        StatsWindow(at(0, 12), None),
+        # Только until
+        StatsWindow(None, at(2)),
+        StatsWindow(None, at(3, 18, 30)),
+    ]
+)
+def test_window_totals_match_raw_sum(user_ids, window):
+    totals = window_totals(window).subquery()
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(totals).where(totals.c.user_id.in_(user_ids))
+        )
+        assert {tuple(row) for row in rows} == raw_totals(
+            db, window, user_ids
+        )
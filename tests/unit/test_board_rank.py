@@ -0,0 +1,25 @@
+import pytest
+
+from app.services.live_leaderboard import PointsLeaderboard
+
+
+@pytest.mark.parametrize(
+    "points, rank",
+    [
+        # Сумма выше всех
+        (40, 1),
+        (30, 1),
+        # Сумма между различными суммами и равная сумме двух
+        # пользователей
+        (25, 2),
+        (20, 2),
+        (10, 3),
+        # Сумма ниже всех
+        (0, 4),
+    ]
+)
+def test_rank(points, rank):
+    board = PointsLeaderboard()
+    board.ready = True
+    board.update_many([(1, 30), (2, 20), (3, 20), (4, 10)])
+    assert board.rank(points) == rank
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.services.imports import iter_lines
+
+
+async def collect(chunks, max_line_bytes):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in iter_lines(stream(), max_line_bytes)]
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        # Строки, разрезанные между фрагментами
+        ([b"ab\ncd", b"e\nf"], [b"ab", b"cde", b"f"]),
+        ([b"ab\n", b"\ncd\n"], [b"ab", b"", b"cd"]),
+        # Длинная строка целиком в одном фрагменте
+        ([b"ab\nabcdef\ncd"], [b"ab", None, b"cd"]),
+        # Длинная строка без перевода строки в нескольких фрагментах
+        ([b"ab\nabc", b"def", b"ghi", b"j\ncd"], [b"ab", None, b"cd"]),
+        ([b"abc", b"def", b"\n", b"cd\n"], [None, b"cd"]),
+        # Длинная последняя строка
+        ([b"ab\nabcdef", b"gh"], [b"ab", None]),
+        # Строка ровно максимальной длины
+        ([b"abcd\nabcde"], [b"abcd", None]),
+    ]
+)
+def test_iter_lines(chunks, expected):
+    assert asyncio.run(collect(chunks, max_line_bytes=4)) == expected
@@ -0,0 +1,35 @@
+import threading
+
+from app.services.live_leaderboard import PointsLeaderboard
+
+
+def test_reconnect_rebuilds_off_listener_thread(monkeypatch):
+    board = PointsLeaderboard()
+    board.ready = True
+    started, release, done = (threading.Event(), threading.Event(),
+                              threading.Event())
+    builds = []
+
+    def build(db):
+        builds.append(threading.current_thread().name)
+        started.set()
+        release.wait(timeout=5)
+        if len(builds) == 2:
+            done.set()
+
+    monkeypatch.setattr(board, "build", build)
+
+    # Поток уведомлений не ждет перестроения
+    board.on_notify(None)
+    assert started.wait(timeout=5)
+    # Переподключения во время перестроения дают одно повторное
+    board.on_notify(None)
+    board.on_notify(None)
+    assert len(builds) == 1
+    # Обновления применяются, пока рейтинг перестраивается
+    board.on_notify("7:10")
+    assert board.top(1) == [{"rank": 1, "user_id": 7, "total_points": 10}]
+
+    release.set()
+    assert done.wait(timeout=5)
+    assert builds == ["leaderboard-rebuild", "leaderboard-rebuild"]
@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.pagination import MAX_PAGE_LIMIT, page_limit, paginate
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [
+        (1, 1),
+        (50, 50),
+        (MAX_PAGE_LIMIT, MAX_PAGE_LIMIT),
+        (MAX_PAGE_LIMIT + 1, MAX_PAGE_LIMIT),
+        (10_000_000, MAX_PAGE_LIMIT),
+    ]
+)
+def test_page_limit(limit, expected):
+    assert page_limit(limit) == expected
+
+
+@pytest.mark.parametrize(
+    "rows, limit, items, has_next",
+    [
+        ([], 2, [], False),
+        ([1, 2], 2, [1, 2], False),
+        ([1, 2, 3], 2, [1, 2], True),
+    ]
+)
+def test_paginate(rows, limit, items, has_next):
+    page = paginate(rows, limit, key=lambda row: (row,))
+    assert page.items == items
+    assert (page.next_cursor is not None) == has_next
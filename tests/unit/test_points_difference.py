@@ -0,0 +1,68 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from app.services.points_difference import (
+    UserTotal,
+    max_difference_pairs,
+    min_difference_pairs,
+)
+
+
+def brute_force(users, find_max):
+    pairs = [
+        (min(a.id, b.id), max(a.id, b.id),
+         abs(a.total_points - b.total_points))
+        for a, b in combinations(users, 2)
+    ]
+    if not pairs:
+        return None, set()
+    best = (max if find_max else min)(p[2] for p in pairs)
+    return best, {p for p in pairs if p[2] == best}
+
+
+def as_set(pairs):
+    return {
+        (p["user_1"]["id"], p["user_2"]["id"], p["points_difference"])
+        for p in pairs
+    }
+
+
+def extremes(users):
+    low = min(u.total_points for u in users)
+    high = max(u.total_points for u in users)
+    return [u for u in users if u.total_points in (low, high)]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_brute_force(seed):
+    rnd = random.Random(seed)
+    users = [
+        UserTotal(i, f"user{i}", rnd.randint(0, 15))
+        for i in rnd.sample(range(1, 100), rnd.randint(2, 25))
+    ]
+
+    expected_max = brute_force(users, find_max=True)
+    diff, pairs = max_difference_pairs(extremes(users))
+    assert (diff, as_set(pairs)) == expected_max
+
+    expected_min = brute_force(users, find_max=False)
+    diff, pairs = min_difference_pairs(
+        sorted(users, key=lambda u: u.total_points)
+    )
+    assert (diff, as_set(pairs)) == expected_min
+
+
+def test_not_enough_users():
+    single = [UserTotal(1, "John", 10)]
+    assert max_difference_pairs(single)[0] is None
+    assert min_difference_pairs(single)[0] is None
+
+
+def test_pairs_are_generated_lazily():
+    users = [UserTotal(i, f"user{i}", 100) for i in range(1, 100_001)]
+    diff, pairs = min_difference_pairs(users)
+    assert diff == 0
+    first = next(pairs)
+    assert first["user_1"]["id"] == 1 and first["user_2"]["id"] == 2
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services.windows import StatsWindow
+
+
+def at(day, hour=0, minute=0):
+    return datetime(2026, 1, day, hour, minute)
+
+
+@pytest.mark.parametrize(
+    "window, full_days, partial_ranges, last_day",
+    [
+        # Внутри одного дня
+        (
+            StatsWindow(at(5, 10), at(5, 18)),
+            (date(2026, 1, 6), date(2026, 1, 5)),
+            [(at(5, 10), at(5, 18))],
+            date(2026, 1, 5),
+        ),
+        (
+            StatsWindow(at(5), at(5, 6)),
+            (date(2026, 1, 5), date(2026, 1, 5)),
+            [(at(5), at(5, 6))],
+            date(2026, 1, 5),
+        ),
+        # Через полночь без полных дней
+        (
+            StatsWindow(at(5, 22), at(6, 2)),
+            (date(2026, 1, 6), date(2026, 1, 6)),
+            [(at(5, 22), at(6, 2))],
+            date(2026, 1, 6),
+        ),
+        # Конец ровно в полночь
+        (
+            StatsWindow(at(5, 10), at(7)),
+            (date(2026, 1, 6), date(2026, 1, 7)),
+            [(at(5, 10), at(6))],
+            date(2026, 1, 6),
+        ),
+        (
+            StatsWindow(at(5), at(7)),
+            (date(2026, 1, 5), date(2026, 1, 7)),
+            [],
+            date(2026, 1, 6),
+        ),
+        # Неполные дни на обеих границах
+        (
+            StatsWindow(at(5, 10), at(8, 6, 30)),
+            (date(2026, 1, 6), date(2026, 1, 8)),
+            [(at(5, 10), at(6)), (at(8), at(8, 6, 30))],
+            date(2026, 1, 8),
+        ),
+        # Только since
+        (
+            StatsWindow(at(5), None),
+            (date(2026, 1, 5), None),
+            [],
+            None,
+        ),
+        (
+            StatsWindow(at(5, 10), None),
+            (date(2026, 1, 6), None),
+            [(at(5, 10), at(6))],
+            None,
+        ),
+        # Только until
+        (
+            StatsWindow(None, at(7)),
+            (None, date(2026, 1, 7)),
+            [],
+            date(2026, 1, 6),
+        ),
+        (
+            StatsWindow(None, at(7, 12)),
+            (None, date(2026, 1, 7)),
+            [(at(7), at(7, 12))],
+            date(2026, 1, 7),
+        ),
+    ]
+)
+def test_window_split(window, full_days, partial_ranges, last_day):
+    assert window.full_days() == full_days
+    assert window.partial_ranges() == partial_ranges
+    assert window.last_day() == last_day
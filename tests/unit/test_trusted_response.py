@@ -0,0 +1,40 @@
+import pytest
+from fastapi import Response
+
+from app.services.serialization import trusted_response
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ([], []),
+        ([("etag", '"abc"')], [(b"etag", b'"abc"')]),
+        # Повторяющиеся заголовки переносятся все
+        (
+            [("set-cookie", "a=1"), ("set-cookie", "b=2")],
+            [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")],
+        ),
+        (
+            [("link", '<...>; rel="next"'), ("link", '<...>; rel="prev"')],
+            [(b"link", b'<...>; rel="next"'),
+             (b"link", b'<...>; rel="prev"')],
+        ),
+        # Заголовки тела задает новый ответ
+        ([("content-type", "text/plain")], []),
+    ]
+)
+def test_trusted_response_headers(headers, expected):
+    response = Response()
+    del response.headers["content-length"]
+    for name, value in headers:
+        response.headers.append(name, value)
+
+    result = trusted_response({"ok": True}, response)
+
+    assert result.body == b'{"ok":true}'
+    assert result.headers["content-type"] == "application/json"
+    assert result.headers["content-length"] == str(len(result.body))
+    assert [
+        header for header in result.raw_headers
+        if header[0] not in (b"content-length", b"content-type")
+    ] == expected
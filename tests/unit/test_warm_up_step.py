@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.warmup import StartupState
+
+
+@pytest.mark.parametrize("failures", [0, 1, 3])
+def test_step_retries_until_success(monkeypatch, failures):
+    monkeypatch.setattr(settings, "warm_up_retry_delay", 0.001)
+    monkeypatch.setattr(settings, "warm_up_retry_max_delay", 0.002)
+    state = StartupState()
+    calls = []
+
+    async def flaky():
+        calls.append(len(calls))
+        if len(calls) <= failures:
+            raise ConnectionError("database is starting up")
+
+    asyncio.run(state.step("data_version", flaky))
+
+    assert len(calls) == failures + 1
+    assert "data_version" in state.steps
+    assert state.error is None
+    assert state.snapshot()["status"] == "starting"
+
+
+def test_step_reports_retrying(monkeypatch):
+    monkeypatch.setattr(settings, "warm_up_retry_delay", 60)
+    state = StartupState()
+
+    async def failing():
+        raise ConnectionError("database is starting up")
+
+    async def run():
+        step = asyncio.create_task(state.step("pool", failing))
+        await asyncio.sleep(0.01)
+        snapshot = state.snapshot()
+        step.cancel()
+        return snapshot
+
+    snapshot = asyncio.run(run())
+
+    assert snapshot["status"] == "retrying"
+    assert snapshot["error"] == "pool: database is starting up"
+    assert "pool" not in snapshot["steps"]